@@ -9,13 +9,159 @@ ArmyList:
 Detachment:
     Collects together all the units within a detachment, making sure that
     minimum requirements are met and keeping track of points.
+
+Functions:
+----------
+iter_json(file, stream_key):
+    Reads the top level of a json object from a file object a value at a
+    time, streaming the items of the stream_key list.
+
+iter_bundle(file):
+    Yields each army in a bundle, a JSON Lines file with one saved army per
+    line.
+
+write_bundle(armies, file):
+    Writes the armies to a file object as a bundle.
+
+encode_save(save, file_path, catalog=None):
+    Returns the bytes of a saved army as written to file_path.
+
+decode_save(data, file_path):
+    Returns the saved army from the bytes of the file at file_path.
 """
 
-import numpy as np
+import io
 import json
+import sys
 
+import armyb
 import init
 import squad
+import validation
+
+CHUNK_SIZE = 1 << 16  # characters read at a time by iter_json()
+
+
+def iter_json(file, stream_key):
+    """
+    Reads the top level of a json object from a file object a value at a
+    time without holding the whole file. Yields (key, value) for every key in
+    the object, except for the list under stream_key which is yielded an
+    item at a time as (stream_key, item).
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = '', 0, False
+
+    def fill():
+        # drops what has been read and adds the next chunk
+        nonlocal buffer, pos, eof
+        chunk = file.read(CHUNK_SIZE)
+        eof = not chunk
+        buffer, pos = buffer[pos:] + chunk, 0
+        return not eof
+
+    def next_char():
+        # skips whitespace and returns the next character without reading it
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\n\r':
+                pos += 1
+            if pos < len(buffer):
+                return buffer[pos]
+            if not fill():
+                raise ValueError("Unexpected end of json file")
+
+    def expect(chars):
+        nonlocal pos
+        char = next_char()
+        if char not in chars:
+            raise ValueError("Expected {!r} at {!r} in json file".format(
+                chars, buffer[pos:pos+20]))
+        pos += 1
+        return char
+
+    def value():
+        # a value ending at the end of the buffer may be cut short
+        nonlocal pos
+        next_char()
+        while True:
+            try:
+                ret, end = decoder.raw_decode(buffer, pos)
+                if end < len(buffer) or eof:
+                    pos = end
+                    return ret
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            fill()
+
+    expect('{')
+    if next_char() == '}':
+        return
+    while True:
+        key = value()
+        expect(':')
+        if key == stream_key and next_char() == '[':
+            pos += 1
+            if next_char() == ']':
+                pos += 1
+            else:
+                while True:
+                    yield key, value()
+                    if expect(',]') == ']':
+                        break
+        else:
+            yield key, value()
+        if expect(',}') == '}':
+            return
+
+
+def iter_bundle(file):
+    """
+    Yields each army in a bundle, a JSON Lines file object with one saved
+    army per line, reading one line at a time.
+    """
+    for line in file:
+        if line.strip():
+            army = ArmyList(None)
+            for i in army._load_items(iter_dict(json.loads(line))):
+                pass
+            yield army
+
+
+def iter_dict(army):
+    """Yields the (key, value) pairs of a saved army as iter_json() does."""
+    for key, value in army.items():
+        if key == "detachments":
+            for i in value:
+                yield key, i
+        else:
+            yield key, value
+
+
+def write_bundle(armies, file):
+    """Writes the armies to a file object as a bundle, one army per line."""
+    for army in armies:
+        file.write(json.dumps(army.save()) + '\n')
+    return
+
+
+def encode_save(save, file_path, catalog=None):
+    """
+    Returns the bytes of a saved army dictionary as ArmyList.save() writes
+    them to file_path, in the .armyb format if the path ends in .armyb and
+    as json otherwise.
+    """
+    if str(file_path).endswith(".armyb"):
+        return armyb.dumps(save, catalog)
+    return json.dumps(save, indent=4).encode()
+
+
+def decode_save(data, file_path):
+    """Returns the saved army dictionary from the bytes of file_path."""
+    if str(file_path).endswith(".armyb"):
+        return armyb.loads(data)
+    return json.loads(data)
 
 
 class ArmyList:
@@ -33,91 +179,291 @@ class ArmyList:
 
     Public Attributes
     -----------------
+    catalog : init.FactionCatalog
+        Catalog of the army's faction.
     detachments : list (Detachment)
-        List of all the detachments in the army.
+        List of all the detachments in the army in the order they were added,
+        kept until a detachment is added or deleted. Not to be modified, use
+        add_detachment() and del_detachment() instead.
     detachment_names: list (str)
-        List of names of each of the detachments for quick reference.
+        List of names of each of the detachments for quick reference, a copy
+        of the names kept until a detachment is added, deleted or renamed.
     cp : int
         Total number of command points in the army.
     pts : int
-        Total points in the army.
+        Total points in the army, counted on first use and then updated as
+        detachments and units change.
+    violations : list (validation.Violation)
+        Rules broken by any of the detachments or their units.
     faction : str
         The faction of the Army list being made.
+    version : int
+        Number of changes made to the army, its detachments and units, used
+        to tell when its cached text is out of date.
+    journal : journal.Journal
+        Journal each edit to the army is written to, None if the army isn't
+        journalled.
 
     Public Methods
     --------------
-    save(self, file_path): Saves the army as a json to the given file_path.
+    save(self, file_path=None):
+        Saves the army as a json, or .armyb, to the given file_path, returning
+        the saved dictionary.
 
     load(self, file_path): Loads the army from the specified filepath.
 
+    iter_load(self, file):
+        Loads the army from a file object, yielding each detachment, with all
+        its units, as it is read.
+
+    write(self, file): Writes the army's text to the file object.
+
+    print_army(self, file=None): Prints the army to file, stdout if None.
+
     add_detachment(self, detach): Adds a detachment to the army list.
 
-    del_detachment(self, name): Deletes the detachment with the supplied name.
+    del_detachment(self, name):
+        Deletes the detachment with the supplied name, or the Detachment given.
+
+    get_detachment(self, name): Returns the detachment with the supplied name.
     """
 
     def __init__(self, faction, load=False):
+        self.__pts = None  # cached total, None until first counted
+        self.__version = 0
+        self.__text = None  # cached (version, text) of __repr__
+        self.__clear_detachments()
+        self.journal = None
+        self.faction = None
         if load:
             self.load(faction)
         else:
             self.faction = faction
-            self.detachments = []
+        return
+
+    def __clear_detachments(self):
+        self.__order = {}  # id of each detachment to the detachment, in order
+        self.__index = {}  # name to the detachments of that name, in order
+        self.__counters = {}  # type to the last number used to name one
+        self.__list = None  # cached detachments, None until asked for
+        self.__names = None  # cached detachment_names, None until asked for
         return
 
     @property
-    def cp(self): return np.sum([i.cp for i in self.detachments], dtype=int)
+    def catalog(self): return init.get_catalog(self.faction)
 
     @property
-    def pts(self): return np.sum([i.pts for i in self.detachments], dtype=int)
+    def cp(self): return sum(i.cp for i in self.detachments)
 
     @property
-    def detachment_names(self): return [i.name for i in self.detachments]
+    def pts(self):
+        if self.__pts is None:
+            self.__pts = sum(i.pts for i in self.detachments)
+        return self.__pts
+
+    def _pts_changed(self, delta):
+        """Called by a detachment whose points have changed by delta."""
+        if self.__pts is not None:
+            self.__pts += delta
+        return
+
+    @property
+    def version(self): return self.__version
+
+    def _touch(self):
+        """Counts a change to the army or anything in it."""
+        self.__version += 1
+        return
+
+    def _record(self, kind, detach, unit=None):
+        """Writes an edit of the kind to a detachment or unit to the journal."""
+        if self.journal is not None:
+            self.journal.record(kind, detach, unit)
+        return
 
-    def save(self, file_path):
-        """Saves the army as a json to the given file_path."""
+    @property
+    def detachments(self):
+        if self.__list is None:
+            self.__list = list(self.__order.values())
+        return self.__list
+
+    @property
+    def detachment_names(self):
+        if self.__names is None:
+            self.__names = [i.name for i in self.__order.values()]
+        return list(self.__names)  # a copy so callers can't change the cache
+
+    @property
+    def violations(self):
+        return [i for detach in self.detachments for i in detach.violations]
+
+    def save(self, file_path=None):
+        """
+        Saves the army as a json to the given file_path, or in the compact
+        binary format of armyb if the path ends in .armyb, returning the
+        saved dictionary. Nothing is written if file_path is None.
+        """
         save = {}
         save["faction"] = self.faction
         save["detachments"] = [i.save() for i in self.detachments]
-        with open(file_path, 'w') as fp:
-            json.dump(save, fp, indent=4)
+        if file_path is not None:
+            with open(file_path, 'wb') as fp:
+                fp.write(encode_save(save, file_path, self.catalog))
         return save
 
     def load(self, file_path):
-        """Loads the army from the specified filepath."""
+        """Loads the army from the specified filepath, json or .armyb."""
+        if str(file_path).endswith(".armyb"):
+            with open(file_path, 'rb') as file:
+                save = decode_save(file.read(), file_path)
+            for i in self._load_items(iter_dict(save)):
+                pass
+            return
+
         with open(file_path, 'r') as file:
-            army = json.load(file)
+            for i in self.iter_load(file):
+                pass
+        return
 
-        self.faction = army["faction"]
-        self.detachments = [Detachment(i) for i in army["detachments"]]
-        for i in self.detachments:
-            i.parent = self
+    def iter_load(self, file):
+        """
+        Loads the army from a file object, yielding each detachment as soon
+        as it has been read and added to the army, so the file is never held
+        in memory as a whole. A detachment is read and its units built all at
+        once: its force organisation chart bounds how many units it holds,
+        so only the number of detachments grows with the file.
+        """
+        return self._load_items(iter_json(file, "detachments"))
+
+    def _load_items(self, items):
+        """Loads the army from the (key, value) pairs of a saved army."""
+        for i in self.__order.values():
+            i.parent = None
+        self.__clear_detachments()
+        self.__pts = None
+        self._touch()
+        waiting = []  # detachments read before the faction
+        for key, value in items:
+            if key == "faction":
+                self.faction = value
+            elif key == "detachments":
+                waiting.append(value)
+            if waiting and self.faction is not None:
+                catalog = self.catalog
+                for i in waiting:
+                    detach = Detachment(i, catalog)
+                    self.__register(detach)
+                    self._touch()
+                    yield detach
+                waiting = []
+        if waiting:
+            raise ValueError("No faction found in saved army")
+        return
+
+    def __register(self, detach):
+        """Adds the detachment to the end of the army and its name index."""
+        self.__order[id(detach)] = detach
+        detach.parent = self
+        self.__index.setdefault(detach.name, []).append(detach)
+        self.__list = None
+        self.__names = None
+        return
+
+    def _next_name(self, detachment_type):
+        """
+        Returns the automatic name of the next detachment of the type, its
+        type numbered one higher than the last, skipping any name in use.
+        Numbers are not re-used once a detachment has been deleted.
+        """
+        number = self.__counters.get(detachment_type, 0)
+        while True:
+            number += 1
+            name = detachment_type + ' ' + str(number)
+            if name not in self.__index:
+                self.__counters[detachment_type] = number
+                return name
+
+    def _renamed(self, detach, old_name):
+        """Called by a detachment of the army renamed from old_name."""
+        detachments = self.__index[old_name]
+        for index, i in enumerate(detachments):
+            if i is detach:
+                del detachments[index]
+                break
+        if not detachments:
+            del self.__index[old_name]
+        self.__index.setdefault(detach.name, []).append(detach)
+        self.__names = None
         return
 
     def add_detachment(self, detach):
         """Adds a detachment to the army list"""
-        self.detachments.append(detach)
-        detach.parent = self
+        self.__register(detach)
+        self._pts_changed(detach.pts)
+        self._touch()
+        self._record("add_detachment", detach)
         return
 
     def del_detachment(self, name):
-        """Deletes the detachment with the supplied name"""
-        if name not in self.detachment_names:
-            raise ValueError("Detachment name {} doesn't exist.".format(name))
-
-        for detach in self.detachment_names:
-            if detach == name:
-                self.detachments.pop(self.detachment_names.index(detach))
-                self.detachment_names.remove(detach)
+        """
+        Deletes the detachment with the supplied name, the first added if
+        several share the name, or the Detachment given.
+        """
+        if isinstance(name, Detachment):
+            detach = name
+            if self.__order.get(id(detach)) is not detach:
+                raise ValueError("Detachment {} isn't in the army.".format(detach.name))
+        else:
+            detach = self.get_detachment(name)
+        self._record("del_detachment", detach)
+        detachments = self.__index[detach.name]
+        for index, i in enumerate(detachments):
+            if i is detach:
+                del detachments[index]
                 break
+        if not detachments:
+            del self.__index[detach.name]
+        del self.__order[id(detach)]
+        self.__list = None
+        self.__names = None
+        detach.parent = None
+        self._pts_changed(-detach.pts)
+        self._touch()
         return
 
+    def get_detachment(self, name):
+        """
+        Returns the detachment with the supplied name, the first added if
+        several share the name.
+        """
+        try:
+            return self.__index[name][0]
+        except KeyError:
+            raise ValueError("Detachment name {} doesn't exist.".format(name))
+
     def __repr__(self):
-        ret = self.faction + '\n'
+        if self.__text is None or self.__text[0] != self.__version:
+            buffer = io.StringIO()
+            self.write(buffer)
+            self.__text = (self.__version, buffer.getvalue())
+        return self.__text[1]
+
+    def write(self, file):
+        """
+        Writes the army's text to the file object a detachment at a time,
+        without joining the whole army into one string.
+        """
+        file.write(self.faction + '\n')
         for i in self.detachments:
-            ret += i.__repr__()
-        return ret
+            file.write(i.__repr__())
+        return
 
-    def print_army(self):
-        print(self)
+    def print_army(self, file=None):
+        """Prints the army to file, stdout if None."""
+        if file is None:
+            file = sys.stdout
+        self.write(file)
+        file.write('\n')
         return
 
 
@@ -131,6 +477,9 @@ class Detachment:
     detachment_type : str/ dict
         Type of detachment to be created, or dictionary from which to generate
         a pre-made army.
+    catalog : init.FactionCatalog (default=None)
+        Catalog from which the detachment and its units are created, the
+        current catalog if None.
 
     Public Attributes
     -----------------
@@ -138,6 +487,8 @@ class Detachment:
         Army to which the detachment belongs.
     treeid : wx.TreeItemID
         ID for wx.TreeCtrl in GUI
+    catalog : init.FactionCatalog
+        Catalog from which the detachment and its units are created.
     foc : dict
         Force organisation chart for the detachment.
     cp : int
@@ -152,7 +503,15 @@ class Detachment:
         Dictionary split up intol battlefield roles containing lists of
         squad.Unit.
     pts: int
-        Total points for the detachment.
+        Total points for the detachment, counted on first use and then
+        updated as units change.
+    violations : list (validation.Violation)
+        Rules broken by the force organisation chart or any of the units. The
+        chart is checked again only after units are added or deleted and each
+        unit only after it changes.
+    version : int
+        Number of changes made to the detachment and its units, used to tell
+        when its cached text is out of date.
 
     Public Methods
     --------------
@@ -163,11 +522,23 @@ class Detachment:
     add_unit(self, unit): Adds the given unit to the detachment.
 
     del_unit(self, unit): Deletes the given unit from the detachment.
+
+    replace_unit(self, unit, new_unit):
+        Puts new_unit in the place of the given unit in the detachment.
+
+    clone(self): Returns a copy of the detachment and its units.
     """
 
-    def __init__(self, detachment_type):
+    def __init__(self, detachment_type, catalog=None):
+        if catalog is None:
+            catalog = init.current_catalog
+        self.catalog = catalog
         self.treeid = None
         self.__parent = None
+        self.__pts = None  # cached total, None until first counted
+        self.__foc_violations = None  # cached, None until checked
+        self.__version = 0
+        self.__text = None  # cached (version, text) of __repr__
         self.__default_name = True
         self.__units_dict = {"HQ": [],
                              "Troops": [],
@@ -181,17 +552,17 @@ class Detachment:
             self.type = detachment_type
             self.__name = self.type
             # will raise an error if the detachment doesn't exist:
-            init.detachments_dict[self.type]
+            self.catalog.detachments_dict[self.type]
         else:
             raise TypeError("detachment type must be a dict or string got {}".format(
                 type(detachment_type)))
         return
 
     @property
-    def foc(self): return init.detachments_dict[self.type]["foc"]
+    def foc(self): return self.catalog.detachments_dict[self.type]["foc"]
 
     @property
-    def cp(self): return init.detachments_dict[self.type]["cp"]
+    def cp(self): return self.catalog.detachments_dict[self.type]["cp"]
 
     @property
     def units_dict(self): return self.__units_dict
@@ -204,12 +575,9 @@ class Detachment:
         self.__parent = parent
 
         # number name if same detachment already exists
-        if self.__default_name:
-            counter = 0
-            for i in self.parent.detachment_names:
-                if self.type in i:
-                    counter += 1
-            self.__name = self.type + ' ' + str(counter)
+        if self.__default_name and parent is not None:
+            self.__name = parent._next_name(self.type)
+            self._touch()
 
     @property
     def name(self): return self.__name
@@ -217,24 +585,68 @@ class Detachment:
     @name.setter
     def name(self, new_name):
         """Changes the name of the detachment to the given new_name string."""
+        old_name = self.__name
         self.__name = new_name
         self.__default_name = False
+        if self.__parent is not None:
+            self.__parent._renamed(self, old_name)
+        self._touch()
+        self._record("rename_detachment")
 
     @property
-    def pts(self): return np.sum([np.sum([i.pts for i in unit])
-                                  for key, unit in self.units_dict.items()],
-                                 dtype=int)
+    def pts(self):
+        if self.__pts is None:
+            self.__pts = sum(i.pts for units in self.units_dict.values()
+                             for i in units)
+        return self.__pts
 
-    def __repr__(self):
-        output = "***" + self.name + "\t\t" + "Total:{}pts".format(self.pts) + "***\n"
-        for key, value in self.units_dict.items():
-            if len(value) != 0:
-                output += "*" + key + "*\n"
-                for i in value:
-                    output += i.__repr__() + "\n"
-                output += "\n"
+    @property
+    def violations(self):
+        if self.__foc_violations is None:
+            self.__foc_violations = validation.check_foc(self)
+        return list(self.__foc_violations) + [i for units in self.units_dict.values()
+                                               for unit in units
+                                               for i in unit.violations]
+
+    @property
+    def version(self): return self.__version
+
+    def _touch(self):
+        """Counts a change to the detachment and passes it on to the army."""
+        self.__version += 1
+        if self.parent is not None:
+            self.parent._touch()
+        return
+
+    def _record(self, kind, unit=None):
+        """Passes an edit of the kind to the detachment or unit to the army."""
+        if self.parent is not None:
+            self.parent._record(kind, self, unit)
+        return
+
+    def _pts_changed(self, delta):
+        """
+        Called by a unit whose points have changed by delta, passing the change
+        on to the army without re-counting either.
+        """
+        if self.__pts is None:
+            return
+        self.__pts += delta
+        if self.parent is not None:
+            self.parent._pts_changed(delta)
+        return
 
-        return output
+    def __repr__(self):
+        if self.__text is None or self.__text[0] != self.__version:
+            output = "***" + self.name + "\t\t" + "Total:{}pts".format(self.pts) + "***\n"
+            for key, value in self.units_dict.items():
+                if len(value) != 0:
+                    output += "*" + key + "*\n"
+                    for i in value:
+                        output += i.__repr__() + "\n"
+                    output += "\n"
+            self.__text = (self.__version, output)
+        return self.__text[1]
 
     def save(self):
         """Creates a dictionary to save the current detachment."""
@@ -269,23 +681,77 @@ class Detachment:
             self.__default_name = False
 
         for foc_role, unit_list in self.__units_dict.items():
-            self.__units_dict[foc_role] = [squad.Unit(i, foc_role)
+            self.__units_dict[foc_role] = [squad.Unit(i, foc_role, self.catalog)
                                            for i in loaded_dict["units"][foc_role]]
             for unit in self.__units_dict[foc_role]:
                 unit.parent = self
         return
 
+    def clone(self):
+        """
+        Returns a copy of the detachment and its units, not yet added to an
+        army. The catalog data is shared and nothing is re-parsed.
+        """
+        ret = Detachment.__new__(Detachment)
+        ret.catalog = self.catalog
+        ret.treeid = None
+        ret.__parent = None
+        ret.__pts = self.__pts
+        ret.__foc_violations = None
+        ret.__version = 0
+        ret.__text = None
+        ret.__default_name = self.__default_name
+        ret.type = self.type
+        ret.__name = self.__name
+        ret.__units_dict = {foc_role: [i.clone(ret) for i in units]
+                            for foc_role, units in self.__units_dict.items()}
+        return ret
+
     def add_unit(self, unit):
         """Adds the given unit to the detachment."""
         if not isinstance(unit, squad.Unit):
             raise ValueError("Invalid unit input")
         unit.parent = self
         self.__units_dict[unit.battlefield_role].append(unit)
+        self.__foc_violations = None
+        self._pts_changed(unit.pts)
+        self._touch()
+        self._record("add_unit", unit)
         return
 
+    def __unit_index(self, unit):
+        """Returns the index of the unit in the list of its battlefield role."""
+        for index, i in enumerate(self.__units_dict[unit.battlefield_role]):
+            if i is unit:
+                return index
+        raise ValueError("{} isn't in the detachment".format(unit.name))
+
     def del_unit(self, unit):
         """Deletes the given unit from the detachment."""
-        self.__units_dict[unit.battlefield_role].remove(unit)
+        index = self.__unit_index(unit)
+        self._record("del_unit", unit)
+        del self.__units_dict[unit.battlefield_role][index]
+        self.__foc_violations = None
+        unit.parent = None
+        self._pts_changed(-unit.pts)
+        self._touch()
+        return
+
+    def replace_unit(self, unit, new_unit):
+        """
+        Puts new_unit in the place of the given unit, which must have the
+        same battlefield role, as a single edit of the detachment.
+        """
+        if new_unit.battlefield_role != unit.battlefield_role:
+            raise ValueError("Can't replace a {} unit with a {} unit".format(
+                unit.battlefield_role, new_unit.battlefield_role))
+        index = self.__unit_index(unit)
+        new_unit.parent = self
+        self.__units_dict[unit.battlefield_role][index] = new_unit
+        unit.parent = None
+        self._pts_changed(new_unit.pts - unit.pts)
+        self._touch()
+        self._record("update_unit", new_unit)
         return
 
     def __eq__(self, other):
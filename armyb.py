@@ -0,0 +1,350 @@
+"""
+Compact binary .armyb format for saved armies. Unit, model, wargear and
+detachment names are stored as integer IDs into the faction's ID tables,
+and every integer as a variable length unsigned int, so a saved army takes
+a fraction of the space of its json.
+
+The ID tables are kept in resources/<faction>/Ids.json and are append-only:
+a name keeps its ID for good, and names added to the catalog are added to
+the end of the tables, so every file written before still reads back. Each
+file records how long the tables were when it was written and a hash of
+that part of them, and is read against the same entries of the current
+tables. Names in the catalog that aren't in Ids.json yet are given IDs
+after the saved ones in name order, with a warning, and are made permanent
+by running:
+    python -m armyb [faction...]
+
+An army read from .armyb is the same dictionary as one read from the json
+save, so either can be converted to the other without loss.
+
+Layout, every int a varint and every string a varint length and UTF-8:
+    MAGIC, FORMAT_VERSION, faction, length of each ID table, 8 byte hash
+    of the tables up to those lengths, no. of detachments
+    detachment: type ID, name, no. of roles, then per role: role ID, no. of
+                units, units
+    unit: type ID, size, wargear, models, name
+    model: type ID, size, wargear
+    wargear: list of items, each a list of parts of wargear ID and number
+Names, lists and numbers of wargear that may be None or left out of the
+save are written as 0, otherwise as one more than their length or number.
+
+Functions
+---------
+dumps(save, catalog=None):
+    Returns the .armyb bytes of a saved army dictionary.
+
+loads(data):
+    Returns the saved army dictionary from .armyb bytes.
+
+catalog_tables(catalog):
+    Returns the ID tables of a catalog.
+
+update_ids(faction):
+    Adds the names missing from a faction's Ids.json to its end.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import warnings
+
+import init
+
+MAGIC = b"ARMYB"
+FORMAT_VERSION = 1
+KINDS = ["detachments", "units", "models", "wargear"]
+ROLES = ["HQ", "Troops", "Elites", "Fast Attack", "Heavy Support",
+         "Dedicated Transports"]
+
+_tables = {}  # (faction, catalog hash) to the tables of catalog_tables()
+_hashes = {}  # (faction, catalog hash, lengths) to the hash of the tables
+
+
+def _ids_path(faction):
+    """Returns the path of the ID tables of a faction."""
+    return "./resources/{}/Ids.json".format(faction)
+
+
+def _catalog_names(catalog):
+    """Returns {kind: set of names} of everything in the catalog."""
+    return {"detachments": set(catalog.detachments_dict),
+            "units": {name for units in catalog.units_dict.values() for name in units},
+            "models": set(catalog.models_dict),
+            "wargear": set(catalog.wargear_index)}
+
+
+def _extend(saved, catalog):
+    """
+    Returns the saved ID tables with the names of the catalog they don't
+    have added to the end of each in name order, and the names added.
+    """
+    names, missing = {}, {}
+    for kind, current in _catalog_names(catalog).items():
+        table = saved.get(kind, [])
+        known = set(table)
+        missing[kind] = sorted(i for i in current if i not in known)
+        names[kind] = table + missing[kind]
+    return names, missing
+
+
+def _read_ids(faction):
+    """Returns the saved ID tables of a faction, empty if there are none."""
+    try:
+        with open(_ids_path(faction), 'r') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def catalog_tables(catalog):
+    """
+    Returns ({kind: names}, {kind: {name: ID}}) for the catalog, where kind
+    is one of KINDS and the names are in the order of their IDs.
+    """
+    key = (catalog.faction, catalog.hash)
+    if key not in _tables:
+        names, missing = _extend(_read_ids(catalog.faction), catalog)
+        added = sum(len(i) for i in missing.values())
+        if added:
+            warnings.warn("{} names of the {} catalog aren't in {}, run "
+                          "'python -m armyb {}' to keep their .armyb IDs".format(
+                              added, catalog.faction, _ids_path(catalog.faction),
+                              catalog.faction))
+        ids = {kind: {name: index for index, name in enumerate(value)}
+               for kind, value in names.items()}
+        _tables[key] = (names, ids)
+    return _tables[key]
+
+
+def _tables_hash(catalog, lengths):
+    """Returns the 8 byte hash of the catalog's ID tables up to lengths."""
+    key = (catalog.faction, catalog.hash, lengths)
+    if key not in _hashes:
+        names = catalog_tables(catalog)[0]
+        digest = hashlib.sha256()
+        for kind, length in zip(KINDS, lengths):
+            digest.update('\0'.join([kind, *names[kind][:length]]).encode() + b'\1')
+        _hashes[key] = digest.digest()[:8]
+    return _hashes[key]
+
+
+def update_ids(faction):
+    """
+    Adds the names of the faction's catalog missing from its Ids.json to the
+    end of the tables, in the order they were given IDs before being saved,
+    and returns the number added. Names are never removed or re-ordered.
+    """
+    names, missing = _extend(_read_ids(faction), init.get_catalog(faction))
+    added = sum(len(i) for i in missing.values())
+    if added:
+        path = _ids_path(faction)
+        with open(path + ".tmp", 'w') as file:
+            json.dump(names, file, indent=4, ensure_ascii=False)
+            file.write('\n')
+        os.replace(path + ".tmp", path)
+    return added
+
+
+def dumps(save, catalog=None):
+    """
+    Returns the .armyb bytes of a saved army dictionary, as returned by
+    army_list.ArmyList.save(), using the faction's catalog if None.
+    """
+    if catalog is None:
+        catalog = init.get_catalog(save["faction"])
+    names, ids = catalog_tables(catalog)
+    out = bytearray(MAGIC)
+
+    def write_int(value):
+        if value < 0:
+            raise ValueError("Negative values can't be saved to .armyb")
+        while value > 0x7f:
+            out.append(value & 0x7f | 0x80)
+            value >>= 7
+        out.append(value)
+
+    def write_str(value, optional=False):
+        if value is None:
+            if not optional:
+                raise ValueError("Unexpected None in saved army")
+            out.append(0)
+            return
+        value = value.encode()
+        write_int(len(value) + optional)
+        out.extend(value)
+
+    def write_id(kind, name):
+        try:
+            write_int(ids[kind][name])
+        except KeyError:
+            raise KeyError("{} not found in the {} {} of the catalog".format(
+                name, catalog.faction, kind))
+
+    def write_wargear(wargear):
+        if wargear is None:
+            out.append(0)
+            return
+        write_int(len(wargear) + 1)
+        for item in wargear:
+            parts = item.split('+')
+            write_int(len(parts))
+            for part in parts:
+                if '*' in part:
+                    no_of, part = part.split('*')
+                    write_id("wargear", part)
+                    write_int(int(no_of) + 1)
+                else:
+                    write_id("wargear", part)
+                    out.append(0)
+
+    write_int(FORMAT_VERSION)
+    write_str(save["faction"])
+    lengths = tuple(len(names[kind]) for kind in KINDS)
+    for length in lengths:
+        write_int(length)
+    out.extend(_tables_hash(catalog, lengths))
+    write_int(len(save["detachments"]))
+    for detach in save["detachments"]:
+        write_id("detachments", detach["type"])
+        write_str(detach["name"], True)
+        write_int(len(detach["units"]))
+        for role, units in detach["units"].items():
+            write_int(ROLES.index(role))
+            write_int(len(units))
+            for unit in units:
+                write_id("units", unit["type"])
+                write_int(unit["size"])
+                write_wargear(unit["wargear"])
+                if unit["models"] is None:
+                    out.append(0)
+                else:
+                    write_int(len(unit["models"]) + 1)
+                    for model in unit["models"]:
+                        write_id("models", model["type"])
+                        write_int(model["size"])
+                        write_wargear(model["wargear"])
+                write_str(unit["name"], True)
+    return bytes(out)
+
+
+def loads(data):
+    """
+    Returns the saved army dictionary from .armyb bytes, the same dictionary
+    as loading the army's json gives.
+    """
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not an .armyb file")
+    pos = len(MAGIC)
+    names = None  # read from the catalog named in the file
+
+    def read_int():
+        nonlocal pos
+        value, shift = 0, 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            value |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    def read_str(optional=False):
+        nonlocal pos
+        length = read_int()
+        if optional:
+            if length == 0:
+                return None
+            length -= 1
+        pos += length
+        if pos > len(data):
+            raise IndexError
+        return data[pos-length:pos].decode()
+
+    def read_hash():
+        nonlocal pos
+        pos += 8
+        if pos > len(data):
+            raise IndexError
+        return data[pos-8:pos]
+
+    def read_header():
+        nonlocal names
+        version = read_int()
+        if version != FORMAT_VERSION:
+            raise ValueError("Unsupported .armyb version {}, expected {}".format(
+                version, FORMAT_VERSION))
+
+        faction = read_str()
+        catalog = init.get_catalog(faction)
+        lengths = tuple(read_int() for kind in KINDS)
+        table_hash = read_hash()
+        names = catalog_tables(catalog)[0]
+        if any(length > len(names[kind]) for kind, length in zip(KINDS, lengths)):
+            raise ValueError(".armyb file was saved with a newer {} catalog".format(
+                faction))
+        if table_hash != _tables_hash(catalog, lengths):
+            raise ValueError(".armyb file was saved with a different {} catalog".format(
+                faction))
+        if any(length < len(names[kind]) for kind, length in zip(KINDS, lengths)):
+            # IDs added since the file was written are out of range
+            names = {kind: names[kind][:length] for kind, length in zip(KINDS, lengths)}
+        return faction
+
+    def read_wargear():
+        length = read_int()
+        if length == 0:
+            return None
+        wargear = []
+        for i in range(length - 1):
+            parts = []
+            for j in range(read_int()):
+                part = names["wargear"][read_int()]
+                no_of = read_int()
+                parts.append(part if no_of == 0 else "{}*{}".format(no_of - 1, part))
+            wargear.append('+'.join(parts))
+        return wargear
+
+    def read_army():
+        faction = read_header()
+        detachments = []
+        for i in range(read_int()):
+            detach = {"type": names["detachments"][read_int()],
+                      "name": read_str(True),
+                      "units": {}}
+            for j in range(read_int()):
+                role = ROLES[read_int()]
+                units = []
+                for k in range(read_int()):
+                    unit = {"type": names["units"][read_int()],
+                            "size": read_int(),
+                            "wargear": read_wargear()}
+                    no_models = read_int()
+                    if no_models == 0:
+                        unit["models"] = None
+                    else:
+                        unit["models"] = [{"type": names["models"][read_int()],
+                                           "size": read_int(),
+                                           "wargear": read_wargear()}
+                                          for m in range(no_models - 1)]
+                    unit["name"] = read_str(True)
+                    units.append(unit)
+                detach["units"][role] = units
+            detachments.append(detach)
+        if pos != len(data):
+            raise ValueError("Unexpected data at the end of the .armyb file")
+        return {"faction": faction, "detachments": detachments}
+
+    try:
+        return read_army()
+    except IndexError:
+        raise ValueError("Truncated or corrupt .armyb file")
+
+
+if __name__ == "__main__":
+    factions = sys.argv[1:] or sorted(
+        i for i in os.listdir("./resources")
+        if os.path.isfile(os.path.join("./resources", i, "Units.json")))
+    for faction in factions:
+        print("{}: {} names added to {}".format(faction, update_ids(faction),
+                                                 _ids_path(faction)))
@@ -0,0 +1,53 @@
+"""
+Size and speed of the binary .armyb format against the indented json that
+ArmyList.save() writes and compact json, over a corpus of lists. Encoding
+and decoding are timed from and to the saved army dictionary.
+
+Run from the repository root:
+    python -m benchmarks.bench_armyb [no_lists]
+"""
+
+import json
+import sys
+import time
+
+import armyb
+import init
+from benchmarks.corpus import random_corpus
+
+
+def per_list(func, items):
+    """Returns the best time in us per item of calling func on every item."""
+    times = []
+    for n in range(3):
+        t = time.perf_counter()
+        for i in items:
+            func(i)
+        times.append(time.perf_counter() - t)
+    return min(times) / len(items) * 1e6
+
+
+def main():
+    init.init("Necron")
+    no_lists = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    saves = [army.save() for army in random_corpus("Necron", no_lists)]
+
+    formats = {"json (indent=4)": (lambda i: json.dumps(i, indent=4).encode(),
+                                   json.loads),
+               "json (compact)": (lambda i: json.dumps(i, separators=(',', ':')).encode(),
+                                  json.loads),
+               ".armyb": (armyb.dumps, armyb.loads)}
+    print("{} lists".format(no_lists))
+    print("{:<18}{:>14}{:>14}{:>14}".format("", "bytes/list", "encode (us)",
+                                            "decode (us)"))
+    for name, (encode, decode) in formats.items():
+        data = [encode(i) for i in saves]
+        assert [decode(i) for i in data] == saves
+        print("{:<18}{:>14.0f}{:>14.1f}{:>14.1f}".format(
+            name, sum(len(i) for i in data) / no_lists, per_list(encode, saves),
+            per_list(decode, data)))
+    return
+
+
+if __name__ == "__main__":
+    main()
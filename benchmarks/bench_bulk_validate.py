@@ -0,0 +1,44 @@
+"""
+Time to validate a bundle of army lists one at a time in a single process,
+as the tournament check-in did, against bulk_validate's pool of workers
+seeded with the pre-loaded catalogs.
+
+Run from the repository root:
+    python -m benchmarks.bench_bulk_validate [no_lists]
+"""
+
+import io
+import os
+import sys
+import tempfile
+import time
+
+import army_list
+import bulk_validate
+import init
+from benchmarks.corpus import random_corpus
+
+
+def main():
+    init.init("Necron")
+    no_lists = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with tempfile.TemporaryDirectory() as folder:
+        bundle = os.path.join(folder, "bundle.jsonl")
+        with open(bundle, 'w') as file:
+            army_list.write_bundle(random_corpus("Necron", no_lists // 2)
+                                   + random_corpus("Tau", no_lists - no_lists // 2), file)
+
+        print("{} lists, {} cpus".format(no_lists, os.cpu_count()))
+        for processes in sorted({1, 2, 4, os.cpu_count() or 1}):
+            start = time.perf_counter()
+            checked, failed = bulk_validate.run([bundle], io.StringIO(), processes,
+                                                ["Necron", "Tau"])
+            assert checked == no_lists
+            elapsed = time.perf_counter() - start
+            print("{:>3} processes: {:7.2f}s {:8.0f} lists/s".format(
+                processes, elapsed, no_lists / elapsed))
+    return
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Cold-start vs. warm-start benchmark for init.init.
+
+A cold start compiles the faction catalog from the JSON source files, a warm
+start reads the compiled catalog cache. Each start runs in a fresh
+interpreter, as the short-lived worker processes do.
+
+Run from the repository root:
+    python -m benchmarks.bench_catalog
+"""
+
+import os
+import subprocess
+import sys
+
+import init
+
+RUNS = 20
+SNIPPET = """
+import time
+import init
+t = time.perf_counter()
+init.init({faction!r})
+print(time.perf_counter() - t)
+"""
+
+
+def time_start(faction, cold):
+    """Times loading the faction in a new interpreter."""
+    if cold:
+        try:
+            os.remove(init._cache_path(faction))
+        except OSError:
+            pass
+    output = subprocess.check_output([sys.executable, "-c",
+                                      SNIPPET.format(faction=faction)])
+    return float(output.decode().split()[-1])
+
+
+def main():
+    print("{:<8}{:>14}{:>14}{:>10}".format("faction", "cold (ms)", "warm (ms)",
+                                           "speedup"))
+    for faction in ["Necron", "Tau"]:
+        cold = min(time_start(faction, True) for i in range(RUNS))
+        warm = min(time_start(faction, False) for i in range(RUNS))
+        print("{:<8}{:>14.2f}{:>14.2f}{:>9.1f}x".format(faction, cold*1e3,
+                                                       warm*1e3, cold/warm))
+    return
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Timing of copying units and detachments with clone() against a save() and
+re-load round trip and copy.deepcopy, over the units of a corpus of lists.
+Each copy is taken to the state clone() gives, options parsed and points
+counted, as for a unit being edited in the GUI. deepcopy follows the parent
+references, so copying a unit also copies the rest of its army.
+
+Run from the repository root:
+    python -m benchmarks.bench_clone [no_lists]
+"""
+
+import copy
+import sys
+import time
+
+import init
+import squad
+from army_list import Detachment
+from benchmarks.corpus import random_corpus
+
+
+def per_item(func, items):
+    """Returns the best time in us per item of calling func on every item."""
+    times = []
+    for n in range(3):
+        t = time.perf_counter()
+        for i in items:
+            func(i)
+        times.append(time.perf_counter() - t)
+    return min(times) / len(items) * 1e6
+
+
+def ready(obj):
+    """Parses the options and counts the points of a unit or detachment."""
+    units = [obj] if isinstance(obj, squad.Unit) else \
+        [i for role in obj.units_dict.values() for i in role]
+    for unit in units:
+        unit.options, unit.pts
+    obj.pts
+    return obj
+
+
+def main():
+    init.init("Necron")
+    no_lists = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    corpus = random_corpus("Necron", no_lists)
+    detachments = [detach for army in corpus for detach in army.detachments]
+    units = [unit for detach in detachments for role in detach.units_dict.values()
+             for unit in role]
+    for detach in detachments:
+        ready(detach)
+
+    methods = {"clone": (lambda i: i.clone(), lambda i: i.clone()),
+               "save/load": (lambda i: ready(squad.Unit(i.save(), i.battlefield_role)),
+                             lambda i: ready(Detachment(i.save()))),
+               "deepcopy": (copy.deepcopy, copy.deepcopy)}
+    print("{} units in {} detachments".format(len(units), len(detachments)))
+    print("{:<12}{:>12}{:>18}".format("", "unit (us)", "detachment (us)"))
+    results = {}
+    for name, (unit_func, detach_func) in methods.items():
+        results[name] = (per_item(unit_func, units), per_item(detach_func, detachments))
+        print("{:<12}{:>12.1f}{:>18.1f}".format(name, *results[name]))
+    for name in ["save/load", "deepcopy"]:
+        print("clone is {:.0f}x faster than {} for units, {:.0f}x for detachments".format(
+            results[name][0] / results["clone"][0], name,
+            results[name][1] / results["clone"][1]))
+    return
+
+
+if __name__ == "__main__":
+    main()
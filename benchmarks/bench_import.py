@@ -0,0 +1,48 @@
+"""
+Import-time benchmark for the CLI modules. Times importing squad and
+army_list in a fresh interpreter, then building the option parser on first
+use from the shipped tables and, for comparison, by regenerating the tables
+in memory as happened at import before they were shipped.
+
+Run from the repository root:
+    python -m benchmarks.bench_import
+"""
+
+import subprocess
+import sys
+
+RUNS = 20
+SNIPPET = """
+import time
+t = time.perf_counter()
+import squad, army_list
+t_import = time.perf_counter() - t
+
+import option_parser
+t = time.perf_counter()
+option_parser.OptionParser().build({kwargs})
+print(t_import, time.perf_counter() - t)
+"""
+
+
+def time_run(kwargs):
+    """Returns the import time and parser build time in a new interpreter."""
+    output = subprocess.check_output([sys.executable, "-c",
+                                      SNIPPET.format(kwargs=kwargs)])
+    return [float(i) for i in output.decode().split()[-2:]]
+
+
+def main():
+    shipped = [time_run("") for i in range(RUNS)]
+    regenerated = [time_run("tabmodule='no_such_tables'") for i in range(RUNS)]
+    print("import squad, army_list: {:.2f}ms".format(
+        min(i[0] for i in shipped)*1e3))
+    print("build from shipped tables: {:.2f}ms".format(
+        min(i[1] for i in shipped)*1e3))
+    print("build regenerating tables: {:.2f}ms".format(
+        min(i[1] for i in regenerated)*1e3))
+    return
+
+
+if __name__ == "__main__":
+    main()
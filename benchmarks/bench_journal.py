@@ -0,0 +1,57 @@
+"""
+Cost of saving an army after every edit by re-writing it with
+ArmyList.save() against appending the edit to its journal, for armies of
+growing size. Each edit re-sizes a unit.
+
+Run from the repository root:
+    python -m benchmarks.bench_journal [no_edits]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import init
+import journal
+from benchmarks.corpus import random_corpus
+
+
+def edit_units(army):
+    """Returns the units of the army that can be re-sized back and forth."""
+    return [i for detach in army.detachments for role in detach.units_dict.values()
+            for i in role if i.mod_str is None and len(i.size_range) == 2]
+
+
+def time_edits(army, units, no_edits, save):
+    """Returns the time in us per edit of re-sizing units, calling save after each."""
+    start = time.perf_counter()
+    for n in range(no_edits):
+        unit = units[n % len(units)]
+        unit.re_size(unit.size_range[n % 2])
+        save()
+    return (time.perf_counter() - start) / no_edits * 1e6
+
+
+def main():
+    init.init("Necron")
+    no_edits = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    print("{:>10}{:>12}{:>16}{:>16}".format("pts", "units", "save (us)",
+                                            "journal (us)"))
+    with tempfile.TemporaryDirectory() as folder:
+        for pts in [500, 2000, 10000]:
+            army = random_corpus("Necron", 1, pts_target=pts)[0]
+            units = edit_units(army)
+            path = os.path.join(folder, "{}.army".format(pts))
+            save = time_edits(army, units, no_edits, lambda: army.save(path))
+            journal.Journal(army, path, compact_every=None)
+            append = time_edits(army, units, no_edits, lambda: None)
+            army.journal.close()
+            print("{:>10}{:>12}{:>16.1f}{:>16.1f}".format(
+                army.pts, sum(len(i) for detach in army.detachments
+                              for i in detach.units_dict.values()), save, append))
+    return
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Throughput of the ply tables against the hand written DescentParser, in
+option strings parsed per second. Every option string in the Tau and Necron
+Units.json and Models.json files is parsed, with the parse cache bypassed.
+
+Run from the repository root:
+    python -m benchmarks.bench_option_engines [repeats]
+"""
+
+import sys
+import time
+
+import init
+import option_parser
+
+
+def corpus():
+    """Returns (catalog, option string) pairs for every unit and model."""
+    pairs = []
+    for faction in ["Tau", "Necron"]:
+        catalog = init.get_catalog(faction)
+        entries = list(catalog.models_dict.values())
+        for units in catalog.units_dict.values():
+            entries += units.values()
+        for i in entries:
+            for j in i["options"] or []:
+                try:
+                    option_parser.OptionParser(catalog=catalog).parse2([j])
+                except KeyError:  # wargear missing from the Armoury.json file
+                    continue
+                pairs.append((catalog, j))
+    return pairs
+
+
+def throughput(engine, pairs, repeats):
+    """Returns the best strings/sec over repeats passes of pairs."""
+    parser = option_parser.OptionParser(engine=engine)
+    parser.parse2([pairs[0][1]], catalog=pairs[0][0])  # build outside the timing
+    best = 0
+    for n in range(repeats):
+        t = time.perf_counter()
+        for catalog, parse_string in pairs:
+            parser.parse2([parse_string], catalog=catalog)
+        best = max(best, len(pairs) / (time.perf_counter() - t))
+    return best
+
+
+def main(repeats=20):
+    pairs = corpus()
+    print("{} option strings".format(len(pairs)))
+    results = {i: throughput(i, pairs, repeats) for i in option_parser.ENGINES}
+    for engine, rate in results.items():
+        print("{:>8}: {:,.0f} strings/sec".format(engine, rate))
+    print("descent speedup: {:.1f}x".format(results["descent"] / results["ply"]))
+    return
+
+
+if __name__ == "__main__":
+    main(*[int(i) for i in sys.argv[1:]])
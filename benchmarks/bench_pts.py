@@ -0,0 +1,94 @@
+"""
+Points tracking benchmark. Edits a 200 unit army 10,000 times, reading the
+points of the unit, its detachment and the army after every edit as
+TreePane.update_headers does, with the cached totals against re-counting
+from scratch as every read did before they were cached.
+
+Run from the repository root:
+    python -m benchmarks.bench_pts [no_units] [no_edits]
+"""
+
+import random
+import sys
+import time
+
+import numpy as np
+
+import init
+from army_list import ArmyList, Detachment
+from benchmarks.corpus import ROLES, random_unit
+
+
+def count_unit(unit):
+    """Points of a unit counted from scratch."""
+    pts = 0
+    for obj in [unit] + unit.models:
+        if obj.wargear is not None:
+            pts += np.sum([i.pts for i in obj.wargear]) * obj.size
+    return pts + np.sum([i.size*i.root_data["pts"] for i in unit.models])
+
+
+def count_detachment(detach):
+    """Points of a detachment counted from scratch."""
+    return np.sum([count_unit(i) for units in detach.units_dict.values()
+                   for i in units], dtype=int)
+
+
+def build_army(no_units, rng, catalog):
+    """Creates an army of no_units random units in detachments of 50."""
+    army = ArmyList(catalog.faction)
+    for i in range(no_units):
+        if i % 50 == 0:
+            detach = Detachment("Brigade", catalog)
+            army.add_detachment(detach)
+        detach.add_unit(random_unit(rng.choice(ROLES), rng, catalog))
+    return army
+
+
+def edit(unit, rng):
+    """Re-sizes the unit or changes its wargear."""
+    if unit.options is not None and rng.random() < 0.5:
+        option = rng.choice(unit.options)
+        option.selected = []
+        option.select(rng.randrange(len(option.items_involved)))
+        unit.change_wargear([option])
+    elif unit.mod_str is None:
+        unit.re_size(rng.randint(unit.size_range[0], unit.size_range[-1]))
+    else:
+        unit.re_size(*[rng.randint(0, 2) for i in unit.mod_str])
+    return
+
+
+def run(army, no_edits, cached):
+    """Returns the seconds taken to make no_edits edits and read the points."""
+    rng = random.Random(1)
+    units = [i for detach in army.detachments for role in detach.units_dict.values()
+             for i in role]
+    t = time.perf_counter()
+    for n in range(no_edits):
+        unit = rng.choice(units)
+        edit(unit, rng)
+        if cached:
+            headers = (unit.pts, unit.parent.pts, army.pts)
+        else:
+            headers = (count_unit(unit), count_detachment(unit.parent),
+                       np.sum([count_detachment(i) for i in army.detachments]))
+    return time.perf_counter() - t, headers
+
+
+def main(no_units=200, no_edits=10000):
+    catalog = init.get_catalog("Necron")
+    results = {}
+    for cached in [False, True]:
+        army = build_army(no_units, random.Random(0), catalog)
+        results[cached] = run(army, no_edits, cached)
+    assert results[True][1] == results[False][1]
+    for cached, name in [(False, "re-counted"), (True, "cached")]:
+        t = results[cached][0]
+        print("{:>10}: {:.3f}s, {:.1f}us per edit".format(name, t, t/no_edits*1e6))
+    print("speedup: {:.1f}x".format(results[False][0] / results[True][0]))
+    return
+
+
+if __name__ == "__main__":
+    main(*[int(i) for i in sys.argv[1:]])
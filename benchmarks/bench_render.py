@@ -0,0 +1,71 @@
+"""
+Timing of rendering the text of armies, uncached against the cached text of
+each unit and detachment after a single edit, and of writing a corpus of
+armies to a file with ArmyList.write().
+
+Run from the repository root:
+    python -m benchmarks.bench_render [no_lists]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+import init
+from benchmarks.corpus import random_corpus
+
+
+def uncached(army):
+    """Renders the army as before the text was cached."""
+    ret = army.faction + '\n'
+    for detach in army.detachments:
+        output = "***" + detach.name + "\t\t" + "Total:{}pts".format(detach.pts) + "***\n"
+        for key, value in detach.units_dict.items():
+            if len(value) != 0:
+                output += "*" + key + "*\n"
+                for i in value:
+                    output += i._Unit__render() + "\n"
+                output += "\n"
+        ret += output
+    return ret
+
+
+def time_edits(corpus, render, seed, edits=500):
+    """Returns the time in us to re-size a random unit and render its army."""
+    rng = random.Random(seed)
+    t = time.perf_counter()
+    for n in range(edits):
+        army = rng.choice(corpus)
+        units = [i for role in army.detachments[0].units_dict.values() for i in role]
+        rng.choice(units).models[0].size = rng.randint(1, 3)
+        render(army)
+    return (time.perf_counter() - t) / edits * 1e6
+
+
+def main():
+    init.init("Necron")
+    no_lists = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    corpus = random_corpus("Necron", no_lists)
+    assert all(uncached(army) == repr(army) for army in corpus)
+
+    full = time_edits(corpus, uncached, 0)
+    cached = time_edits(corpus, repr, 0)
+    print("edit and render, uncached: {:.1f}us".format(full))
+    print("edit and render, cached:   {:.1f}us ({:.1f}x)".format(cached, full/cached))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "armies.txt")
+        t = time.perf_counter()
+        with open(path, 'w') as file:
+            for army in corpus:
+                army.write(file)
+        elapsed = time.perf_counter() - t
+        print("write {} armies, {:.0f}KiB: {:.1f}ms".format(
+            no_lists, os.path.getsize(path)/1024, elapsed*1e3))
+    return
+
+
+if __name__ == "__main__":
+    main()
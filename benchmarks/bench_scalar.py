@@ -0,0 +1,87 @@
+"""
+Microbenchmarks of the scalar aggregates on the points and size paths, the
+builtin sum() used now against the np.sum() calls and np.zeros index used
+before, for the 1 to 10 element lists that units and detachments hold.
+Finishes by checking the totals of a corpus of armies match and that the
+pure Python path gives plain ints.
+
+Run from the repository root:
+    python -m benchmarks.bench_scalar
+"""
+
+import timeit
+
+import numpy as np
+
+from benchmarks.corpus import random_corpus
+
+NUMBER = 20000
+
+
+def best(stmt, setup="pass", **namespace):
+    """Returns the best time in ns per call of stmt."""
+    timer = timeit.Timer(stmt, setup, globals=namespace)
+    return min(timer.repeat(5, NUMBER)) / NUMBER * 1e9
+
+
+def legacy_unit_pts(unit):
+    """Points of a unit counted with np.sum as before."""
+    pts = 0
+    for obj in [unit] + unit.models:
+        if obj.wargear is not None:
+            pts += np.sum([i.pts for i in obj.wargear]) * obj.size
+    return pts + np.sum([i.size*i.root_data["pts"] for i in unit.models])
+
+
+def python_unit_pts(unit):
+    """Points of a unit counted with sum() as now."""
+    pts = 0
+    for obj in [unit] + unit.models:
+        if obj.wargear is not None:
+            pts += sum(i.pts for i in obj.wargear) * obj.size
+    return pts + sum(i.size*i.root_data["pts"] for i in unit.models)
+
+
+def main():
+    print("{:<34}{:>12}{:>12}{:>9}".format("", "numpy (ns)", "python (ns)", "speedup"))
+
+    def row(name, legacy, python):
+        print("{:<34}{:>12.0f}{:>12.0f}{:>8.1f}x".format(name, legacy, python,
+                                                          legacy / python))
+
+    for n in [1, 3, 10]:
+        values = list(range(n))
+        row("sum of {} ints".format(n),
+            best("np.sum(values, dtype=int)", np=np, values=values),
+            best("sum(values)", values=values))
+
+    row("option index", best("index = np.zeros(2, dtype=np.uint8); index[0] = 3", np=np),
+        best("index = [0, 0]; index[0] = 3"))
+
+    army = random_corpus("Necron", 1, seed=1)[0]
+    units = [i for detach in army.detachments for role in detach.units_dict.values()
+             for i in role]
+    row("unit size ({} units)".format(len(units)),
+        best("[np.sum([j.size for j in i.models], dtype=int) for i in units]",
+             np=np, units=units),
+        best("[i.size for i in units]", units=units))
+    row("unit points ({} units)".format(len(units)),
+        best("[legacy_unit_pts(i) for i in units]", legacy_unit_pts=legacy_unit_pts,
+             units=units),
+        best("[python_unit_pts(i) for i in units]", python_unit_pts=python_unit_pts,
+             units=units))
+
+    # totals agree and stay plain ints
+    for army in random_corpus("Necron", 20, seed=2):
+        for detach in army.detachments:
+            for units in detach.units_dict.values():
+                for unit in units:
+                    assert legacy_unit_pts(unit) == unit._count_pts()
+                    assert type(unit._count_pts()) is int and type(unit.size) is int
+        assert type(army.pts) is int
+    print("totals match on 20 armies and are plain ints")
+    return
+
+
+if __name__ == "__main__":
+    main()
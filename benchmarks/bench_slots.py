@@ -0,0 +1,96 @@
+"""
+Memory comparison of the slotted wargear, model and option classes against
+the same classes with a per-instance __dict__, on a corpus of 10,000 units.
+The dict-backed classes are made by loading init, option_parser and squad
+with their __slots__ declarations removed. Each corpus is built in a fresh
+interpreter and measured with tracemalloc.
+
+Run from the repository root:
+    python -m benchmarks.bench_slots [no_units]
+"""
+
+import ast
+import gc
+import importlib.util
+import json
+import random
+import subprocess
+import sys
+import tracemalloc
+
+MODULES = ["init", "option_parser", "squad"]  # the modules declaring __slots__
+
+
+def load_without_slots():
+    """Imports MODULES with every __slots__ declaration removed."""
+    for name in MODULES:
+        spec = importlib.util.find_spec(name)
+        with open(spec.origin) as file:
+            tree = ast.parse(file.read())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.ClassDef):
+                node.body = [i for i in node.body if not (
+                    isinstance(i, ast.Assign)
+                    and any(getattr(j, "id", None) == "__slots__" for j in i.targets))]
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        exec(compile(tree, spec.origin, "exec"), module.__dict__)
+    return
+
+
+def build(no_units, slotted):
+    """Builds armies until they hold no_units, returns the memory in use."""
+    if not slotted:
+        load_without_slots()
+    import init
+    import option_parser
+    import squad
+    from benchmarks.corpus import random_army
+
+    init.init("Necron")
+    rng = random.Random(0)
+    gc.collect()
+    tracemalloc.start()
+    corpus, units = [], 0
+    while units < no_units:
+        corpus.append(random_army("Necron", 2000, rng))
+        units += sum(len(i) for i in corpus[-1].detachments[0].units_dict.values())
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    classes = [init.WargearItem, init.MultipleItem, squad.Model, option_parser.Option]
+    counts = dict.fromkeys([i.__name__ for i in classes], 0)
+    for obj in gc.get_objects():
+        if type(obj) in classes:
+            counts[type(obj).__name__] += 1
+            assert hasattr(obj, "__dict__") != slotted
+    return {"bytes": size, "units": units, "counts": counts}
+
+
+def run(no_units, slotted):
+    """Runs build in a new interpreter."""
+    output = subprocess.check_output(
+        [sys.executable, "-m", "benchmarks.bench_slots", "--child", str(no_units),
+         str(int(slotted))], stderr=subprocess.DEVNULL)
+    return json.loads(output.decode().splitlines()[-1])
+
+
+def main():
+    if sys.argv[1:2] == ["--child"]:
+        print(json.dumps(build(int(sys.argv[2]), bool(int(sys.argv[3])))))
+        return
+    no_units = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    legacy = run(no_units, False)
+    slotted = run(no_units, True)
+    print("corpus of {:,} units".format(slotted["units"]))
+    print("{:<16}{:>12}".format("objects", ""))
+    for name, count in slotted["counts"].items():
+        print("  {:<14}{:>12,}".format(name, count))
+    print("{:<16}{:>12.1f} MiB".format("__dict__", legacy["bytes"]/2**20))
+    print("{:<16}{:>12.1f} MiB".format("__slots__", slotted["bytes"]/2**20))
+    print("{:<16}{:>12.1%}".format("saving", 1 - slotted["bytes"]/legacy["bytes"]))
+    return
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Timing of validating armies after an edit, re-checking every rule against
+re-checking only the changed unit and detachment with the cached
+violations, over a corpus of lists.
+
+Run from the repository root:
+    python -m benchmarks.bench_validation [no_lists]
+"""
+
+import random
+import sys
+import time
+
+import init
+import validation
+from benchmarks.corpus import random_corpus
+
+EDITS = 2000
+
+
+def full_check(army):
+    """Checks every rule of the army again."""
+    violations = []
+    for detach in army.detachments:
+        violations += validation.check_foc(detach)
+        for units in detach.units_dict.values():
+            for unit in units:
+                violations += validation.check_unit(unit)
+    return violations
+
+
+def time_edits(corpus, check, seed):
+    """Returns the time in us to re-size a random unit and check its army."""
+    rng = random.Random(seed)
+    t = time.perf_counter()
+    for n in range(EDITS):
+        army = rng.choice(corpus)
+        units = [i for role in army.detachments[0].units_dict.values() for i in role]
+        unit = rng.choice(units)
+        unit.models[0].size = rng.randint(1, 3)
+        check(army)
+    return (time.perf_counter() - t) / EDITS * 1e6
+
+
+def main():
+    init.init("Necron")
+    no_lists = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    corpus = random_corpus("Necron", no_lists)
+    units = sum(len(i) for army in corpus for i in army.detachments[0].units_dict.values())
+
+    t = time.perf_counter()
+    violations = sum(len(army.violations) for army in corpus)
+    print("first check of {:,} lists, {:,} units: {:.1f}ms, {:,} violations".format(
+        no_lists, units, (time.perf_counter() - t)*1e3, violations))
+
+    full = time_edits(corpus, full_check, 0)
+    incremental = time_edits(corpus, lambda army: army.violations, 0)
+    assert all(full_check(army) == army.violations for army in corpus)
+    print("edit and re-check every rule: {:.1f}us".format(full))
+    print("edit and re-check changes:    {:.1f}us ({:.1f}x)".format(incremental,
+                                                                    full/incremental))
+    return
+
+
+if __name__ == "__main__":
+    main()
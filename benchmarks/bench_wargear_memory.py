@@ -0,0 +1,78 @@
+"""
+Memory comparison of interned wargear definitions against per-instance
+wargear attributes, on a single 2,000 point list and on a corpus of 1,000
+lists.
+
+Run from the repository root:
+    python -m benchmarks.bench_wargear_memory [no_lists]
+"""
+
+import gc
+import sys
+import tracemalloc
+
+import init
+from benchmarks.corpus import random_corpus
+
+WargearItem = init.WargearItem
+
+
+class LegacyWargearItem(WargearItem):
+    """WargearItem holding its own copy of the name, type and points."""
+    item = type = pts = None  # shadow the shared definition properties
+
+    def __init__(self, item, catalog=None):
+        if catalog is None:
+            catalog = init.current_catalog
+        self.no_of = 1
+        if '*' in item:
+            self.no_of = int(item.split('*')[0])
+            item = item.split('*')[1]
+        self.item = item
+        self.type, pts = catalog.wargear_index[item]
+        self.pts = self.no_of * pts
+
+    def set_no_of(self, no_of):
+        self.no_of = no_of
+        self.pts = self.no_of * self.wargear_search(self.item)
+
+    def __mul__(self, integer):
+        self.set_no_of(self.no_of * integer)
+        return self
+
+    def __reduce__(self):
+        return (LegacyWargearItem, (self.save(), init.current_catalog))
+
+
+def measure(no_lists, item_class):
+    """Builds the corpus with item_class, returns (bytes, no of items)."""
+    init.WargearItem = item_class
+    gc.collect()
+    tracemalloc.start()
+    corpus = random_corpus("Tau", no_lists)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    items = sum(isinstance(i, WargearItem) for i in gc.get_objects())
+    init.WargearItem = WargearItem
+    del corpus
+    return size, items
+
+
+def main():
+    init.init("Tau")
+    no_lists = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    print("{:<22}{:>16}{:>16}{:>10}{:>12}".format("corpus", "legacy (KiB)",
+                                                  "interned (KiB)", "saving",
+                                                  "items"))
+    for label, size in [("single 2,000pt list", 1),
+                        ("{:,} lists".format(no_lists), no_lists)]:
+        legacy, items = measure(size, LegacyWargearItem)
+        interned, items = measure(size, WargearItem)
+        print("{:<22}{:>16.1f}{:>16.1f}{:>10.1%}{:>12,}".format(
+            label, legacy/1024, interned/1024, 1 - interned/legacy, items))
+    print("distinct wargear definitions: {}".format(len(init.wargear_defs)))
+    return
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Synthetic army lists for the benchmarks.
+
+Functions:
+----------
+random_unit(battlefield_role, rng, catalog):
+    Creates a random unit of the given role with random size and options.
+
+random_army(faction, pts_target, rng):
+    Creates a random army list of at least pts_target points.
+
+random_corpus(faction, no_lists, pts_target, seed):
+    Creates a list of no_lists random army lists.
+"""
+
+import random
+
+import squad
+from army_list import ArmyList, Detachment
+
+ROLES = ["HQ", "Troops", "Elites", "Fast Attack", "Heavy Support"]
+
+
+def random_unit(battlefield_role, rng, catalog):
+    """Creates a random unit of the given role with random size and options."""
+    unit_type = rng.choice(list(catalog.units_dict[battlefield_role].keys()))
+    unit = squad.Unit(unit_type, battlefield_role, catalog)
+    if unit.mod_str is None and len(unit.size_range) == 2:
+        unit.re_size(rng.randint(*unit.size_range))
+
+    if unit.options is not None:
+        chosen = []
+        for option in unit.options:
+            if rng.random() < 0.5:
+                option.select(rng.randrange(len(option.items_involved)))
+                chosen.append(option)
+        if chosen:
+            unit.change_wargear(chosen)
+    return unit
+
+
+def random_army(faction, pts_target, rng):
+    """Creates a random army list of at least pts_target points."""
+    army = ArmyList(faction)
+    detach = Detachment("Brigade", army.catalog)
+    army.add_detachment(detach)
+    while army.pts < pts_target:
+        detach.add_unit(random_unit(rng.choice(ROLES), rng, army.catalog))
+    return army
+
+
+def random_corpus(faction, no_lists, pts_target=2000, seed=0):
+    """Creates a list of no_lists random army lists."""
+    rng = random.Random(seed)
+    return [random_army(faction, pts_target, rng) for i in range(no_lists)]
@@ -0,0 +1,232 @@
+"""
+Checks many saved armies at once, spreading them across a pool of worker
+processes that each start with the faction catalogs already loaded. One
+line of json is written per army as soon as it has been checked, in the
+order the armies were found.
+
+Run from the repository root:
+    python -m bulk_validate [-j PROCESSES] [-o OUTPUT] [--faction FACTION] PATH...
+
+Every PATH is a directory of .army and .armyb files, a single saved army or
+a bundle, a JSON Lines file with one saved army per line. The exit status
+is 1 if any army is illegal or can't be loaded.
+
+Each result has the keys:
+    source - file path, or path:line for an army in a bundle
+    faction, pts, valid - faction, points and legality of the army
+    violations - list of the rules broken, see violation_dict()
+    load_ms, check_ms - time taken to load and to validate the army
+or source, error and load_ms, and check_ms if it was loaded, if the army
+could not be loaded or validated.
+
+Functions
+---------
+iter_tasks(paths):
+    Yields the armies to check in each path.
+
+check_army(task):
+    Loads and validates a single army, returning its result.
+
+run(paths, out, processes=None, factions=None):
+    Checks every army found in paths, writing the results to out.
+
+violation_dict(violation):
+    Returns a validation.Violation as a json-able dictionary.
+
+available_factions():
+    Returns the factions with data in the resources directory.
+"""
+
+import argparse
+import collections
+import concurrent.futures
+import contextlib
+import json
+import os
+import sys
+import time
+
+import army_list
+import init
+
+ARMY_EXTENSIONS = (".army", ".armyb")
+TASKS_PER_CHUNK = 16  # armies sent to a worker process at a time
+
+
+def available_factions():
+    """Returns the factions with data in the resources directory."""
+    return sorted(i for i in os.listdir("./resources")
+                  if os.path.isfile(os.path.join("./resources", i, "Units.json")))
+
+
+def iter_tasks(paths):
+    """
+    Yields (source, path, line) for each army in the paths, where line is
+    the text of the army's line for a bundle and None for a saved army.
+    Directories are searched for saved armies in name order, any other file
+    not ending in .army or .armyb is read as a bundle one line at a time.
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                file_path = os.path.join(path, name)
+                if name.endswith(ARMY_EXTENSIONS) and os.path.isfile(file_path):
+                    yield file_path, file_path, None
+        elif path.endswith(ARMY_EXTENSIONS):
+            yield path, path, None
+        else:
+            with open(path, 'r') as file:
+                for index, line in enumerate(file, 1):
+                    if line.strip():
+                        yield "{}:{}".format(path, index), path, line
+    return
+
+
+def violation_dict(violation):
+    """Returns a validation.Violation as a json-able dictionary."""
+    return {"rule": violation.rule,
+            "source": violation.source.name,
+            "subject": violation.subject,
+            "value": violation.value,
+            "allowed": list(violation.allowed),
+            "message": violation.message}
+
+
+def check_army(task):
+    """
+    Loads and validates the army of a (source, path, line) task from
+    iter_tasks(), returning its result dictionary, with the error instead if
+    the army can't be loaded or validated. Anything the army prints while
+    loading goes to stderr so it can't break the json output.
+    """
+    source, path, line = task
+    result = {"source": source}
+    start = time.perf_counter()
+    loaded = None
+    with contextlib.redirect_stdout(sys.stderr):
+        try:
+            if line is None:
+                army = army_list.ArmyList(path, True)
+            else:
+                army = army_list.ArmyList(None)
+                for i in army._load_items(army_list.iter_dict(json.loads(line))):
+                    pass
+            loaded = time.perf_counter()
+            violations = army.violations
+            checked = {"faction": army.faction,
+                       "pts": army.pts,
+                       "valid": len(violations) == 0,
+                       "violations": [violation_dict(i) for i in violations]}
+        except Exception as e:  # one bad army mustn't stop the rest being checked
+            result["error"] = "{}: {}".format(type(e).__name__, e)
+            if loaded is None:
+                result["load_ms"] = (time.perf_counter() - start)*1000
+            else:
+                result["load_ms"] = (loaded - start)*1000
+                result["check_ms"] = (time.perf_counter() - loaded)*1000
+            return result
+    result.update(checked)
+    result["load_ms"] = (loaded - start)*1000
+    result["check_ms"] = (time.perf_counter() - loaded)*1000
+    return result
+
+
+def _start_worker(catalogs):
+    """Adds the compiled catalogs to the registry of a worker process."""
+    for faction, data in catalogs.items():
+        init.catalogs[faction] = init.FactionCatalog(data)
+    return
+
+
+def _check_chunk(tasks):
+    """Returns the results of a list of tasks in a worker process."""
+    return [check_army(i) for i in tasks]
+
+
+def _iter_chunks(tasks, size):
+    """Yields lists of up to size tasks."""
+    chunk = []
+    for i in tasks:
+        chunk.append(i)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+    return
+
+
+def iter_results(tasks, processes=None, factions=None):
+    """
+    Yields the result of each task in order. With more than one process the
+    tasks are checked across a pool of processes workers, os.cpu_count() if
+    None, each seeded with the compiled catalogs of the factions, every
+    available faction if None. Only a few chunks of tasks are waiting on the
+    pool at a time, so a bundle is never held in memory as a whole.
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes <= 1:
+        for i in tasks:
+            yield check_army(i)
+        return
+
+    if factions is None:
+        factions = available_factions()
+    catalogs = {i: init.load_catalog(i) for i in factions}
+    with concurrent.futures.ProcessPoolExecutor(
+            processes, initializer=_start_worker, initargs=(catalogs,)) as executor:
+        waiting = collections.deque()
+        for chunk in _iter_chunks(tasks, TASKS_PER_CHUNK):
+            waiting.append(executor.submit(_check_chunk, chunk))
+            if len(waiting) >= 2*processes:
+                yield from waiting.popleft().result()
+        while waiting:
+            yield from waiting.popleft().result()
+    return
+
+
+def run(paths, out, processes=None, factions=None):
+    """
+    Checks every army found in paths, writing one line of json to the file
+    object out as each result arrives. Returns the number of armies checked
+    and the number that were illegal or couldn't be loaded.
+    """
+    checked, failed = 0, 0
+    for result in iter_results(iter_tasks(paths), processes, factions):
+        out.write(json.dumps(result) + '\n')
+        out.flush()
+        checked += 1
+        failed += not result.get("valid", False)
+    return checked, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="bulk_validate",
+        description="Validate directories or bundles of saved armies, "
+                    "writing one line of json per army.")
+    parser.add_argument("paths", nargs='+', metavar="PATH",
+                        help="directory of .army files, saved army or bundle")
+    parser.add_argument("-j", "--processes", type=int, default=None,
+                        help="worker processes, one per cpu by default")
+    parser.add_argument("-o", "--output", default=None,
+                        help="file to write the results to, stdout by default")
+    parser.add_argument("--faction", action="append", dest="factions",
+                        help="faction to pre-load in the workers, every "
+                             "faction by default, may be repeated")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.output is None:
+        checked, failed = run(args.paths, sys.stdout, args.processes, args.factions)
+    else:
+        with open(args.output, 'w') as out:
+            checked, failed = run(args.paths, out, args.processes, args.factions)
+    print("{} armies checked, {} failed in {:.2f}s".format(
+        checked, failed, time.perf_counter() - start), file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
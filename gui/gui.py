@@ -40,6 +40,7 @@ class HomeFrame(wx.Frame):
         Called by gui_armytree.AddTreePane to add a unit to the army.
     add_detach(self, evt): Event Handler for when a new detachment is added.
     delete(self, evt): Event Handler for when a detachment or unit is deleted.
+    copy(self, evt): Event Handler for when a detachment or unit is copied.
     """
 
     def __init__(self, army, *args, **kwds):
@@ -170,12 +171,29 @@ class HomeFrame(wx.Frame):
 
     def copy(self, evt):
         """Event Handler for when a detachment or unit is copied."""
-        print("Copy")
+        selected = self.treePane.tree.GetFocusedItem()
+        item = self.treePane.tree.GetItemData(selected)
+        if isinstance(item, squad.Unit):
+            # added alongside the original if there is a slot left
+            self.treePane.detach = item.parent
+            self.add_unit_from_tree(item.clone())
+        elif isinstance(item, army_list.Detachment):
+            detach = item.clone()
+            self.army.add_detachment(detach)
+            self.treePane.add_detachment(detach)
+            self.treePane.update_headers(detach.treeid)
         return
 
     def save(self, evt):
-        """Event Handler for saving the the army"""
-        print("Save")
+        """
+        Event Handler for saving the the army, compacting its journal into a
+        new snapshot in the background as every edit is already saved.
+        """
+        if self.army.journal is None:
+            infoDialog = wx.MessageDialog(self, "The army has no file to save to.")
+            infoDialog.ShowModal()
+        else:
+            self.army.journal.compact()
         return
 
 
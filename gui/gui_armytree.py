@@ -48,6 +48,9 @@ class TreePane(wx.Panel):
 
     add_unit(self, unit): Adds the given unit to the tree.
 
+    add_detachment(self, detach):
+        Adds the given detachment and its units to the tree.
+
     delete(self): Deletes the current selected item from the tree and army.
 
     on_selection(self, evt):
@@ -79,23 +82,29 @@ class TreePane(wx.Panel):
 
         # construct tree
         for detach in self.army.detachments:
-            detach.treeid = self.tree.AppendItem(self.root, detach.name)
-
-            self.tree.SetItemData(detach.treeid, detach)
-            self.foc_node[detach.treeid] = {}
-            for battlefield_role, units in detach.units_dict.items():
-                if units != []:
-                    foc_node = self.tree.AppendItem(detach.treeid,
-                                                    battlefield_role)
-                    self.foc_node[detach.treeid][battlefield_role] = foc_node
-
-                for unit in units:
-                    unit.treeid = self.tree.AppendItem(foc_node, unit.name)
-                    self.tree.SetItemData(unit.treeid, unit)
-                    self.update_unit(unit)
+            self.add_detachment(detach)
         self.tree.ExpandAll()
         return
 
+    def add_detachment(self, detach):
+        """Adds the given detachment and its units to the tree."""
+        detach.treeid = self.tree.AppendItem(self.root, detach.name)
+
+        self.tree.SetItemData(detach.treeid, detach)
+        self.foc_node[detach.treeid] = {}
+        for battlefield_role, units in detach.units_dict.items():
+            if units != []:
+                foc_node = self.tree.AppendItem(detach.treeid,
+                                                battlefield_role)
+                self.foc_node[detach.treeid][battlefield_role] = foc_node
+
+            for unit in units:
+                unit.treeid = self.tree.AppendItem(foc_node, unit.name)
+                self.tree.SetItemData(unit.treeid, unit)
+                self.update_unit(unit)
+        self.tree.ExpandAllChildren(detach.treeid)
+        return
+
     def update_unit(self, unit):
         """
         Refreshes the wargear on the unit and the pts displayed on itself and
@@ -185,7 +194,7 @@ class TreePane(wx.Panel):
 
         elif isinstance(item, army_list.Detachment):
             army = item.parent
-            army.del_detachment(item.name)
+            army.del_detachment(item)
             self.update_headers(id)
             self.tree.Delete(id)
         return
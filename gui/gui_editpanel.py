@@ -1,6 +1,5 @@
 import wx
 import sys
-import numpy as np
 from wx.lib.scrolledpanel import ScrolledPanel
 
 sys.path.append('../')
@@ -232,14 +231,14 @@ class SizingBox(wx.Panel):
 
     def on_size(self, evt):
         """Event handler for wx.SpinCtrl change."""
-        size = np.array([int(i.GetValue()) for i in self.model_ctrls])
+        size = [int(i.GetValue()) for i in self.model_ctrls]
 
         # change the spin limits on the default model
-        self.model_ctrls[0].SetMax(self.unit.size_range[1]-size[1:].sum())
-        self.model_ctrls[0].SetMin(self.unit.size_range[0]-size[1:].sum())
+        self.model_ctrls[0].SetMax(self.unit.size_range[1]-sum(size[1:]))
+        self.model_ctrls[0].SetMin(self.unit.size_range[0]-sum(size[1:]))
 
         # update again incase the sizes are reduced
-        size = np.array([int(i.GetValue()) for i in self.model_ctrls])
+        size = [int(i.GetValue()) for i in self.model_ctrls]
 
         self.unit.re_size(*size)
         evt.Skip()
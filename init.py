@@ -4,14 +4,44 @@ data files for the given faction.
 
 Functions:
 ----------
-init(faction):
-    Initialises the global variables for the chosen faction:
+init(faction, use_cache=True, preparse=False, processes=None):
+    Sets the FactionCatalog of the chosen faction as the current catalog and
+    initialises the global variables from it:
     detachments_dict - dict containing the data in Detachments.json
     armoury_dict - dict containing the data in <faction>/Armoury.json
     units_dict - dict of UnitTypes containing the data in <faction>/Units.json
 
+load_catalog(faction, cache_path=None, processes=1):
+    Loads the compiled catalog for the faction from its on-disk cache,
+    rebuilding the cache if the source files have changed.
+
+compile_catalog(faction, processes=1):
+    Builds the compiled catalog from the source files, parsing the options of
+    large catalogs across a pool of processes.
+
+catalog_hash(faction): Content hash of the source files for the faction.
+
+get_catalog(faction, use_cache=True, processes=1):
+    Returns the FactionCatalog for the faction from the registry of loaded
+    catalogs, loading it if needed.
+
+wargear_def(item, catalog=None):
+    Returns the interned WargearDef for the named wargear item.
+
+load_wargear(item, catalog=None):
+    Creates a WargearItem or MultipleItem from a saved wargear string.
+
 Classes
 -------
+FactionCatalog: Read-only data for a single faction.
+
+OptionNode:
+    Immutable node of the serializable tree that an option string parses to.
+
+WargearDef:
+    Immutable definition of a wargear item, shared by every WargearItem of
+    the same name.
+
 WargearItem: Collection of Wargear items for assignment to a unit.
 
 MultipleItem(WargearItem):
@@ -19,70 +49,464 @@ MultipleItem(WargearItem):
     option i.e. Stormshield and Thunderhammer.
 """
 
+import hashlib
 import json
-import numpy as np
+import os
+import pickle
+import tempfile
+import warnings
+from collections import namedtuple
+from types import MappingProxyType
+
+# bump whenever the layout of the compiled catalog changes
+CACHE_VERSION = 7
 
+# catalogs with at least this many distinct options lists are parsed across
+# a process pool when pre-parsing is requested
+POOL_MIN_OPTIONS = 64
 
-def init(faction):
+
+def init(faction, use_cache=True, preparse=False, processes=None):
     """
-    Initialises the global variables for the chosen faction:
+    Sets the FactionCatalog for the chosen faction as the current catalog and
+    initialises the global variables from it:
+    current_catalog - FactionCatalog used when no catalog is given
     detachments_dict - dict containing the data in Detachments.json
     armoury_dict - dict containing the data in <faction>/Armoury.json
     units_dict - dict of UnitTypes containing the data in <faction>/Units.json
+    wargear_index - dict of wargear name to its (category, pts) in
+                    Armoury.json
+    wargear_defs - dict of wargear name to its interned WargearDef
+    parsed_options - dict of OptionNode tree tuples keyed by the
+                     tuple of option strings they were parsed from
+
+    If use_cache is True the data is read from the compiled catalog cache,
+    which is rebuilt if the source files have changed. Otherwise the catalog
+    is re-compiled and replaces any held in the registry.
+
+    If preparse is True a catalog that has to be compiled parses its options
+    lists across a pool of processes (os.cpu_count() if None), and syntax
+    errors or unknown wargear in the options of Units.json and Models.json
+    are reported as warnings now rather than when a unit is first used.
     """
-    # Open list of possible detachments and generate object for each one
-    global detachments_dict
-    with open('./resources/Detachments.json', 'r') as file:
-        detachments_dict = json.load(file)
-
-    # determine faction of armylist and open units and wargear data
-    global armoury_dict
-    with open("./resources/{}/Armoury.json".format(faction), 'r') as file:
-        armoury_dict = json.load(file)
-
-    global models_dict
-    with open("./resources/{}/Models.json".format(faction), 'r') as file:
-        models_dict = json.load(file)
-
-    global units_dict
-    units_dict = {}
-    with open("./resources/{}/Units.json".format(faction), 'r') as file:
-        units_dict = json.load(file)
+    if not use_cache:
+        catalogs.pop(faction, None)
+    if not preparse:
+        processes = 1
+    catalog = get_catalog(faction, use_cache, processes)
+    if preparse:
+        for names, message in catalog.option_errors:
+            warnings.warn("Options of {}: {}".format(', '.join(names), message))
+
+    global current_catalog, detachments_dict, armoury_dict, models_dict
+    global units_dict, wargear_index, wargear_defs, parsed_options
+    current_catalog = catalog
+    detachments_dict = catalog.detachments_dict
+    armoury_dict = catalog.armoury_dict
+    models_dict = catalog.models_dict
+    units_dict = catalog.units_dict
+    wargear_index = catalog.wargear_index
+    wargear_defs = catalog.wargear_defs
+    parsed_options = catalog.parsed_options
+    return detachments_dict, armoury_dict, units_dict
+
+
+# registry of the FactionCatalogs loaded in this process
+catalogs = {}
+current_catalog = None
+
+
+def get_catalog(faction, use_cache=True, processes=1):
+    """
+    Returns the FactionCatalog for the faction from the registry, loading it
+    if it has not been used before in this process. If it has to be compiled
+    its options are parsed across processes workers.
+    """
+    try:
+        return catalogs[faction]
+    except KeyError:
+        pass
+
+    if use_cache:
+        data = load_catalog(faction, processes=processes)
+    else:
+        data = compile_catalog(faction, processes)
+    catalog = catalogs[faction] = FactionCatalog(data)
+    return catalog
+
+
+class FactionCatalog:
+    """
+    Read-only data for a single faction, built from compiled catalog data.
+    Several catalogs can be held side by side in the registry returned by
+    get_catalog().
+
+    Parameters
+    ----------
+    data : dict
+        Compiled catalog data as returned by load_catalog().
+
+    Public Attributes
+    -----------------
+    faction : str
+        Name of the faction.
+    hash : str
+        Content hash of the source files the catalog was built from.
+    detachments_dict : dict
+        Data in Detachments.json.
+    armoury_dict : dict
+        Data in <faction>/Armoury.json.
+    models_dict : dict
+        Data in <faction>/Models.json.
+    units_dict : dict
+        Data in <faction>/Units.json including default unit points.
+    units_index : dict
+        Unit data keyed by (battlefield role, unit name). Named characters
+        are found under every battlefield role as well as their own.
+    default_models : mappingproxy
+        Read-only model data, keyed by unit name, for the single model of
+        each unit with no models in Units.json.
+    wargear_index : dict
+        Wargear name to its (category, pts) in Armoury.json.
+    wargear_defs : dict
+        Wargear name to its interned WargearDef.
+    parsed_options : dict
+        Tuples of OptionNode trees keyed by the tuple of option
+        strings they were parsed from.
+    option_errors : list (tuple)
+        (names, message) of every syntax error or unknown wargear found in
+        the options of the units and models named.
+
+    Public Methods
+    --------------
+    wargear_def(self, item):
+        Returns the interned WargearDef for the named wargear item.
+    """
+
+    def __init__(self, data):
+        self.faction = data["faction"]
+        self.hash = data["hash"]
+        self.detachments_dict = data["detachments"]
+        self.armoury_dict = data["armoury"]
+        self.models_dict = data["models"]
+        self.units_dict = data["units"]
+        self.units_index = {(role, name): rows for role, units in self.units_dict.items()
+                            for name, rows in units.items()}
+        for name, rows in self.units_dict.get("Named Characters", {}).items():
+            for role in self.units_dict:
+                self.units_index.setdefault((role, name), rows)
+        self.default_models = MappingProxyType({
+            name: MappingProxyType({"name": None,
+                                    "no_per_unit": None,
+                                    "wargear": None,
+                                    "options": None,
+                                    "indep": False,
+                                    "pts": rows["base_pts"]})
+            for units in self.units_dict.values()
+            for name, rows in units.items() if rows["models"] is None})
+        self.wargear_index = data["wargear_index"]
+        self.wargear_defs = {item: WargearDef(item, *value, faction=self.faction)
+                             for item, value in self.wargear_index.items()}
+        self.parsed_options = data.get("options", {})
+        self.option_errors = data.get("option_errors", [])
+        return
+
+    def wargear_def(self, item):
+        """Returns the interned WargearDef for the named wargear item."""
+        try:
+            return self.wargear_defs[item]
+        except KeyError:
+            raise KeyError("{} not found in Armoury.json file".format(item))
+
+    def __reduce__(self):
+        # objects referencing a catalog are pickled with just its name
+        return (get_catalog, (self.faction,))
+
+    def __repr__(self):
+        return "FactionCatalog({!r})".format(self.faction)
+
+
+def _source_paths(faction):
+    """Returns the paths of the source files that make up a faction."""
+    return ['./resources/Detachments.json',
+            "./resources/{}/Armoury.json".format(faction),
+            "./resources/{}/Models.json".format(faction),
+            "./resources/{}/Units.json".format(faction)]
+
+
+def _cache_path(faction):
+    """Returns the default path of the compiled catalog for a faction."""
+    return "./resources/{}/catalog.cache".format(faction)
+
+
+def catalog_hash(faction):
+    """Content hash of the source files for the faction."""
+    digest = hashlib.sha256(str(CACHE_VERSION).encode())
+    for path in _source_paths(faction):
+        with open(path, 'rb') as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+def load_catalog(faction, cache_path=None, processes=1):
+    """
+    Loads the compiled catalog for the faction from its on-disk cache in a
+    single read. If the cache is missing, unreadable or was built from
+    different source files it is rebuilt, parsing options across processes
+    workers, and re-written.
+    """
+    if cache_path is None:
+        cache_path = _cache_path(faction)
+    source_hash = catalog_hash(faction)
+    try:
+        with open(cache_path, 'rb') as file:
+            catalog = pickle.load(file)
+        if catalog["hash"] == source_hash:
+            return catalog
+    except (OSError, EOFError, KeyError, TypeError, pickle.UnpicklingError,
+            AttributeError, ImportError):
+        pass
+
+    catalog = compile_catalog(faction, processes)
+    _write_cache(catalog, cache_path)
+    return catalog
+
+
+def _write_cache(catalog, cache_path):
+    """
+    Atomically writes the compiled catalog so that concurrent workers never
+    read a partially written file. Failure to write is not fatal.
+    """
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path) or '.')
+        with os.fdopen(fd, 'wb') as file:
+            pickle.dump(catalog, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except (OSError, UnboundLocalError):
+            pass
+    return
+
+
+def compile_catalog(faction, processes=1):
+    """
+    Builds the compiled catalog from the source files: the raw data plus the
+    resolved default points of each unit, a flat index of the category and
+    points of each wargear item and the parsed options of every unit and
+    model, with any errors found parsing them. Large catalogs parse their
+    options across a pool of processes workers, os.cpu_count() if None.
+    """
+    catalog = {"faction": faction, "hash": catalog_hash(faction)}
+    paths = _source_paths(faction)
+    for key, path in zip(["detachments", "armoury", "models", "units"], paths):
+        with open(path, 'r') as file:
+            catalog[key] = json.load(file)
+    models_dict = catalog["models"]
+    units_dict = catalog["units"]
+
+    # a name duplicated across categories takes the type of the last category
+    # listed and the points of the first, as WargearItem always has
+    wargear_index = catalog["wargear_index"] = {}
+    duplicates = {}
+    for key, obj in catalog["armoury"].items():
+        for item, pts in obj.items():
+            if item in wargear_index:
+                duplicates.setdefault(item, [wargear_index[item][0]]).append(key)
+                wargear_index[item] = (key, wargear_index[item][1])
+            else:
+                wargear_index[item] = (key, pts)
+    for item, categories in duplicates.items():
+        warnings.warn("{} appears in several Armoury.json categories: {}, using {}"
+                      .format(item, ', '.join(categories), categories[-1]))
+
+    # wargear lookups during compilation go through a temporary catalog
+    faction_catalog = FactionCatalog(catalog)
+
     for key in units_dict.keys():
         for index, rows in units_dict[key].items():
             # generate the default unit pts value
             pts = 0
             if rows["wargear"] is not None:
-                pts += np.sum([MultipleItem(i).pts if '+' in i else WargearItem(i)
-                               .pts for i in rows["wargear"]])*rows["size"][0]
+                pts += sum(load_wargear(i, faction_catalog).pts
+                           for i in rows["wargear"])*rows["size"][0]
             if rows["models"] is not None:
                 for model in rows["models"]:
                     if models_dict[model]["no_per_unit"] is None:
                         break
                 if models_dict[model]["wargear"] is not None:
-                    pts += np.sum([MultipleItem(i).pts if '+' in i else WargearItem(i).pts
-                                   for i in models_dict[model]["wargear"]])*rows["size"][0]
+                    pts += sum(load_wargear(i, faction_catalog).pts
+                               for i in models_dict[model]["wargear"])*rows["size"][0]
 
             pts += rows["base_pts"]*rows["size"][0]
 
             units_dict[key][index]["pts"] = pts
 
-    return detachments_dict, armoury_dict, units_dict
+    # parse every options list once so that units can be created from the trees
+    sources = {}  # options list to the names of the units and models using it
+    entries = [i for units in units_dict.values() for i in units.items()]
+    for name, rows in entries + list(models_dict.items()):
+        if rows["options"]:
+            sources.setdefault(tuple(rows["options"]), []).append(name)
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes > 1 and len(sources) >= POOL_MIN_OPTIONS:
+        import concurrent.futures  # only large catalogs pay for the import
+
+        with concurrent.futures.ProcessPoolExecutor(
+                processes, initializer=_start_preparse_worker,
+                initargs=(catalog,)) as executor:
+            results = list(executor.map(_preparse, sources,
+                                        chunksize=len(sources) // (4*processes) + 1))
+    else:
+        results = [_preparse(i, faction_catalog) for i in sources]
+
+    catalog["options"] = {}
+    catalog["option_errors"] = []
+    for (key, names), (trees, errors) in zip(sources.items(), results):
+        if trees is not None:
+            catalog["options"][key] = trees
+        catalog["option_errors"] += [(tuple(names), i) for i in errors]
+    return catalog
+
+
+_preparse_catalog = None  # catalog of a pre-parsing worker process
+
+
+def _start_preparse_worker(data):
+    """Builds the catalog a pre-parsing worker process looks wargear up in."""
+    global _preparse_catalog
+    _preparse_catalog = FactionCatalog(data)
+    return
+
+
+def _preparse(parse_string, catalog=None):
+    """
+    Returns the option trees parsed from parse_string, or None if the wargear
+    is unknown or the options can't be parsed, and the messages of any errors
+    found.
+    """
+    import option_parser
+
+    if catalog is None:
+        catalog = _preparse_catalog
+    try:
+        options = option_parser.main_parser.parse2(parse_string, catalog=catalog)
+    except KeyError as e:  # left to raise when the options are used
+        return None, [e.args[0]]
+    except Exception as e:  # as is any other error, rather than the catalog's
+        return None, ["{}: {}".format(type(e).__name__, e)]
+    return tuple(i.tree for i in options), [j for i in options for j in i.errors]
+
+
+class OptionNode(namedtuple("OptionNode", ["op", "left", "right"])):
+    """
+    Immutable node of the tree an option string parses to. The tree holds
+    only ints and strings so it can be pickled into the catalog cache and
+    compared between parsers. Defined here rather than in option_parser so
+    that reading the cache doesn't import the parser. Leaves are the saved
+    strings of the wargear.
+
+    '/' : left and right are subtrees listing the items to choose from.
+    '-' : left is a subtree, right the per NUM models limit or None.
+    '^' : left is a subtree, right the NUM of models or None.
+    '#' : left is the NUM of picks, right a subtree.
+    """
+    __slots__ = ()
+
+
+class WargearDef:
+    """
+    Immutable definition of a wargear item, interned in the wargear_defs of
+    its FactionCatalog so that every WargearItem of the same name shares one
+    object.
+
+    Parameters
+    ----------
+    name : str
+        Name of the Wargear.
+    type : str
+        Armoury.json category of the Wargear.
+    pts : int
+        Points value of a single item.
+    faction : str
+        Faction of the catalog the definition belongs to.
+    """
+    __slots__ = ("name", "type", "pts", "faction")
+
+    def __init__(self, name, type, pts, faction=None):
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "type", type)
+        object.__setattr__(self, "pts", pts)
+        object.__setattr__(self, "faction", faction)
+
+    def __setattr__(self, key, value):
+        raise AttributeError("WargearDef is immutable")
+
+    def __delattr__(self, key):
+        raise AttributeError("WargearDef is immutable")
+
+    def __reduce__(self):
+        return (_faction_wargear_def, (self.faction, self.name))
+
+    def __repr__(self):
+        return "WargearDef({!r}, {!r}, {!r})".format(self.name, self.type, self.pts)
+
+
+def wargear_def(item, catalog=None):
+    """
+    Returns the interned WargearDef for the named wargear item from the
+    catalog, or the current catalog if none is given.
+    """
+    if catalog is None:
+        catalog = current_catalog
+    return catalog.wargear_def(item)
+
+
+def load_wargear(item, catalog=None):
+    """
+    Creates a WargearItem, or a MultipleItem if several items are joined by
+    '+', from a saved wargear string.
+    """
+    if '+' in item:
+        return MultipleItem(item, catalog=catalog)
+    return WargearItem(item, catalog)
+
+
+def _faction_wargear_def(faction, item):
+    """Unpickling helper resolving a definition through the registry."""
+    return get_catalog(faction).wargear_def(item)
+
+
+def _faction_wargear(faction, item):
+    """Unpickling helper re-creating wargear through the registry."""
+    return load_wargear(item, get_catalog(faction))
 
 
 class WargearItem:
     """
-    Collection of Wargear items for assignment to a unit.
+    Collection of Wargear items for assignment to a unit. The name, type and
+    points of the item are held in a shared WargearDef, only the number of
+    items is stored per collection.
 
     Parameters
     ----------
     item : str
         Name of the Wargear to be initialised.
+    catalog : FactionCatalog (default=None)
+        Catalog in which to look up the Wargear, the current catalog if None.
 
     Public Attributes
     -----------------
     item : str
         Name of the Wargear
+    definition : WargearDef
+        Shared definition of the Wargear.
+    type : str
+        Armoury.json category of the Wargear.
     no_of : int
         Number of the Wargear in the collection.
     pts : int
@@ -92,23 +516,30 @@ class WargearItem:
     --------------
     set_no_of(self, no_of): Set no_of and updates pts value.
 
+    copy(self): Returns a new collection sharing the same WargearDef.
+
     wargear_search(self, item):
         Searches for a given wargear item in the armoury dictionary
     """
+    __slots__ = ("definition", "no_of")
 
-    def __init__(self, item):
-        self.item = item
+    def __init__(self, item, catalog=None):
         self.no_of = 1
         if '*' in item:
             self.no_of = int(item.split('*')[0])
-            self.item = item.split('*')[1]
-        self.pts = self.no_of * self.wargear_search(self.item)
-        # get the wargear type
-        for key, obj in armoury_dict.items():
-            if item in obj:
-                self.type = key
+            item = item.split('*')[1]
+        self.definition = wargear_def(item, catalog)
         return
 
+    @property
+    def item(self): return self.definition.name
+
+    @property
+    def type(self): return self.definition.type
+
+    @property
+    def pts(self): return self.no_of * self.definition.pts
+
     def save(self):
         """Generates a string to be stored in a file for saving."""
         save = ''
@@ -120,16 +551,18 @@ class WargearItem:
     def set_no_of(self, no_of):
         """Set no_of and updates points value."""
         self.no_of = no_of
-        self.pts = self.no_of * self.wargear_search(self.item)
         return
 
+    def copy(self):
+        """Returns a new collection sharing the same WargearDef."""
+        ret = WargearItem.__new__(WargearItem)
+        ret.definition = self.definition
+        ret.no_of = self.no_of
+        return ret
+
     def wargear_search(self, item):
         """Searches for a given wargear item in the armoury dictionary."""
-        for key, obj in armoury_dict.items():
-            if item in obj:
-                return obj[item]
-        raise KeyError("{} not found in Armoury.json file".format(item))
-        return
+        return get_catalog(self.definition.faction).wargear_def(item).pts
 
     def __repr__(self, comparison=None, tidy=False):
         if self.no_of == 1:
@@ -145,15 +578,16 @@ class WargearItem:
             ret += " ({}pts)".format(self.pts)
         return ret
 
+    def __reduce__(self):
+        return (_faction_wargear, (self.definition.faction, self.save()))
+
     def __mul__(self, integer):
-        self.pts = self.pts * integer
         self.no_of = self.no_of * integer
         return self
 
     def __add__(self, other_item):
         if type(other_item) == MultipleItem:
-            other_item.item.append(self.item)
-            other_item.pts += self.pts
+            other_item.parts.append(self)
             return other_item
 
         elif type(other_item) == WargearItem:
@@ -184,67 +618,86 @@ class MultipleItem(WargearItem):
     Parameters
     ----------
     *args :
-        Arguments for WargearItem.
+        WargearItems, or names of the Wargear as accepted by WargearItem. Names
+        may be joined with '+' or passed as a single list.
+    catalog : FactionCatalog (default=None)
+        Catalog in which to look up any names, the current catalog if None.
 
     Attributes
     ----------
-    item : str
-        Name of the Wargear
+    parts : list (WargearItem)
+        Each of the items grouped together.
+    item : list (str)
+        Name of each Wargear
     no_of : int
         Number of the Wargear in the collection.
     pts : int
         Points value of the collection of wargear.
 
     """
+    __slots__ = ("parts",)
+
+    def __init__(self, *args, catalog=None):
+        if len(args) == 1 and isinstance(args[0], (list, tuple)):
+            args = args[0]
+        self.parts = []
+        for i in args:
+            if isinstance(i, str):
+                self.parts += [WargearItem(j, catalog) for j in i.split('+')]
+            else:
+                self.parts.append(i)
+        self.no_of = 1
+        return
 
-    def __init__(self, *args):
-        # check all items exist
-        if type(args[0]) == str:
-            args = [WargearItem(i) for i in args]
-        self.item = list(map(lambda s: s.item, args))
+    @property
+    def item(self): return [i.item for i in self.parts]
 
+    @property
+    def type(self):
         # set type in given priority order
-        types = [i.type for i in args]
+        types = [i.type for i in self.parts]
         if "Melee" in types:
-            self.type = "Melee"
+            return "Melee"
         elif "Range" in types:
-            self.type = "Range"
-        else:
-            self.type = "Other Wargear"
+            return "Range"
+        return "Other Wargear"
 
-        # set points
-        self.pts = 0
-        self.no_of = 1
-        for i in args:
-            print(i.pts)
-            self.pts += i.pts
-        return
+    @property
+    def pts(self): return sum(i.pts for i in self.parts)
 
     def save(self):
         """Generates a string to be stored in a file for saving."""
-        return '+'.join(self.item)
+        return '+'.join(i.save() for i in self.parts)
+
+    def copy(self):
+        """Returns a new collection of copies of each of the parts."""
+        ret = MultipleItem.__new__(MultipleItem)
+        ret.parts = [i.copy() for i in self.parts]
+        ret.no_of = self.no_of
+        return ret
+
+    def __reduce__(self):
+        return (_faction_wargear, (self.parts[0].definition.faction, self.save()))
 
     def __mul__(self, other):
-        print(self)
-        print(other)
         raise TypeError("Multiplication of MultiplItem types not yet defined")
         return
 
     def __add__(self, other_item):
         if type(other_item) == MultipleItem:
-            self.item += other_item.item
+            self.parts += other_item.parts
         else:
-            self.item.append(other_item.item)
-        self.pts += other_item.pts
+            self.parts.append(other_item)
         return self
 
     def __repr__(self, comparison=None, tidy=False):
         ret = ''
-        for i in range(len(self.item)):
-            ret += self.item[i]
-            if i == len(self.item) - 1:
+        items = self.item
+        for i in range(len(items)):
+            ret += items[i]
+            if i == len(items) - 1:
                 pass
-            elif i == len(self.item) - 2:
+            elif i == len(items) - 2:
                 ret += ' & '
             else:
                 ret += ', '
@@ -0,0 +1,344 @@
+"""
+Write-ahead journal of the edits made to an army, kept next to its saved
+file so that every edit is saved as one small append rather than by
+re-writing the whole army.
+
+The journal, <file>.journal, is a JSON Lines file starting with a header
+naming the sha256 of the snapshot, the army's saved file, it applies to:
+    {"journal": FORMAT_VERSION, "base": sha256}
+followed by one entry per edit. Units and detachments are addressed by
+their place in the army, and an edited unit is written as its whole saved
+state so every kind of change to a unit replays the same way:
+    {"op": "add_detachment", "detachment": detachment save}
+    {"op": "del_detachment", "detachment": index}
+    {"op": "rename_detachment", "detachment": index, "name": str}
+    {"op": "add_unit", "detachment": index, "role": str, "unit": unit save}
+    {"op": "del_unit", "detachment": index, "role": str, "unit": index}
+    {"op": "update_unit", "detachment": index, "role": str, "unit": index,
+     "save": unit save}
+where update_unit covers changes of wargear, size and name.
+
+Compacting moves the journal to <file>.journal.old, starts a new journal
+on the snapshot the army is about to be saved as, then writes the snapshot
+and deletes the old journal in a background thread. The headers tell
+recovery whether a compaction finished, so whenever the program stops the
+army is rebuilt from the snapshot and the journals that follow it.
+
+Classes
+-------
+Journal:
+    Writes each edit of an army to its journal, compacting it into a new
+    snapshot every so many edits.
+
+Functions
+---------
+open_army(file_path, compact_every=COMPACT_EVERY, sync=False):
+    Recovers the army saved at file_path and starts journalling it.
+
+recover(file_path):
+    Returns the army saved at file_path with its journal replayed.
+
+read_journal(path):
+    Returns the base hash and the entries of a journal file.
+
+replay(army, entries):
+    Applies the edits of journal entries to an army.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import warnings
+
+import army_list
+import squad
+
+FORMAT_VERSION = 1
+COMPACT_EVERY = 256  # edits written before the journal is compacted
+
+
+def journal_path(file_path):
+    """Returns the path of the journal of the army saved at file_path."""
+    return str(file_path) + ".journal"
+
+
+def _write_file(path, data):
+    """Writes data to path atomically, flushed to disk before it replaces it."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+    return
+
+
+def read_journal(path):
+    """
+    Returns (base, entries) of the journal at path, where base is the hash
+    of the snapshot it applies to, or (None, []) if there is no journal. A
+    last line cut short by a crash while it was written is left out.
+    """
+    try:
+        with open(path, 'r') as file:
+            lines = file.read().split('\n')
+    except FileNotFoundError:
+        return None, []
+
+    entries = []
+    for index, line in enumerate(lines):
+        if not line:
+            continue
+        try:
+            entries.append(json.loads(line))
+        except json.JSONDecodeError:
+            if index == len(lines) - 1:  # no newline so never finished
+                break
+            raise ValueError("Corrupt entry on line {} of {}".format(index + 1, path))
+    if not entries:  # crashed while starting the journal
+        return None, []
+    header = entries.pop(0)
+    if header.get("journal") != FORMAT_VERSION:
+        raise ValueError("Unsupported journal version {} in {}".format(
+            header.get("journal"), path))
+    return header["base"], entries
+
+
+def replay(army, entries):
+    """Applies the edits of journal entries to an army, in order."""
+    catalog = army.catalog
+    for entry in entries:
+        op = entry["op"]
+        if op == "add_detachment":
+            army.add_detachment(army_list.Detachment(entry["detachment"], catalog))
+            continue
+        detach = army.detachments[entry["detachment"]]
+        if op == "del_detachment":
+            army.del_detachment(detach)
+        elif op == "rename_detachment":
+            detach.name = entry["name"]
+        elif op == "add_unit":
+            detach.add_unit(squad.Unit(entry["unit"], entry["role"], catalog))
+        elif op == "del_unit":
+            detach.del_unit(detach.units_dict[entry["role"]][entry["unit"]])
+        elif op == "update_unit":
+            unit = detach.units_dict[entry["role"]][entry["unit"]]
+            detach.replace_unit(unit, squad.Unit(entry["save"], entry["role"], catalog))
+        else:
+            raise ValueError("Unknown journal entry {}".format(op))
+    return
+
+
+def recover(file_path):
+    """
+    Returns the army saved at file_path with the edits in its journals
+    replayed. Journals written for a different snapshot, such as after the
+    file was saved over, are ignored with a warning.
+    """
+    file_path = str(file_path)
+    with open(file_path, 'rb') as file:
+        data = file.read()
+    army = army_list.ArmyList(None)
+    for i in army._load_items(army_list.iter_dict(army_list.decode_save(data, file_path))):
+        pass
+
+    snapshot = hashlib.sha256(data).hexdigest()
+    path = journal_path(file_path)
+    base, entries = read_journal(path)
+    old_base, old_entries = read_journal(path + ".old")
+    if base == snapshot:
+        replay(army, entries)
+    elif old_base == snapshot:  # compaction didn't finish
+        replay(army, old_entries + entries)
+    elif entries or old_entries:
+        warnings.warn("Journal of {} doesn't match the saved army, ignoring it"
+                      .format(file_path))
+    return army
+
+
+def open_army(file_path, compact_every=COMPACT_EVERY, sync=False):
+    """
+    Recovers the army saved at file_path and starts journalling it,
+    returning the army with its Journal as army.journal.
+    """
+    army = recover(file_path)
+    Journal(army, file_path, compact_every, sync)
+    return army
+
+
+class Journal:
+    """
+    Writes each edit of an army to the journal next to its saved file,
+    compacting the journal into a new snapshot of the army in a background
+    thread every compact_every edits. Starting a journal saves the army
+    first.
+
+    Parameters
+    ----------
+    army : army_list.ArmyList
+        Army to be journalled, its journal is set to the Journal.
+    file_path : str
+        Path the army is saved to, json or .armyb.
+    compact_every : int (default=COMPACT_EVERY)
+        Number of edits after which the journal is compacted, never if None.
+    sync : bool (default=False)
+        If True every edit is flushed to disk before carrying on, otherwise
+        only to the operating system so it survives the program crashing.
+
+    Public Attributes
+    -----------------
+    army : army_list.ArmyList
+        Army being journalled.
+    file_path : str
+        Path the army is saved to.
+    compact_every : int
+        Number of edits after which the journal is compacted.
+    sync : bool
+        Whether every edit is flushed to disk.
+    pending : int
+        Number of edits written since the journal was last compacted.
+
+    Public Methods
+    --------------
+    record(self, kind, detach, unit=None):
+        Writes an edit of the kind to a detachment or unit to the journal.
+
+    compact(self, wait=False):
+        Saves a new snapshot of the army and starts a new journal.
+
+    wait(self): Waits for a background compaction to finish.
+
+    close(self): Finishes any compaction and stops journalling the army.
+    """
+
+    def __init__(self, army, file_path, compact_every=COMPACT_EVERY, sync=False):
+        self.army = army
+        self.file_path = str(file_path)
+        self.compact_every = compact_every
+        self.sync = sync
+        self.pending = 0
+        self.__path = journal_path(self.file_path)
+        self.__old_path = self.__path + ".old"
+        self.__file = None
+        self.__thread = None
+        self.__error = None  # raised by the background thread
+        self.__restart()
+        army.journal = self
+        return
+
+    def __snapshot(self):
+        """Returns the saved bytes of the army and their hash."""
+        data = army_list.encode_save(self.army.save(), self.file_path, self.army.catalog)
+        return data, hashlib.sha256(data).hexdigest()
+
+    def __start_journal(self, base):
+        """Starts a new journal, with no edits, on the snapshot base."""
+        if self.__file is not None:
+            self.__file.close()
+        header = json.dumps({"journal": FORMAT_VERSION, "base": base}) + '\n'
+        _write_file(self.__path, header.encode())
+        self.__file = open(self.__path, 'a')
+        self.pending = 0
+        return
+
+    def __restart(self):
+        """
+        Saves the army and starts a new journal without a background thread,
+        leaving any journals on disk to be ignored if it stops part way.
+        """
+        data, base = self.__snapshot()
+        _write_file(self.file_path, data)
+        self.__start_journal(base)
+        if os.path.exists(self.__old_path):
+            os.remove(self.__old_path)
+        return
+
+    def record(self, kind, detach, unit=None):
+        """
+        Writes an edit of the kind to a detachment or unit of the army to the
+        journal, called by the army after adding a detachment or unit and
+        before deleting one.
+        """
+        detachments = self.army.detachments
+        entry = {"op": kind}
+        if kind == "add_detachment":
+            entry["detachment"] = detach.save()
+        else:
+            entry["detachment"] = next(index for index, i in enumerate(detachments)
+                                       if i is detach)
+        if kind == "rename_detachment":
+            entry["name"] = detach.name
+        elif unit is not None:
+            entry["role"] = unit.battlefield_role
+            if kind == "add_unit":
+                entry["unit"] = unit.save()
+            else:
+                entry["unit"] = next(index for index, i in enumerate(
+                    detach.units_dict[unit.battlefield_role]) if i is unit)
+            if kind == "update_unit":
+                entry["save"] = unit.save()
+
+        self.__file.write(json.dumps(entry, separators=(',', ':')) + '\n')
+        self.__file.flush()
+        if self.sync:
+            os.fsync(self.__file.fileno())
+        self.pending += 1
+        if self.compact_every is not None and self.pending >= self.compact_every:
+            self.compact()
+        return
+
+    def compact(self, wait=False):
+        """
+        Saves a new snapshot of the army and starts a new journal. The army
+        is saved to bytes straight away, the snapshot is written to disk in a
+        background thread unless wait is True.
+        """
+        self.wait()
+        if os.path.exists(self.__old_path):  # the last compaction failed
+            self.__restart()
+            return
+
+        data, base = self.__snapshot()
+        self.__file.close()
+        os.replace(self.__path, self.__old_path)
+        self.__file = None
+        self.__start_journal(base)
+        self.__thread = threading.Thread(target=self.__finish, args=(data,),
+                                         daemon=True)
+        self.__thread.start()
+        if wait:
+            self.wait()
+        return
+
+    def __finish(self, data):
+        """Writes the snapshot and deletes the journal it replaces."""
+        try:
+            _write_file(self.file_path, data)
+            os.remove(self.__old_path)
+        except Exception as e:
+            self.__error = e
+        return
+
+    def wait(self):
+        """
+        Waits for a background compaction to finish, raising any error that
+        stopped it.
+        """
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+        if self.__error is not None:
+            error, self.__error = self.__error, None
+            raise error
+        return
+
+    def close(self):
+        """Finishes any compaction and stops journalling the army."""
+        try:
+            self.wait()
+        finally:
+            self.__file.close()
+            if self.army.journal is self:
+                self.army.journal = None
+        return
@@ -1,17 +1,18 @@
 import wx
 
-import army_list
-import squad
 import init
+import journal
 
 from gui.gui import HomeFrame
 
 if __name__ == "__main__":
     init.init("Necron")
-    army = army_list.ArmyList("./test_army.army", True)
+    # every edit is saved to the army's journal as it is made
+    army = journal.open_army("./test_army.army")
 
     # fire up the gui
     app = wx.App()
     gui = HomeFrame(army, None, wx.ID_ANY, "")
     gui.Show(True)
     app.MainLoop()
+    army.journal.close()
@@ -3,22 +3,193 @@ Parsing classes to process the options strings for each unit.
 
 Classes:
 --------
+OptionNode:
+    Immutable node of the serializable tree that an option string parses to,
+    defined in init with the catalog cache that holds it.
+
 Option:
     Collects together the list of wargear so that the the programme can select
     and validate any options.
 
 OptionLexer: Container class for yacc Lexer.
 
+DescentParser:
+    Hand written parser for the option grammar, equivalent to the ply tables.
+
 OptionParser:
     Container class to parse option strings and contextually create options
     based on the current set of wargear in use on the unit/model.
+
+ParseCache:
+    Bounded LRU cache of parsed options, shared by every unit and model that
+    has the same option strings.
+
+Functions:
+----------
+option_tree(p, items=None):
+    Converts a parse tree of wargear objects into an OptionNode tree.
+
+tree_items(tree):
+    Yields the saved wargear strings at the leaves of an OptionNode tree.
+
+render_header(tree, items_involved, unit=True, current_wargear=None):
+    Renders the header text displayed for an option.
+
+set_engine(engine):
+    Sets the parsing engine used by OptionParsers created without one.
+
+write_tables():
+    Regenerates the parse tables shipped in option_parsetab.py. Must be run
+    whenever the grammar of OptionParser is changed:
+        python option_parser.py
 """
 import ply.lex as lex
 import ply.yacc as yacc
-import numpy as np
+import copy
+import os
+import re
 import string
+import threading
+from collections import OrderedDict, namedtuple
 
 import init
+from init import OptionNode  # defined with the catalog it is cached in
+
+# parse tables are generated ahead of time by write_tables() and shipped
+TABMODULE = "option_parsetab"
+TABDIR = os.path.dirname(os.path.abspath(__file__))
+
+# engines that OptionParser can parse with, "ply" runs the yacc tables and
+# "descent" the hand written DescentParser
+ENGINES = ("ply", "descent")
+default_engine = "ply"
+
+# guards the lazy building of the shared lexer and parser tables
+_build_lock = threading.Lock()
+
+
+def option_tree(p, items=None):
+    """
+    Converts a parse tree of tuples and wargear objects into an OptionNode
+    tree. The wargear objects at the leaves are appended to items, in order,
+    if it is given.
+    """
+    if isinstance(p, tuple):
+        if p[0] == '#':
+            return OptionNode('#', p[1], option_tree(p[2], items))
+        elif p[0] == '/':
+            return OptionNode('/', option_tree(p[1], items), option_tree(p[2], items))
+        return OptionNode(p[0], option_tree(p[1], items), p[2])
+    elif p is None:
+        return None
+    if items is not None:
+        items.append(p)
+    return p.save()
+
+
+def tree_items(tree):
+    """
+    Yields the saved wargear strings at the leaves of an OptionNode tree in
+    the order they appear in the option string.
+    """
+    if isinstance(tree, OptionNode):
+        if tree.op == '/':
+            yield from tree_items(tree.left)
+            yield from tree_items(tree.right)
+        elif tree.op == '#':
+            yield from tree_items(tree.right)
+        else:
+            yield from tree_items(tree.left)
+    elif tree is not None:
+        yield tree
+    return
+
+
+def render_header(tree, items_involved, unit=True, current_wargear=None):
+    """
+    Renders the header text displayed for an option from its OptionNode tree.
+
+    Parameters
+    ----------
+    tree : OptionNode
+        Parsed form of the option string.
+    items_involved : list (init.WargearItem)
+        Wargear at the leaves of the tree, in order.
+    unit : bool (default=True)
+        True if the option belongs to a unit, False if to a model.
+    current_wargear : list (init.WargearItem) (default=None)
+        Wargear currently in use, items of the option that are in use are
+        offered as an exchange.
+    """
+    already_used = []  # wargear in use that the option exchanges
+
+    def check_already_used():
+        already_used.clear()
+        if current_wargear is not None:
+            for i in items_involved:
+                if i in current_wargear:
+                    already_used.append(i)
+                    break
+        return
+
+    def run(p, top_level=True):
+        if top_level:
+            already_used.clear()
+
+        if isinstance(p, OptionNode):
+            if p.op == '/':
+                ret = ''
+                if top_level:  # add header to listing
+                    check_already_used()
+                    if unit:
+                        ret += "The whole unit may"
+                    else:
+                        ret += "You may"
+
+                    if already_used:  # select header based on search above
+                        ret += " exchange {} with one of the following:".format(
+                            already_used[0].item)
+                    else:
+                        ret += " take one of the following:"
+
+            elif p.op == '-':
+                if p.right is None:  # if just a tag to check its the whole unit
+                    ret = "Any model"
+                    ret += run(p.left, True)
+                    ret = ret.replace("The whole unit", '')
+
+                else:  # requires per X models to be taken
+                    ret = "For every {} models, you may ".format(p.right)
+                    check_already_used()
+                    if already_used:
+                        ret += "exchange {} for:".format(
+                            already_used[0].item) + run(p.left, False)
+                    else:
+                        ret += "take one of:" + run(p.left, False)
+
+            elif p.op == '^':
+                if p.right == 1:
+                    ret = '{} model may take one of:'.format(p.right)
+                else:
+                    ret = '{} models may take one of:'.format(p.right)
+
+            elif p.op == '#':
+                ret = run(p.right, True)
+                ret = ret.replace("take one", "take {}".format(p.left))
+
+        else:
+            item = items_involved[0]  # a tree without a list has one item
+            if top_level:  # just a single item that needs listing
+                ret = "The whole unit may take " + str(item)
+            else:  # sub level that needs to be appended to a listing
+                if already_used:
+                    ret = item.__repr__(already_used[0])
+                else:
+                    ret = str(item)
+            ret += '\n'
+        return ret
+
+    return run(tree)
 
 
 class Option:
@@ -30,6 +201,10 @@ class Option:
     ----------
     items_involved : list (init.WargearItem)
         List of all the Wargear that could be selected within the option.
+    unit : bool (default=True)
+        True if the option belongs to a unit, False if to a model.
+    current_wargear : list (init.WargearItem) (default=None)
+        Wargear currently in use, giving context to the header.
 
     Public Attributes
     ----------
@@ -37,27 +212,94 @@ class Option:
         List of all the Wargear that could be selected within the option.
     selected : list (init.WargearItem)
         List of any Wargear that has been chosen to be added.
+    tree : OptionNode
+        Parsed form of the option string, None if it has not been parsed.
+    unit : bool
+        True if the option belongs to a unit, False if to a model.
+    current_wargear : list (init.WargearItem)
+        Wargear currently in use, giving context to the header.
     no_required : int
         Number of models required in a unit before this option can be taken.
     no_picks : int
         Number of Wargear that can be chosen in the option.
+    all_models : bool
+        False if the option is taken model by model rather than by the unit.
+    errors : list (str)
+        Syntax errors reported while parsing the option string.
     header : str
-        Heading given when displaying the options.
+        Heading given when displaying the options, rendered from the tree the
+        first time it is read.
 
     Public Methods
     --------------
+    from_tree(cls, tree, catalog=None, unit=True, current_wargear=None):
+        Creates an Option from an OptionNode tree.
+    set_tree(self, tree):
+        Sets the parsed tree and the pick and model requirements read from it.
     select(self, index):
         Chooses the index option in items_involved to be added to selected.
     select_list(self, index):
         Resets self.selected and replaces it with the supplied list.
+    copy(self):
+        Returns a copy with its own wargear and selections.
     """
+    __slots__ = ("items_involved", "unit", "current_wargear", "tree", "no_required",
+                 "selected", "no_picks", "all_models", "errors", "__header")
 
-    def __init__(self, items_involved):
+    def __init__(self, items_involved, unit=True, current_wargear=None):
         self.items_involved = items_involved
+        self.unit = unit
+        self.current_wargear = current_wargear
+        self.tree = None
         self.no_required = 1
         self.selected = []
         self.no_picks = 1
-        self.header = ''
+        self.all_models = True
+        self.errors = []
+        self.__header = ''
+
+    @classmethod
+    def from_tree(cls, tree, catalog=None, unit=True, current_wargear=None):
+        """
+        Creates an Option from an OptionNode tree, loading the wargear at its
+        leaves from the catalog, the current catalog if None.
+        """
+        option = cls([init.load_wargear(i, catalog) for i in tree_items(tree)],
+                     unit, current_wargear)
+        option.set_tree(tree)
+        return option
+
+    def set_tree(self, tree):
+        """
+        Sets the parsed tree and reads the number of picks and models required
+        from it. The header is rendered from the tree when it is next read.
+        """
+        self.tree = tree
+        self.__header = None if tree is not None else ''
+        node = tree
+        # the innermost requirement applies, nothing below a list is read
+        while isinstance(node, OptionNode) and node.op != '/':
+            if node.op == '#':
+                self.no_picks = node.left
+                node = node.right
+                continue
+            if node.op == '-':
+                if node.right is not None:
+                    self.no_required = node.right
+                self.all_models = False
+            node = node.left
+        return
+
+    @property
+    def header(self):
+        if self.__header is None:
+            self.__header = render_header(self.tree, self.items_involved,
+                                          self.unit, self.current_wargear)
+        return self.__header
+
+    @header.setter
+    def header(self, header):
+        self.__header = header
 
     def __getitem__(self, i):
         return self.items_involved[i]
@@ -78,7 +320,7 @@ class Option:
         """
         Chooses the index option in items_involved to be added to selected.
         """
-        if isinstance(index, int) or isinstance(index, np.uint8):
+        if isinstance(index, int):
             index = self.items_involved[index]
 
         if self.selected == []:
@@ -103,9 +345,39 @@ class Option:
         self.selected = [self.items_involved[i] for i in index]
         return
 
+    def copy(self):
+        """
+        Returns a copy with its own wargear and selections so that selecting
+        in the copy does not change the original.
+        """
+        ret = Option.__new__(Option)
+        ret.items_involved = [i.copy() for i in self.items_involved]
+        ret.selected = [i.copy() for i in self.selected]
+        ret.unit = self.unit
+        ret.current_wargear = self.current_wargear
+        ret.tree = self.tree
+        ret.no_required = self.no_required
+        ret.no_picks = self.no_picks
+        ret.all_models = self.all_models
+        ret.errors = list(self.errors)
+        ret.__header = self.__header
+        return ret
+
 
 class OptionLexer:
-    """Container class for yacc Lexer."""
+    """
+    Container class for yacc Lexer.
+
+    Public Attributes
+    -----------------
+    catalog : init.FactionCatalog
+        Catalog in which ITEM tokens are looked up, the current catalog if
+        None.
+    lexer : ply.lex.Lexer
+        The built lexer, None until build() is called.
+    """
+    lexer = None
+    __master = None  # lexer built once per process and cloned by build()
     tokens = ['ITEM', 'NUM', 'PLUS', 'MINUS', 'STAR', 'SLASH', 'HASH', 'CARET']
 
     # these are the regexes that the lexer uses to recognise the tokens
@@ -123,7 +395,7 @@ class OptionLexer:
 
     def t_ITEM(self, t):
         r'[a-zA-Z_][\w -]*[\w]+[\w]'
-        t.value = init.WargearItem(t.value)
+        t.value = init.WargearItem(t.value, self.catalog)
         return t
 
     def t_NUM(self, t):
@@ -131,9 +403,23 @@ class OptionLexer:
         t.value = int(t.value)
         return t
 
+    def __init__(self, catalog=None):
+        self.catalog = catalog
+
     # Build the lexer
     def build(self, **kwargs):
-        self.lexer = lex.lex(module=self, **kwargs)
+        """
+        Builds the lexer. Without keyword arguments this clones a lexer built
+        once per process rather than re-compiling the token rules.
+        """
+        if kwargs:
+            self.lexer = lex.lex(module=self, **kwargs)
+            return
+        with _build_lock:
+            if OptionLexer.__master is None:
+                OptionLexer.__master = lex.lex(module=OptionLexer())
+        self.lexer = OptionLexer.__master.clone(self)
+        self.lexer.begin("INITIAL")  # clone() leaves the rules bound to the master
 
     # Test it output
     def test(self, data):
@@ -145,6 +431,155 @@ class OptionLexer:
             print(tok)
 
 
+# master regex equivalent to the one ply builds from the OptionLexer rules
+_TOKEN_RULES = (("ITEM", OptionLexer.t_ITEM.__doc__), ("NUM", OptionLexer.t_NUM.__doc__),
+                ("PLUS", OptionLexer.t_PLUS), ("STAR", OptionLexer.t_STAR),
+                ("HASH", OptionLexer.t_HASH), ("CARET", OptionLexer.t_CARET),
+                ("MINUS", OptionLexer.t_MINUS), ("SLASH", OptionLexer.t_SLASH))
+_TOKEN_RE = re.compile("|".join("(?P<{}>{})".format(*i) for i in _TOKEN_RULES), re.VERBOSE)
+
+
+class _DescentError(Exception):
+    """Raised to unwind DescentParser on a syntax error."""
+
+
+class DescentParser:
+    """
+    Hand written parser for the option grammar, producing the same parse trees
+    and the same order of items in swap_wargear as the ply tables without
+    building LexToken objects or running the LR automaton.
+
+    The binding powers below are those ply actually resolves the grammar with:
+    a rule takes the precedence of its rightmost terminal, so only the
+    'NUM HASH expression', 'expression MINUS' and 'expression SLASH expression'
+    rules take part in shift/reduce resolution. Every other conflict shifts,
+    which makes '+' chains right nested and 'NUM*' apply to the whole chain
+    that follows it.
+
+    Parameters
+    ----------
+    errorfunc : callable
+        Called with the offending ply.lex.LexToken on a syntax error, or None
+        at the end of the string, as OptionParser.p_error() is by ply.
+
+    Public Methods
+    --------------
+    tokenize(self, data, catalog=None): Splits data into (type, value, lexpos) tuples.
+    parse(self, data, catalog=None): Parses data into a tree of wargear objects.
+    """
+    HASH_BP = 1
+    postfix = {"MINUS": 2, "CARET": 0}  # binding power of postfix operators
+    SLASH_BP = 3
+
+    def __init__(self, errorfunc):
+        self.errorfunc = errorfunc
+        self.tokens = []
+        self.pos = 0
+        return
+
+    def tokenize(self, data, catalog=None):
+        """Splits data into (type, value, lexpos) tuples as OptionLexer would."""
+        tokens = []
+        pos = 0
+        end = len(data)
+        match = _TOKEN_RE.match
+        while pos < end:
+            if data[pos] == ' ':
+                pos += 1
+                continue
+            m = match(data, pos)
+            if m is None:
+                print("Illegal character '%s'" % data[pos])
+                pos += 1
+                continue
+            kind = m.lastgroup
+            value = m.group()
+            if kind == "ITEM":
+                value = init.WargearItem(value, catalog)
+            elif kind == "NUM":
+                value = int(value)
+            tokens.append((kind, value, pos))
+            pos = m.end()
+        return tokens
+
+    def parse(self, data, catalog=None):
+        """
+        Parses data, returning the same tree of tuples and wargear objects as
+        the ply tables, or None if data is empty or on a syntax error.
+        """
+        self.tokens = self.tokenize(data, catalog)
+        self.pos = 0
+        try:
+            if not self.tokens:
+                tree = None
+            else:
+                tree = self.__expression(-1)
+                if self.pos < len(self.tokens):
+                    self.__error()
+        except _DescentError:
+            return None
+        return tree
+
+    def __peek(self, offset=0):
+        try:
+            return self.tokens[self.pos + offset][0]
+        except IndexError:
+            return None
+
+    def __next(self, kind):
+        """Consumes and returns the value of the next token, which must be kind."""
+        if self.__peek() != kind:
+            self.__error()
+        self.pos += 1
+        return self.tokens[self.pos - 1][1]
+
+    def __error(self):
+        tok = None
+        if self.pos < len(self.tokens):
+            tok = lex.LexToken()
+            tok.type, tok.value, tok.lexpos = self.tokens[self.pos]
+            tok.lineno = 1
+        self.errorfunc(tok)
+        raise _DescentError
+
+    def __expression(self, rbp):
+        """expression with every operator binding tighter than rbp applied."""
+        if self.__peek() == "NUM" and self.__peek(1) == "HASH":
+            num = self.__next("NUM")
+            self.pos += 1
+            left = ('#', num, self.__expression(self.HASH_BP))
+        else:
+            left = self.__option()
+
+        while True:
+            kind = self.__peek()
+            if kind == "SLASH" and self.SLASH_BP > rbp:
+                self.pos += 1
+                left = ('/', left, self.__expression(self.SLASH_BP))
+            elif kind in self.postfix and self.postfix[kind] > rbp:
+                op = self.tokens[self.pos][1]
+                self.pos += 1
+                num = self.__next("NUM") if self.__peek() == "NUM" else None
+                left = (op, left, num)
+            else:
+                return left
+
+    def __option(self):
+        """ITEM, 'ITEM + option' or 'NUM * option' reduced in ply's order."""
+        if self.__peek() == "NUM" and self.__peek(1) == "STAR":
+            num = self.__next("NUM")
+            self.pos += 1
+            return self.__option() * num
+        if self.__peek() == "NUM":  # ply reports the token after the NUM
+            self.pos += 1
+            self.__error()
+        item = self.__next("ITEM")
+        if self.__peek() == "PLUS":
+            self.pos += 1
+            return item + self.__option()
+        return item
+
+
 class OptionParser:
     """
     Container class to parse option strings and contextually create options
@@ -163,6 +598,11 @@ class OptionParser:
         are generated.
     unit : bool
         True if the parser is attached to a unit, False if attached to a model.
+    catalog : init.FactionCatalog (default=None)
+        Catalog in which to look up wargear, the current catalog if None.
+    engine : str (default=None)
+        Parsing engine, one of ENGINES. The module default_engine is used if
+        None.
 
     Public Attributes
     ----------
@@ -171,35 +611,85 @@ class OptionParser:
         are generated.
     unit : bool
         True if the parser is attached to a unit, False if attached to a model.
-    lexer : OptionLexer
-        Lexer to generate tokens for the scanner
-    options_list : list (Option)
-        List of fully parsed options.
+    catalog : init.FactionCatalog
+        Catalog in which to look up wargear, the current catalog if None.
+    engine : str
+        Parsing engine, one of ENGINES, or None to follow default_engine.
+    parser : ply.yacc.LRParser
+        Parser built from the shipped parse tables, None until build() is
+        called or the first string is parsed. It is only used as a template,
+        every call parses with its own copy.
 
     Public Methods
     --------------
-    parse2(self, parse_string, **kwargs):
-        Wrapper for parser function to check the items being parsed
+    parse2(self, parse_string, catalog=None, **kwargs):
+        Parses each string into an Option, safe to call from several threads.
+    error_message(p): Returns the message for a syntax error at token p.
     """
 
-    def __init__(self, current_wargear=None, unit=True):
+    def __init__(self, current_wargear=None, unit=True, catalog=None, engine=None):
+        if engine is not None and engine not in ENGINES:
+            raise ValueError("Unknown parsing engine {}".format(engine))
         self.current_wargear = current_wargear  # for checking if an exchange or addition option for '/' symbol
         self.unit = unit
+        self.catalog = catalog
+        self.engine = engine
 
-        # create lexer
-        self.lexer = OptionLexer()
-        self.lexer.build()
-        self.options_list = []  # stores all available wargear in an options list
+        self.parser = None  # built on first use
+        self.__idle = []  # (lexer, parser) pairs not in use by any call
         return
 
-    def parse2(self, parse_string, **kwargs):
-        """Wrapper for parser function to check the items being parsed"""
-        self.options_list = []
-        for item in parse_string:
-            self.swap_wargear = []  # saves all items being parsed
-            self.options_list.append(Option(self.swap_wargear))
-            self.parser.parse(item, **kwargs)
-        return self.options_list
+    def parse2(self, parse_string, catalog=None, **kwargs):
+        """
+        Parses each string in parse_string into an Option. Wargear is looked
+        up in the given catalog, or the parser's catalog if None. Each call
+        keeps its lexer and parser state to itself, so parse2 is reentrant and
+        one OptionParser can be shared between threads. Lexers and parser
+        copies are handed to one call at a time and reused afterwards.
+        Syntax errors are reported by p_error() and kept in Option.errors.
+        """
+        if catalog is None:
+            catalog = self.catalog
+        errors = []
+
+        def report(p):
+            errors.append(self.error_message(p))
+            return self.p_error(p)
+
+        engine = self.engine if self.engine is not None else default_engine
+        if engine == "descent":
+            descent = DescentParser(report)
+        else:
+            if self.parser is None:
+                with _build_lock:
+                    if self.parser is None:
+                        self.build()
+            try:
+                lexer, parser = self.__idle.pop()
+            except IndexError:
+                lexer = OptionLexer()
+                lexer.build()
+                parser = copy.copy(self.parser)  # shares the tables, not the stacks
+            lexer.catalog = catalog
+            parser.errorfunc = report
+
+        options_list = []
+        try:
+            for item in parse_string:
+                del errors[:]
+                if engine == "descent":
+                    result = descent.parse(item, catalog)
+                else:
+                    result = parser.parse(item, lexer=lexer.lexer, **kwargs)
+                items_involved = []
+                option = Option(items_involved, self.unit, self.current_wargear)
+                option.set_tree(option_tree(result, items_involved))
+                option.errors = list(errors)
+                options_list.append(option)
+        finally:
+            if engine != "descent":
+                self.__idle.append((lexer, parser))
+        return options_list
 
     tokens = OptionLexer.tokens
 
@@ -211,7 +701,15 @@ class OptionParser:
                   ('left', 'STAR'))
 
     def build(self, **kwargs):
-        self.parser = yacc.yacc(module=self, **kwargs)
+        """
+        Builds the parser from the shipped parse tables without writing any
+        files. The tables are only regenerated, in memory, if they are out of
+        date with the grammar.
+        """
+        options = {"tabmodule": TABMODULE, "outputdir": TABDIR,
+                   "write_tables": False, "debug": False}
+        options.update(kwargs)
+        self.parser = yacc.yacc(module=self, **options)
         return
 
     # define grammar tree
@@ -220,12 +718,18 @@ class OptionParser:
         calc : expression
              | empty
         '''
-        return self.run(p[1])
+        p[0] = p[1]
+        return
 
     def p_error(self, p):
-        print("Syntax error {} is not valid".format(p))
+        print(self.error_message(p))
         return
 
+    @staticmethod
+    def error_message(p):
+        """Message for a syntax error at token p, None at the end of the string."""
+        return "Syntax error {} is not valid".format(p)
+
     def p_expression(self, p):
         '''
         expression : expression MINUS NUM
@@ -243,8 +747,6 @@ class OptionParser:
         expression : ITEM
                    | option
         '''
-        # save all items in the string to be accessed outside
-        self.swap_wargear.append(p[1])
         p[0] = p[1]
         return
 
@@ -272,84 +774,123 @@ class OptionParser:
         p[0] = None
         return
 
-    def __check_already_used(self):
-        """Helper function for run() to check if a wargear option is in use"""
-        # check if any wargear items are already in use in the unit
-        self.already_used = [False]
-        if self.current_wargear is not None:
-            for i in self.swap_wargear:
-                if i in self.current_wargear:
-                    self.already_used[0] = True
-                    self.already_used.append(i)
-                    break  # may cause errors but don't
-        return
 
-    def run(self, p, top_level=True):
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
 
-        if top_level:
-            self.already_used = [False]
 
-        if type(p) == tuple:
-            if p[0] == '/':
-                ret = ''
-                if top_level:  # add header to listing
-                    self.__check_already_used()
-                    if self.unit:
-                        ret += "The whole unit may"
-                    else:
-                        ret += "You may"
+class ParseCache:
+    """
+    Bounded LRU cache of parsed option trees, shared by every unit and model
+    that has the same option strings. Entries are keyed by the catalog and the
+    option strings, and each lookup builds fresh Options from the cached trees
+    so that every unit keeps its own selections and wargear context. Lookups
+    are safe from several threads, parsing happens outside the lock.
 
-                    if self.already_used[0]:  # select header based on search above
-                        ret += " exchange {} with one of the following:".format(
-                            self.already_used[1].item)
-                    else:
-                        ret += " take one of the following:"
+    Parameters
+    ----------
+    maxsize : int (default=512)
+        Maximum number of option lists to hold before the least recently used
+        is evicted.
 
-            elif p[0] == '-':
-                if p[2] is None:  # if just a tag to check its the whole unit
-                    ret = "Any model"
-                    ret += self.run(p[1], True)
-                    ret = ret.replace("The whole unit", '')
+    Public Attributes
+    -----------------
+    maxsize : int
+        Maximum number of option lists held.
+    hits : int
+        Number of lookups answered from the cache.
+    misses : int
+        Number of lookups that had to be parsed.
 
-                else:  # requires per X models to be taken
-                    ret = "For every {} models, you may ".format(p[2])
-                    # save the min amount requirement for access in main
-                    self.options_list[-1].no_required = p[2]
-                    self.__check_already_used()
-                    if self.already_used[0]:
-                        ret += "exchange {} for:".format(
-                            self.already_used[1].item) + self.run(p[1], False)
-                    else:
-                        ret += "take one of:" + self.run(p[1], False)
-                self.options_list[-1].all_models = False
+    Public Methods
+    --------------
+    parse(self, parse_string, catalog=None, current_wargear=None, unit=True):
+        Returns new Options parsed from parse_string.
+    info(self): Returns the hits, misses, maxsize and current size.
+    clear(self): Empties the cache and resets the counters.
+    """
 
-            elif p[0] == '^':
-                if p[2] == 1:
-                    ret = '{} model may take one of:'.format(p[2])
-                else:
-                    ret = '{} models may take one of:'.format(p[2])
-                self.run(p[1], False)
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self.__cache = OrderedDict()
+        self.__lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        return
 
-            elif p[0] == '#':
-                self.options_list[-1].no_picks = p[1]
-                ret = self.run(p[2], True)
-                ret = ret.replace("take one", "take {}".format(p[1]))
+    def parse(self, parse_string, catalog=None, current_wargear=None, unit=True):
+        """
+        Returns new Options parsed from parse_string, with headers rendered
+        in the context of current_wargear, parsing only if the option trees
+        are not already cached.
+        """
+        if catalog is None:
+            catalog = init.current_catalog
+        parse_string = tuple(parse_string)
+        key = (catalog.faction, catalog.hash, parse_string)
+
+        with self.__lock:
+            trees = self.__cache.get(key)
+            if trees is not None:
+                self.__cache.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if trees is None:
+            trees = self.__parse(parse_string, catalog)
+            with self.__lock:
+                self.__cache[key] = trees
+                if len(self.__cache) > self.maxsize:
+                    self.__cache.popitem(last=False)
+        return [Option.from_tree(i, catalog, unit, current_wargear) for i in trees]
+
+    def __parse(self, parse_string, catalog):
+        """Parses the option trees, using those pre-parsed in the catalog if possible."""
+        try:
+            return catalog.parsed_options[parse_string]
+        except KeyError:
+            pass
+        return tuple(i.tree for i in main_parser.parse2(parse_string, catalog=catalog))
+
+    def info(self):
+        """Returns the hits, misses, maxsize and current size."""
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self.__cache))
+
+    def clear(self):
+        """Empties the cache and resets the counters."""
+        with self.__lock:
+            self.__cache.clear()
+            self.hits = 0
+            self.misses = 0
+        return
 
-        else:
-            if top_level:  # just a single item that needs listing
-                ret = "The whole unit may take " + str(p)
-            else:  # sub level that needs to be appended to a listing
-                if self.already_used[0]:
-                    ret = p.__repr__(self.already_used[1])
-                else:
-                    ret = str(p)
-            ret += '\n'
 
-        if top_level:  # if top level save the output to be manipulated
-            self.options_list[-1].header = ret
-        return ret
+def set_engine(engine):
+    """
+    Sets the parsing engine, one of ENGINES, used by every OptionParser that
+    was created without one, including main_parser and parse_cache.
+    """
+    global default_engine
+    if engine not in ENGINES:
+        raise ValueError("Unknown parsing engine {}".format(engine))
+    default_engine = engine
+    return
+
 
+def write_tables():
+    """
+    Regenerates the parse tables shipped in option_parsetab.py. Must be run
+    whenever the grammar of OptionParser is changed.
+    """
+    OptionParser().build(write_tables=True)
+    return
 
+
+# neither is built until the first string is parsed
 global main_parser
 main_parser = OptionParser()
-main_parser.build()
+
+parse_cache = ParseCache()
+
+
+if __name__ == "__main__":
+    write_tables()
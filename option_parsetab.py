@@ -0,0 +1,46 @@
+
+# option_parsetab.py
+# This file is automatically generated. Do not edit.
+# pylint: disable=W,C,R
+_tabversion = '3.10'
+
+_lr_method = 'LALR'
+
+_lr_signature = 'leftHASHleftMINUSleftSLASHleftPLUSleftSTARCARET HASH ITEM MINUS NUM PLUS SLASH STAR\n        calc : expression\n             | empty\n        \n        expression : expression MINUS NUM\n                   | expression MINUS empty\n                   | expression CARET NUM\n                   | expression CARET empty\n                   | NUM HASH expression\n                   | expression SLASH expression\n        \n        expression : ITEM\n                   | option\n        \n        option : NUM STAR ITEM\n               | NUM STAR option\n        \n        option : option PLUS option\n               | ITEM PLUS option\n               | ITEM PLUS ITEM\n        \n        empty :\n        '
+    
+_lr_action_items = {'NUM':([0,7,8,9,10,11,12,13,],[4,14,16,4,4,20,20,20,]),'ITEM':([0,9,10,11,12,13,],[5,5,5,21,23,26,]),'$end':([0,1,2,3,5,6,7,8,14,15,16,17,18,19,21,22,23,24,25,],[-16,0,-1,-2,-9,-10,-16,-16,-3,-4,-5,-6,-8,-7,-11,-12,-15,-14,-13,]),'MINUS':([2,5,6,7,8,14,15,16,17,18,19,21,22,23,24,25,],[7,-9,-10,-16,-16,-3,-4,-5,-6,-8,7,-11,-12,-15,-14,-13,]),'CARET':([2,5,6,7,8,14,15,16,17,18,19,21,22,23,24,25,],[8,-9,-10,-16,-16,-3,-4,-5,-6,-8,-7,-11,-12,-15,-14,-13,]),'SLASH':([2,5,6,7,8,14,15,16,17,18,19,21,22,23,24,25,],[9,-9,-10,-16,-16,-3,-4,-5,-6,-8,9,-11,-12,-15,-14,-13,]),'HASH':([4,],[10,]),'STAR':([4,20,],[11,11,]),'PLUS':([5,6,21,22,23,24,25,26,],[12,13,12,-12,12,-14,-13,12,]),}
+
+_lr_action = {}
+for _k, _v in _lr_action_items.items():
+   for _x,_y in zip(_v[0],_v[1]):
+      if not _x in _lr_action:  _lr_action[_x] = {}
+      _lr_action[_x][_k] = _y
+del _lr_action_items
+
+_lr_goto_items = {'calc':([0,],[1,]),'expression':([0,9,10,],[2,18,19,]),'empty':([0,7,8,],[3,15,17,]),'option':([0,9,10,11,12,13,],[6,6,6,22,24,25,]),}
+
+_lr_goto = {}
+for _k, _v in _lr_goto_items.items():
+   for _x, _y in zip(_v[0], _v[1]):
+       if not _x in _lr_goto: _lr_goto[_x] = {}
+       _lr_goto[_x][_k] = _y
+del _lr_goto_items
+_lr_productions = [
+  ("S' -> calc","S'",1,None,None,None),
+  ('calc -> expression','calc',1,'p_calc','option_parser.py',299),
+  ('calc -> empty','calc',1,'p_calc','option_parser.py',300),
+  ('expression -> expression MINUS NUM','expression',3,'p_expression','option_parser.py',310),
+  ('expression -> expression MINUS empty','expression',3,'p_expression','option_parser.py',311),
+  ('expression -> expression CARET NUM','expression',3,'p_expression','option_parser.py',312),
+  ('expression -> expression CARET empty','expression',3,'p_expression','option_parser.py',313),
+  ('expression -> NUM HASH expression','expression',3,'p_expression','option_parser.py',314),
+  ('expression -> expression SLASH expression','expression',3,'p_expression','option_parser.py',315),
+  ('expression -> ITEM','expression',1,'p_expression_name','option_parser.py',322),
+  ('expression -> option','expression',1,'p_expression_name','option_parser.py',323),
+  ('option -> NUM STAR ITEM','option',3,'p_mult_item','option_parser.py',332),
+  ('option -> NUM STAR option','option',3,'p_mult_item','option_parser.py',333),
+  ('option -> option PLUS option','option',3,'p_add_item','option_parser.py',340),
+  ('option -> ITEM PLUS option','option',3,'p_add_item','option_parser.py',341),
+  ('option -> ITEM PLUS ITEM','option',3,'p_add_item','option_parser.py',342),
+  ('empty -> <empty>','empty',0,'p_empty','option_parser.py',349),
+]
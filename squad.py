@@ -15,12 +15,11 @@ Model(BoardObj):
     the same unit.
 """
 
-import copy
-import numpy as np
-
 import init
 import option_parser
+import validation
 from collections import Counter
+from types import MappingProxyType
 
 
 class BoardObj:
@@ -33,6 +32,9 @@ class BoardObj:
     type : str
         Reference to the type of BoardObj being created to search in resource
         data.
+    catalog : init.FactionCatalog (default=None)
+        Catalog from which the resource data is taken, the current catalog if
+        None.
 
     Public Attributes
     -----------------
@@ -40,6 +42,8 @@ class BoardObj:
         Parent to which the BoardObj belongs
     treeid : wx.TreeItemID
         ID for wx.TreeCtrl in GUI
+    catalog : init.FactionCatalog
+        Catalog from which the resource data is taken.
     type : str
         Reference to the type of BoardObj being created to search in resource
         data.
@@ -52,7 +56,8 @@ class BoardObj:
     wargear : list (init.WargearItem)
         List of wargear in the BoardObj.
     pts : int
-        Total points for the BoardObj.
+        Total points for the BoardObj, counted on first use and then kept up
+        to date as the BoardObj changes.
 
     Public Methods
     --------------
@@ -62,13 +67,23 @@ class BoardObj:
     save(self): Creates a dictionary of the BoardObj's data.
 
     load(self, loaded_dict): Loads the unit from a pre-made dictionary.
+
+    clone(self, parent=None):
+        Returns a copy of the BoardObj sharing its catalog data.
     """
+    # Model keeps to these slots, Unit adds a __dict__ for its own attributes
+    __slots__ = ("parent", "treeid", "catalog", "__name", "__parsed", "__pts",
+                 "__type", "__wargear", "__options")
 
-    def __init__(self, type):
+    def __init__(self, type, catalog=None):
         self.parent = None
         self.treeid = None
+        if catalog is None:
+            catalog = init.current_catalog
+        self.catalog = catalog
         self.__name = None
         self.__parsed = False
+        self.__pts = None  # cached total, None until first counted
         if isinstance(type, dict):  # data is being loaded
             self.__type = type["type"]
             source = type["wargear"]
@@ -77,9 +92,7 @@ class BoardObj:
             source = self.root_data["wargear"]
 
         if source is not None:
-            self.__wargear = list(map(lambda x: init.MultipleItem(x.split('+'))
-                                      if '+' in x else init.WargearItem(x),
-                                      source))
+            self.__wargear = [init.load_wargear(i, catalog) for i in source]
         else:
             self.__wargear = None
         return
@@ -99,17 +112,49 @@ class BoardObj:
             return None
         elif not self.__parsed and self.root_data["options"]:
             self.__parsed = True
-            self.__options = option_parser.main_parser.parse2(self.root_data["options"])
+            self.__options = option_parser.parse_cache.parse(self.root_data["options"],
+                                                             self.catalog)
         return self.__options
 
     @property
     def pts(self):
+        if self.__pts is None:
+            self.__pts = self._count_pts()
+        return self.__pts
+
+    def _count_pts(self):
+        """Counts the points of the BoardObj from its wargear and children."""
         pts = 0
         if self.wargear is not None:
-            wargear_pts = np.sum([i.pts for i in self.wargear])
+            wargear_pts = sum(i.pts for i in self.wargear)
             pts = wargear_pts * self.size
         return pts
 
+    def _refresh_pts(self, notify=True):
+        """
+        Re-counts the cached points after a change to the BoardObj and passes
+        the difference up to the parent, unless notify is False, so an edit
+        costs the depth of the army rather than its size. Nothing above a
+        BoardObj that has not been counted includes its points, so there is
+        nothing to update.
+        """
+        old = self.__pts
+        if old is None:
+            return
+        self.__pts = self._count_pts()
+        if notify and self.__pts != old and self.parent is not None:
+            self.parent._pts_changed(self.__pts - old)
+        return
+
+    def _pts_changed(self, delta):
+        """Called by a child whose points have changed by delta."""
+        self._refresh_pts()
+        return
+
+    def _wargear_changed(self):
+        """Called when the wargear or models of the BoardObj have changed."""
+        return
+
     def change_wargear(self, wargear_to_add):
         """
         Changes the wargear options for the BoardObj.
@@ -127,18 +172,43 @@ class BoardObj:
                     if i in self.__wargear:
                         self.__wargear.remove(i)
 
-                self.__wargear += new_wargear.selected
+                # copies so later selections can't change the wargear unseen
+                self.__wargear += [i.copy() for i in new_wargear.selected]
         elif type(wargear_to_add[0]) in {init.WargearItem, init.MultipleItem}:
-            self.__wargear = wargear_to_add
+            self.__wargear = [i.copy() for i in wargear_to_add]
         else:
             raise TypeError("wargear_to_add must be an Option or WargearItem")
+        self._wargear_changed()
+        self._refresh_pts()
         return
 
+    def clone(self, parent=None):
+        """
+        Returns a copy of the BoardObj belonging to parent. The catalog data
+        and option trees are shared, only the wargear and any parsed options
+        are copied so nothing is looked up or parsed again.
+        """
+        ret = object.__new__(type(self))
+        ret.parent = parent
+        ret.treeid = None
+        ret.catalog = self.catalog
+        ret.__name = self.__name
+        ret.__type = self.__type
+        ret.__pts = self.__pts
+        ret.__parsed = self.__parsed
+        if self.__parsed:
+            ret.__options = [i.copy() for i in self.__options]
+        if self.__wargear is None:
+            ret.__wargear = None
+        else:
+            ret.__wargear = [i.copy() for i in self.__wargear]
+        return ret
+
     def save(self):
         """Creates a dictionary of the unit's data."""
         save = {}
         save["type"] = self.type
-        save["size"] = int(self.size)
+        save["size"] = self.size
         if self.wargear is not None:
             save["wargear"] = [i.save() for i in self.wargear]
         else:
@@ -172,6 +242,8 @@ class Unit(BoardObj):
         Name of the unit template to be created.
     battlefield_role : str
         Battlefield role of the unit that is being created.
+    catalog : init.FactionCatalog (default=None)
+        Catalog from which the unit is created, the current catalog if None.
 
     Public Attributes
     -----------------
@@ -179,6 +251,8 @@ class Unit(BoardObj):
         Detachment to which the unit belongs.
     treeid : wx.TreeItemID
         ID for wx.TreeCtrl in GUI
+    catalog : init.FactionCatalog
+        Catalog from which the unit was created.
     type : str
         Name of unit template.
     name : str
@@ -200,10 +274,19 @@ class Unit(BoardObj):
         List of base wargear that every model in the unit has.
     models : list (Model)
         List of models that are in the unit.
+    model_groups : mappingproxy
+        Read-only index of model type to the list of models of that type in
+        the unit.
     parser : option_parser.OptionParser
         Parser for all the options available to the unit.
     pts : int
         Total points for the group of models.
+    violations : tuple (validation.Violation)
+        Rules the unit breaks, checked on first use and again after the unit
+        changes.
+    version : int
+        Number of changes made to the unit, used to tell when anything cached
+        from it, such as its text, is out of date.
 
     Public Methods
     --------------
@@ -213,23 +296,33 @@ class Unit(BoardObj):
         Re-sizes the unit. An int must be provided for every possible type of
         model.
 
+    re_size_models(self, sizes):
+        Re-sizes the unit from a dictionary of model type to number of models.
+
     get_all_wargear(self):
-        Returns a set containing all the wargear present across all models in
-        the unit.
+        Returns a read-only multiset of the number of each wargear item across
+        all models in the unit.
+
+    clone(self, parent=None):
+        Returns a copy of the unit and its models sharing their catalog data.
 
     check_validity(self):
-        Checks that the unit is legal by looking at the size of the unit and
-        the number of each type of model
+        Prints any rules the unit breaks, returns True if it is legal.
 
     save(self): Creates a dictionary of the unit's data.
 
     load(self, loaded_dict): Loads the unit from a pre-made dictionary.
     """
 
-    def __init__(self, unit_type, battlefield_role):
+    def __init__(self, unit_type, battlefield_role, catalog=None):
         self.__default_name = True
+        self.__root_data = None  # resolved on first use
+        self.__all_wargear = None  # cached wargear counts, None until counted
+        self.__violations = None  # cached, None until checked
+        self.__version = 0
+        self.__text = None  # cached (version, text) of __repr__
         self.__battlefield_role = battlefield_role
-        super().__init__(unit_type)
+        super().__init__(unit_type, catalog)
         self._BoardObj__name = self.type
 
         if isinstance(unit_type, dict): # loading from dict
@@ -240,19 +333,19 @@ class Unit(BoardObj):
             if unit_type["models"] is not None:
                 self.__models = [Model(self, i) for i in unit_type["models"]]
             else:
-                self.__models = [Model(self, no_models=unit_type["size"],
-                                       base_pts=self.root_data["base_pts"])]
+                self.__models = [Model(self, no_models=unit_type["size"])]
+            self.__index_models()
             return
 
         if self.mod_str is None:
-            self.__models = [Model(self, no_models=self.size_range[0],
-                                   base_pts=self.root_data["base_pts"])]
+            self.__models = [Model(self, no_models=self.size_range[0])]
         else:
             # get first model without size-limits
             for model in self.mod_str:
-                if init.models_dict[model]["no_per_unit"] is None:
+                if self.catalog.models_dict[model]["no_per_unit"] is None:
                     self.__models = [Model(self, model, self.size_range[0])]
                     break
+        self.__index_models()
 
         # check that the unit can be found in the base dictionary
         self.root_data
@@ -271,28 +364,44 @@ class Unit(BoardObj):
     def models(self): return self.__models
 
     @property
-    def size(self): return np.sum([i.size for i in self.models], dtype=int)
+    def model_groups(self): return MappingProxyType(self.__groups)
+
+    @property
+    def size(self): return sum(i.size for i in self.models)
 
     @BoardObj.name.setter
     def name(self, new_name):
         """Changes the name of the detachment to the given new_name string."""
         self._BoardObj__name = new_name
         self.__default_name = False
+        self._touch()
 
     @property
-    def root_data(self):
-        # catch any characters being added
-        try:
-            root_data = init.units_dict[self.battlefield_role][self.type]
-        except KeyError:
-            root_data = init.units_dict["Named Characters"][self.type]
-        return root_data
+    def version(self): return self.__version
+
+    def _touch(self):
+        """
+        Counts a change to the unit and passes it on to the detachment, and
+        to the army's journal as the unit's new state.
+        """
+        self.__version += 1
+        if self.parent is not None:
+            self.parent._touch()
+            self.parent._record("update_unit", self)
+        return
 
     @property
-    def pts(self):
-        """Updates any points values after changes to the unit"""
-        pts = super(Unit, self).pts
-        pts += np.sum([i.pts for i in self.models])
+    def root_data(self):
+        if self.__root_data is None:
+            # named characters are indexed under every battlefield role
+            self.__root_data = self.catalog.units_index[self.battlefield_role,
+                                                        self.type]
+        return self.__root_data
+
+    def _count_pts(self):
+        """Counts the points of the unit from its wargear and models."""
+        pts = super(Unit, self)._count_pts()
+        pts += sum(i.pts for i in self.models)
         return pts
 
     def reset(self):
@@ -300,52 +409,67 @@ class Unit(BoardObj):
         Returns the unit back to its initialised state. This may be useful if
         there are a lot of changes that need to be undone at once.
         """
-        self.__init__(self.type, self.battlefield_role)
+        pts, parent, version = self._BoardObj__pts, self.parent, self.__version
+        self.__init__(self.type, self.battlefield_role, self.catalog)
+        self._BoardObj__pts, self.parent, self.__version = pts, parent, version
+        self._wargear_changed()
+        self._refresh_pts()
         return
 
-    def get_all_wargear(self):
+    def _wargear_changed(self):
+        self.__all_wargear = None
+        self.__violations = None
+        self._touch()
+        return
+
+    def clone(self, parent=None):
         """
-        Returns a set containing all the wargear present across all models in
-        the unit.
+        Returns a copy of the unit and its models belonging to parent, much
+        faster than re-loading a save as the catalog data is shared.
         """
-        ret = set(copy.deepcopy(self.wargear))
-        for i in self.models:
-            if i.wargear is not None:
-                for j in i.wargear:
-                    ret.add(j)
+        ret = super().clone(parent)
+        ret.__default_name = self.__default_name
+        ret.__battlefield_role = self.__battlefield_role
+        ret.__root_data = self.__root_data
+        ret.__version = 0
+        ret.__text = None
+        ret.__all_wargear = self.__all_wargear  # read-only so can be shared
+        ret.__violations = None  # each names the unit breaking the rule
+        ret.__models = [i.clone(ret) for i in self.__models]
+        ret.__index_models()
         return ret
 
-    def check_validity(self):
+    def get_all_wargear(self):
         """
-        Checks that the unit is legal by looking at the size of the unit and
-        the number of each type of model
+        Returns a read-only multiset of the number of each wargear item across
+        all models in the unit, as a mapping of item name to count. Items
+        grouped in a MultipleItem are counted separately. The counts are kept
+        until the wargear or models of the unit change, so the mapping
+        returned should not be held on to across changes.
         """
-        # check sizes
-        size = self.size
-        valid = True
-        if size < self.size_range[0] or size > self.size_range[1]:
-            valid = False
-            print("{} has invalid size:\nsize range:{}-{}\tcurrent size:{}".format(self.name,
-                                                                                   *self.size_range,
-                                                                                   size))
-        # count instances of each model
-        count_dict = {}
-        for i in self.models:
-            if i.type in count_dict.keys():
-                count_dict[i.type] += i.size
-            else:
-                count_dict[i.type] = i.size
-
-        # check model has a sufficient number
-        for name, no_of in count_dict.items():
-            if init.models_dict[name]["no_per_unit"] is not None:
-                if init.models_dict[name]["no_per_unit"] < no_of:
-                    valid = False
-                    print("{} has too many of {}:\nmax allowed:{}\tcurrent amount:{}".format(self.name,
-                                                                                             name,
-                                                                                             init.models_dict[name]["no_per_unit"],
-                                                                                             no_of))
-        return valid
+        if self.__all_wargear is None:
+            counts = Counter()
+            for obj in [self] + self.models:
+                if obj.wargear is None:
+                    continue
+                for item in obj.wargear:
+                    parts = item.parts if isinstance(item, init.MultipleItem) else [item]
+                    for part in parts:
+                        counts[part.item] += part.no_of * obj.size
+            self.__all_wargear = MappingProxyType(counts)
+        return self.__all_wargear
+
+    @property
+    def violations(self):
+        if self.__violations is None:
+            self.__violations = validation.check_unit(self)
+        return self.__violations
+
+    def check_validity(self):
+        """Prints any rules the unit breaks, returns True if it is legal."""
+        for i in self.violations:
+            print(i)
+        return len(self.violations) == 0
 
     def re_size(self, *args):
         """
@@ -356,40 +480,80 @@ class Unit(BoardObj):
         if self.mod_str is None:
             self.models[0].size = args[0]
             return
-
         # validate corrrect number of args otherwise
-        elif len(args) != len(self.mod_str):
+        if len(args) != len(self.mod_str):
             raise TypeError("Got {} sizes for {} models".format(len(args),
                                                                 len(self.mod_str)))
+        self.re_size_models(dict(zip(self.mod_str, args)))
+        return
+
+    def re_size_models(self, sizes):
+        """
+        Re-sizes the unit from a dictionary of model type to the number of
+        that type of model, leaving any types not given unchanged. The points
+        are re-counted once for the whole change.
+        """
+        if self.mod_str is None:
+            allowed = [self.type]
+        else:
+            allowed = self.mod_str
+        for model in sizes:
+            if model not in allowed:
+                raise ValueError("{} is not a model in {}".format(model, self.type))
+
+        if self.mod_str is None:
+            # the default model has no catalog entry so is only re-sized
+            if sizes:
+                self.models[0]._set_size(sizes[self.type])
+                self._wargear_changed()
+                self._refresh_pts()
+            return
+
+        for model, no_of in sizes.items():
+            group = self.__groups.get(model, [])
+            if group:
+                indep = group[0].root_data["indep"]
+            else:
+                indep = self.catalog.models_dict[model]["indep"]
 
-        # check if the model is already in the list
-        for model, no_of in zip(self.mod_str, args):
-            if init.models_dict[model]["indep"]:
-                counter = 0
-                for i in self.models:
-                    # count how many instances of model and add difference
-                    if i.type == model:
-                        counter += 1
-                if no_of - counter < 0:
+            if indep:
+                # count how many instances of model and add difference
+                if no_of - len(group) < 0:
                     print("Unable to remove models as each is independant")
                     continue
-                else:
-                    for i in range(no_of - counter):
-                        self.__models.append(Model(self, model))
-
+                for i in range(no_of - len(group)):
+                    self.__add_model(Model(self, model))
+            elif not group:
+                if no_of != 0:
+                    self.__add_model(Model(self, model, no_of))
+            elif no_of == 0:
+                self.__remove_model(group[0])
             else:
-                # check to see if model exists already
-                flag = True
-                for i in self.__models:
-                    if i.type == model:
-                        i.size = no_of
-                        if no_of == 0:
-                            self.__models.remove(i)
-                        flag = False
-                        break
-                # otherwise append to models list
-                if flag and no_of != 0:
-                    self.__models.append(Model(self, model, no_of))
+                group[0]._set_size(no_of)
+        self._wargear_changed()
+        self._refresh_pts()
+        return
+
+    def __index_models(self):
+        """Groups the models by type after the models list is replaced."""
+        self.__groups = {}
+        for i in self.__models:
+            self.__groups.setdefault(i.type, []).append(i)
+        return
+
+    def __add_model(self, model):
+        self.__models.append(model)
+        self.__groups.setdefault(model.type, []).append(model)
+        return
+
+    def __remove_model(self, model):
+        for models in [self.__models, self.__groups[model.type]]:
+            for index, i in enumerate(models):
+                if i is model:
+                    del models[index]
+                    break
+        if not self.__groups[model.type]:
+            del self.__groups[model.type]
         return
 
     def save(self):
@@ -409,17 +573,19 @@ class Unit(BoardObj):
 
     def load(self, loaded_dict):
         """Loads the unit from a pre-made dictionary."""
+        self.__root_data = None
         self.__type = loaded_dict["type"]
         if loaded_dict["wargear"] is None:
             self.__wargear = None
         else:
-            self.__wargear = list(map(lambda x: init.MultipleItem(x.split('+')) if '+' in x else init.WargearItem(x),
-                                      loaded_dict["wargear"]))
+            self.__wargear = [init.load_wargear(i, self.catalog)
+                              for i in loaded_dict["wargear"]]
 
         try:
             # first condition will raise KeyError for models
             if loaded_dict["models"] is not None:
                 self.__models = [Model(self, i) for i in loaded_dict["models"]]
+                self.__index_models()
             if loaded_dict["name"] is None:
                 self.__name = self.type
             else:
@@ -428,8 +594,16 @@ class Unit(BoardObj):
 
         except KeyError:
             pass
+        self._wargear_changed()
+        self._refresh_pts()
 
     def __repr__(self):
+        if self.__text is None or self.__text[0] != self.__version:
+            self.__text = (self.__version, self.__render())
+        return self.__text[1]
+
+    def __render(self):
+        """Builds the text of the unit for __repr__()."""
         ret = self.name + '\t({}pts)'.format(self.pts)
         if self.mod_str is None:
             size = self.size
@@ -465,18 +639,19 @@ class Model(BoardObj):
 
     Parameters
     ----------
-    type : str
-        Type of model to be initialised.
+    type : str (default=None)
+        Type of model to be initialised. If None the model is the single type
+        of model in a unit with no models in Units.json, taking its data from
+        the catalog's default_models.
     no_models : int (default=1)
         Number of that type of model.
-    base_pts : int
-        Points value per model. Only used when a unit has all models of the same
-        type.
 
     Public Attributes
     -----------------
     parent: Unit
         Unit to which the model belongs.
+    catalog : init.FactionCatalog
+        Catalog of the unit to which the model belongs.
     treeid: wx.TreeItemID
         ID for wx.TreeCtrl in GUI
     size : int
@@ -499,34 +674,58 @@ class Model(BoardObj):
     size: int
         Number of models of this type.
     """
+    __slots__ = ("__size", "__default")
 
-    def __init__(self, parent, type=None, no_models=1, base_pts=None):
-        self.size = no_models
+    def __init__(self, parent, type=None, no_models=1):
+        self.__size = no_models
+        self.__default = type is None
         if type is None:
-            # add default model to the models_dict
-            init.models_dict[parent.type] = {"name": None,
-                                             "no_per_unit": None,
-                                             "wargear": None,
-                                             "options": None,
-                                             "indep": False,
-                                             "pts": base_pts}
-            super().__init__(parent.type)
+            super().__init__(parent.type, parent.catalog)
         else:
-            super().__init__(type)
+            super().__init__(type, parent.catalog)
             if isinstance(type, dict):  # for loading
-                self.size = type["size"]
+                self.__size = type["size"]
 
+        self.parent = parent
         self._BoardObj__name = self.type
         return
 
     @property
-    def root_data(self): return init.models_dict[self.type]
+    def root_data(self):
+        if self.__default:
+            return self.catalog.default_models[self.type]
+        return self.catalog.models_dict[self.type]
 
     @property
     def limit(self): return self.root_data["no_per_unit"]
 
     @property
-    def pts(self): return super(Model, self).pts + self.size*self.root_data["pts"]
+    def size(self): return self.__size
+
+    @size.setter
+    def size(self, size):
+        self.__size = size
+        self._wargear_changed()
+        self._refresh_pts()
+
+    def _set_size(self, size):
+        """Sets the size for a Unit re-size, which updates the unit itself."""
+        self.__size = size
+        self._refresh_pts(notify=False)
+        return
+
+    def _wargear_changed(self):
+        self.parent._wargear_changed()
+        return
+
+    def clone(self, parent=None):
+        ret = super().clone(parent)
+        ret.__size = self.__size
+        ret.__default = self.__default
+        return ret
+
+    def _count_pts(self):
+        return super(Model, self)._count_pts() + self.size*self.root_data["pts"]
 
     def __repr__(self, indent=''):
         if self.size == 1:
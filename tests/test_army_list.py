@@ -1,3 +1,10 @@
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+
 import pytest
 
 import army_list
@@ -68,24 +75,69 @@ def test_auto_naming():
     for i in range(len(army.detachments)):
         assert army.detachments[i].name == "Patrol {}".format(i + 1)
     assert army.detachment_names == ['Patrol 1', 'Patrol 2', 'Patrol 3']
+    army.detachment_names.append("Patrol 4")
+    assert army.detachment_names == ['Patrol 1', 'Patrol 2', 'Patrol 3']
+    return
+
+
+def test_detachment_registry(tmp_path):
+    """Checks detachments are found by name through adds, deletes and renames."""
+    army = army_list.ArmyList("Necron")
+    patrols = [army_list.Detachment("Patrol") for i in range(3)]
+    battalion = army_list.Detachment("Battalion")
+    for detach in patrols[:2] + [battalion] + patrols[2:]:
+        army.add_detachment(detach)
+    assert army.detachment_names == ["Patrol 1", "Patrol 2", "Battalion 1", "Patrol 3"]
+    assert army.detachments == patrols[:2] + [battalion] + patrols[2:]
+    assert army.get_detachment("Patrol 2") is patrols[1]
+
+    # numbers aren't re-used and names in use are skipped
+    army.del_detachment("Patrol 3")
+    patrols[0].name = "Patrol 4"
+    assert army.get_detachment("Patrol 4") is patrols[0]
+    with pytest.raises(ValueError):
+        army.get_detachment("Patrol 1")
+    detach = army_list.Detachment("Patrol")
+    army.add_detachment(detach)
+    assert detach.name == "Patrol 5"
+    assert army.detachment_names == ["Patrol 4", "Patrol 2", "Battalion 1", "Patrol 5"]
+    assert patrols[2].parent is None
+
+    # the first detachment added wins when names are shared
+    battalion.name = "Dynasty"
+    patrols[1].name = "Dynasty"
+    assert army.get_detachment("Dynasty") is battalion
+    army.del_detachment("Dynasty")
+    assert army.get_detachment("Dynasty") is patrols[1]
+    assert army.detachments == [patrols[0], patrols[1], detach]
+    with pytest.raises(ValueError):
+        army.del_detachment("Battalion 1")
+
+    # loading starts the numbering again
+    army.save(str(tmp_path / "registry.army"))
+    loaded = army_list.ArmyList(str(tmp_path / "registry.army"), True)
+    assert loaded.detachment_names == ["Patrol 4", "Dynasty", "Patrol 1"]
+    loaded.add_detachment(army_list.Detachment("Patrol"))
+    assert loaded.detachment_names[-1] == "Patrol 2"
     return
 
 
-def test_save_army(detach):
+def test_save_army(detach, tmp_path):
     """Tests the army can be saved to a file."""
     army = army_list.ArmyList("Necron")
     army.add_detachment(detach)
-    save = army.save("./tests/test_army.army")
+    save = army.save(str(tmp_path / "test_army.army"))
     assert save == {"faction": "Necron",
                     "detachments": [i.save() for i in army.detachments]}
     return
 
 
-def test_load_army(detach):
+def test_load_army(detach, tmp_path):
     """Tests the army can be loaded from the file correctly."""
-    army1 = army_list.ArmyList("./tests/test_army.army", True)
     army2 = army_list.ArmyList("Necron")
     army2.add_detachment(detach)
+    army2.save(str(tmp_path / "test_army.army"))
+    army1 = army_list.ArmyList(str(tmp_path / "test_army.army"), True)
     for detachment in army1.detachments:
         assert detachment.parent == army1
     assert army1.faction == army2.faction
@@ -140,3 +192,266 @@ def test_load_detachment(detach):
                               "Dedicated Transports": []}}
     detach2 = army_list.Detachment(load)
     assert detach == detach2
+
+
+def test_army_catalog():
+    """Checks detachments resolve their data through their own catalog."""
+    tau = init.get_catalog("Tau")
+    army = army_list.ArmyList("Tau")
+    assert army.catalog is tau
+
+    detach = army_list.Detachment("Patrol", army.catalog)
+    detach.add_unit(squad.Unit("Strike Team", "Troops", army.catalog))
+    army.add_detachment(detach)
+    assert detach.catalog is tau
+    assert army.pts == squad.Unit("Strike Team", "Troops", tau).pts
+    return
+
+
+def test_incremental_pts(tmp_path, detach):
+    """
+    Checks the cached points totals follow every kind of edit by comparing
+    them against a fresh copy of the army loaded from a save.
+    """
+    rng = random.Random(0)
+    army = army_list.ArmyList("Necron")
+    army.add_detachment(detach)
+    path = str(tmp_path / "army.army")
+
+    def check():
+        army.save(path)
+        fresh = army_list.ArmyList(path, True)
+        assert army.pts == fresh.pts
+        for old, new in zip(army.detachments, fresh.detachments):
+            assert old.pts == new.pts
+            for role, units in old.units_dict.items():
+                assert [i.pts for i in units] == [i.pts for i in new.units_dict[role]]
+
+    check()
+    for n in range(60):
+        detach = rng.choice(army.detachments)
+        units = [i for role in detach.units_dict.values() for i in role]
+        unit = rng.choice(units)
+        edit = rng.randrange(6)
+        if edit == 0:
+            detach.add_unit(squad.Unit("Immortals", "Troops"))
+        elif edit == 1 and len(units) > 1:
+            detach.del_unit(unit)
+        elif edit == 2:
+            if unit.mod_str is None:
+                unit.re_size(rng.randint(unit.size_range[0], unit.size_range[-1]))
+            else:
+                unit.re_size(*[rng.randint(0, 3) for i in unit.mod_str])
+        elif edit == 3 and unit.options is not None:
+            option = rng.choice(unit.options)
+            option.select(rng.randrange(len(option.items_involved)))
+            unit.change_wargear([option])
+        elif edit == 4:
+            unit.reset()
+        elif edit == 5:
+            if len(army.detachments) > 1 and rng.random() < 0.5:
+                army.del_detachment(army.detachments[0].name)
+            else:
+                new = army_list.Detachment("Patrol")
+                new.add_unit(squad.Unit("Overlord", "HQ"))
+                army.add_detachment(new)
+        check()
+
+    # units removed from a detachment no longer change its points
+    unit = squad.Unit("Necron Warriors", "Troops")
+    detach.add_unit(unit)
+    detach.del_unit(unit)
+    pts = army.pts
+    unit.re_size(20)
+    assert unit.parent is None
+    assert army.pts == pts
+    check()
+    return
+
+
+def test_clone_detachment(detach):
+    """Checks a cloned detachment is independent and named in the army."""
+    army = army_list.ArmyList("Necron")
+    army.add_detachment(detach)
+    clone = detach.clone()
+    assert clone.parent is None
+    assert clone.save() == detach.save()
+    assert clone.pts == detach.pts
+
+    army.add_detachment(clone)
+    assert army.detachment_names == ["Patrol 1", "Patrol 2"]
+    assert army.pts == 2*detach.pts
+    for units in clone.units_dict.values():
+        assert all(i.parent is clone for i in units)
+
+    pts = detach.pts
+    clone.del_unit(clone.units_dict["HQ"][0])
+    clone.units_dict["Troops"][0].re_size(20)
+    assert detach.pts == pts and len(detach.units_dict["HQ"]) == 1
+    assert army.pts == pts + clone.pts
+    assert clone.pts == army_list.Detachment(clone.save()).pts
+    return
+
+
+def test_violations(detach):
+    """
+    Checks the army reports force organisation and unit violations and only
+    re-checks the units that change.
+    """
+    army = army_list.ArmyList("Necron")
+    army.add_detachment(detach)
+    assert army.violations == []
+
+    destroyers = detach.units_dict["Fast Attack"][0]
+    warriors = detach.units_dict["Troops"][0]
+    checked = warriors.violations
+    destroyers.re_size(2, 2)
+    detach.del_unit(detach.units_dict["HQ"][0])
+    violations = army.violations
+    assert [(i.rule, i.source, i.subject) for i in violations] == [
+        ("foc_slots", detach, "HQ"), ("model_limit", destroyers, "Heavy Destroyer")]
+    assert violations[0].value == 0 and violations[0].allowed == (1, 2)
+    assert warriors.violations is checked
+
+    for i in range(3):
+        detach.add_unit(squad.Unit("Overlord", "HQ"))
+    destroyers.re_size(2, 1)
+    assert [(i.rule, i.value) for i in army.violations] == [("foc_slots", 3)]
+
+    clone = detach.clone()
+    assert [i.source for i in clone.violations] == [clone]
+    return
+
+
+def test_render_cache(tmp_path, detach):
+    """
+    Checks the cached text of the army follows every kind of edit by
+    comparing it against the text of a fresh copy loaded from a save.
+    """
+    army = army_list.ArmyList("Necron")
+    army.add_detachment(detach)
+    path = str(tmp_path / "army.army")
+    destroyers = detach.units_dict["Fast Attack"][0]
+    overlord = detach.units_dict["HQ"][0]
+
+    def check():
+        army.save(path)
+        fresh = army_list.ArmyList(path, True)
+        text = repr(army)
+        assert text == repr(fresh)
+        assert repr(army) is text  # cached until the next change
+        buffer = io.StringIO()
+        army.write(buffer)
+        assert buffer.getvalue() == text
+
+    edits = [lambda: destroyers.re_size(3, 1),
+             lambda: destroyers.models[1].change_wargear(
+                 [init.WargearItem("Gauss cannon")]),
+             lambda: setattr(overlord, "name", "Zahndrekh"),
+             lambda: setattr(detach, "name", "Dynasty"),
+             lambda: detach.add_unit(squad.Unit("Immortals", "Troops")),
+             lambda: detach.del_unit(detach.units_dict["Troops"][0]),
+             lambda: overlord.reset(),
+             lambda: army.add_detachment(detach.clone()),
+             lambda: army.del_detachment("Dynasty")]
+    check()
+    start = detach.version
+    for edit in edits:
+        version = army.version
+        edit()
+        assert army.version > version
+        check()
+    assert detach.version > start
+
+    unit_text = repr(destroyers)
+    detach.units_dict["Troops"][0].re_size(15)
+    assert repr(destroyers) is unit_text
+    return
+
+
+def test_iter_load(monkeypatch, detach):
+    """Checks armies load a detachment at a time from a file object."""
+    monkeypatch.setattr(army_list, "CHUNK_SIZE", 5)
+    army = army_list.ArmyList("Necron")
+    army.add_detachment(detach)
+    army.add_detachment(army_list.Detachment("Spearhead"))
+    army.detachments[1].add_unit(squad.Unit("Annihilation Barge", "Heavy Support"))
+    text = json.dumps(army.save(), indent=4)
+
+    loaded = army_list.ArmyList(None)
+    detachments = loaded.iter_load(io.StringIO(text))
+    first = next(detachments)
+    assert loaded.faction == "Necron" and loaded.detachments == [first]
+    assert first.parent is loaded and first.save() == detach.save()
+    assert list(detachments) == loaded.detachments[1:]
+    assert loaded.save() == army.save()
+    assert loaded.pts == army.pts and repr(loaded) == repr(army)
+
+    # key order and spacing do not matter
+    save = army.save()
+    text = json.dumps({"detachments": save["detachments"], "faction": "Necron"},
+                      separators=(',', ':'))
+    loaded = army_list.ArmyList(None)
+    assert len(list(loaded.iter_load(io.StringIO(text)))) == 2
+    assert loaded.save() == save
+
+    for text in ['{"faction": "Necron", "detachments": [', '[]',
+                 '{"detachments": []]}']:
+        with pytest.raises(ValueError):
+            list(army_list.ArmyList(None).iter_load(io.StringIO(text)))
+    return
+
+
+def test_bundle(tmp_path):
+    """Checks bundles of armies are written and read back a line at a time."""
+    from benchmarks.corpus import random_corpus
+
+    armies = random_corpus("Necron", 5, pts_target=500)
+    path = tmp_path / "bundle.jsonl"
+    with open(path, 'w') as file:
+        army_list.write_bundle(armies, file)
+    assert len(path.read_text().splitlines()) == 5
+
+    with open(path) as file:
+        bundle = army_list.iter_bundle(file)
+        first = next(bundle)
+        assert first.save() == armies[0].save()
+        loaded = [first] + list(bundle)
+    assert [i.save() for i in loaded] == [i.save() for i in armies]
+    assert [i.pts for i in loaded] == [i.pts for i in armies]
+    return
+
+
+def test_saved_int_types(tmp_path, detach):
+    """
+    Checks points, sizes and command points are plain ints and that the
+    saved json holds the same ints, without the core modules using numpy.
+    """
+    army = army_list.ArmyList("Necron")
+    army.add_detachment(detach)
+    unit = detach.units_dict["Fast Attack"][0]
+    unit.re_size(*[int(i) for i in "21"])  # as the GUI and CLI pass sizes
+    for value in [army.pts, army.cp, detach.pts, unit.pts, unit.size]:
+        assert type(value) is int
+
+    def walk(obj):
+        if isinstance(obj, dict):
+            obj = list(obj.values())
+        if isinstance(obj, list):
+            for i in obj:
+                yield from walk(i)
+        else:
+            yield obj
+
+    save = army.save(str(tmp_path / "army.army"))
+    with open(str(tmp_path / "army.army")) as file:
+        loaded = json.load(file)
+    assert loaded == save
+    sizes = [i for i in walk(save) if not isinstance(i, (str, type(None)))]
+    assert sizes and all(type(i) is int for i in sizes)
+
+    code = ("import sys, army_list, squad, init, option_parser\n"
+            "assert 'numpy' not in sys.modules\n")
+    env = dict(os.environ, PYTHONPATH=os.getcwd())
+    subprocess.check_call([sys.executable, "-c", code], env=env)
+    return
@@ -0,0 +1,124 @@
+import json
+
+import pytest
+
+import army_list
+import armyb
+import init
+import squad
+from benchmarks.corpus import random_corpus
+
+init.init("Necron")
+
+
+def test_round_trip(tmp_path):
+    """Checks armies convert between json and .armyb without loss."""
+    armies = random_corpus("Necron", 10) + random_corpus("Tau", 10)
+    for army in armies:
+        save = army.save()
+        data = armyb.dumps(save)
+        assert armyb.loads(data) == save
+        assert json.dumps(armyb.loads(data), indent=4) == json.dumps(save, indent=4)
+        assert len(data) < len(json.dumps(save)) / 5
+
+    # names, numbers of items and items grouped together
+    army = army_list.ArmyList("Necron")
+    detach = army_list.Detachment("Patrol")
+    army.add_detachment(detach)
+    detach.name = "Sautekh Dynasty"
+    lychguard = squad.Unit("Lychguard", "Elites")
+    option = lychguard.options[0]
+    option.select(1)
+    lychguard.change_wargear([option])
+    lychguard.name = "Guard élite"
+    detach.add_unit(lychguard)
+    destroyers = squad.Unit("Destroyers", "Fast Attack")
+    destroyers.re_size(2, 1)
+    destroyers.models[0].change_wargear([init.WargearItem("2*Gauss cannon")])
+    detach.add_unit(destroyers)
+    save = army.save()
+    assert armyb.loads(armyb.dumps(save)) == save
+    for wargear in ["1*Hyperphase sword+Dispersion shield", "0*Hyperphase sword"]:
+        save["detachments"][0]["units"]["Elites"][0]["wargear"] = [wargear]
+        assert armyb.loads(armyb.dumps(save)) == save
+
+    path = tmp_path / "army.armyb"
+    army.save(path)
+    assert path.read_bytes() == armyb.dumps(army.save())
+    loaded = army_list.ArmyList(str(path), True)
+    assert loaded.save() == army.save() and loaded.pts == army.pts
+    return
+
+
+def test_errors():
+    """Checks damaged files, unknown versions and unknown wargear are rejected."""
+    army = random_corpus("Necron", 1)[0]
+    data = armyb.dumps(army.save())
+    for bad in [b"{}", data[:-3], data + b"\0"]:
+        with pytest.raises(ValueError):
+            armyb.loads(bad)
+
+    version = data.replace(b"ARMYB\x01", b"ARMYB\x09", 1)
+    with pytest.raises(ValueError, match="version"):
+        armyb.loads(version)
+
+    save = army.save()
+    save["detachments"][0]["units"]["HQ"][0]["wargear"] = ["Not a weapon"]
+    with pytest.raises(KeyError):
+        armyb.dumps(save)
+    return
+
+
+def test_stable_ids(tmp_path, monkeypatch):
+    """Checks files still load after names are added to the catalog."""
+    ids_path = str(tmp_path / "Ids.json")
+    monkeypatch.setattr(armyb, "_ids_path", lambda faction: ids_path)
+    catalog_names = armyb._catalog_names
+    new = "Annihilation Barge"  # first by name so sorting would renumber all
+
+    def clear():
+        for cache in ["_tables", "_hashes"]:
+            monkeypatch.setattr(armyb, cache, {})
+
+    # a catalog before the unit was added
+    monkeypatch.setattr(armyb, "_catalog_names", lambda catalog: {
+        kind: value - {new} for kind, value in catalog_names(catalog).items()})
+    clear()
+    assert armyb.update_ids("Necron") > 0
+    army = army_list.ArmyList("Necron")
+    detach = army_list.Detachment("Spearhead")
+    army.add_detachment(detach)
+    detach.add_unit(squad.Unit("Destroyers", "Fast Attack"))
+    detach.add_unit(squad.Unit("Doomsday Ark", "Heavy Support"))
+    old = armyb.dumps(army.save())
+    old_names = armyb.catalog_tables(init.get_catalog("Necron"))[0]
+
+    # the unit is added, given the next ID without saving it first
+    monkeypatch.setattr(armyb, "_catalog_names", catalog_names)
+    clear()
+    with pytest.warns(UserWarning, match="python -m armyb Necron"):
+        names = armyb.catalog_tables(init.get_catalog("Necron"))[0]
+    assert names["units"] == old_names["units"] + [new]
+    assert armyb.loads(old) == army.save()
+    assert armyb.update_ids("Necron") == 1 and armyb.update_ids("Necron") == 0
+    clear()
+    assert armyb.catalog_tables(init.get_catalog("Necron"))[0] == names
+    assert armyb.loads(old) == army.save()
+    detach.add_unit(squad.Unit(new, "Heavy Support"))
+    current = armyb.dumps(army.save())
+    assert armyb.loads(current) == army.save()
+
+    # tables that were re-ordered rather than added to, or are behind the file
+    with open(ids_path, 'w') as file:
+        json.dump({kind: sorted(value) for kind, value in names.items()}, file)
+    clear()
+    with pytest.raises(ValueError, match="different Necron catalog"):
+        armyb.loads(old)
+    with open(ids_path, 'w') as file:
+        json.dump(old_names, file)
+    monkeypatch.setattr(armyb, "_catalog_names", lambda catalog: {
+        kind: value - {new} for kind, value in catalog_names(catalog).items()})
+    clear()
+    with pytest.raises(ValueError, match="newer Necron catalog"):
+        armyb.loads(current)
+    return
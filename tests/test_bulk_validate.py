@@ -0,0 +1,77 @@
+import io
+import json
+
+import army_list
+import bulk_validate
+import init
+from benchmarks.corpus import random_corpus
+
+init.init("Necron")
+
+
+def strip_times(results):
+    return [{key: value for key, value in i.items() if not key.endswith("_ms")}
+            for i in results]
+
+
+def test_bulk_validate(tmp_path):
+    """Checks directories and bundles give the same results in and out of a pool."""
+    armies = random_corpus("Necron", 6) + random_corpus("Tau", 4)
+    folder = tmp_path / "armies"
+    folder.mkdir()
+    for index, army in enumerate(armies):
+        army.save(str(folder / "{:02}.army".format(index)))
+    armies[0].save(str(folder / "10.armyb"))
+    (folder / "notes.txt").write_text("not an army")
+    (folder / "11.army").write_text('{"detachments": []')
+    bundle = tmp_path / "bundle.jsonl"
+    with open(bundle, 'w') as file:
+        army_list.write_bundle(armies, file)
+
+    out = io.StringIO()
+    checked, failed = bulk_validate.run([str(folder), str(bundle)], out, 1)
+    results = [json.loads(i) for i in out.getvalue().splitlines()]
+    assert checked == len(results) == 2*len(armies) + 2
+    assert failed == sum(not i.get("valid", False) for i in results)
+
+    # files in name order then the lines of the bundle
+    sources = [i["source"] for i in results]
+    assert sources[:12] == [str(folder / "{:02}.army".format(i)) for i in range(10)] \
+        + [str(folder / "10.armyb"), str(folder / "11.army")]
+    assert sources[12:] == ["{}:{}".format(bundle, i) for i in range(1, 11)]
+
+    for army, result, line in zip(armies, results, results[12:]):
+        violations = army.violations
+        assert result["faction"] == line["faction"] == army.faction
+        assert result["pts"] == line["pts"] == army.pts
+        assert result["valid"] == (len(violations) == 0)
+        assert result["violations"] == line["violations"] == \
+            [bulk_validate.violation_dict(i) for i in violations]
+        assert result["load_ms"] >= 0 and result["check_ms"] >= 0
+    armyb_result, json_result = strip_times([results[10], results[0]])
+    assert armyb_result.pop("source") != json_result.pop("source")
+    assert armyb_result == json_result
+    assert "error" in results[11] and "valid" not in results[11]
+
+    # errors while loading or validating an army are its result
+    save = armies[0].save()
+    unit = next(units for units in save["detachments"][0]["units"].values() if units)[0]
+    unit["size"] = "x"
+    for line in ["[]", json.dumps(save)]:
+        result = bulk_validate.check_army(("bad", None, line))
+        assert "error" in result and "valid" not in result
+
+    # the same results from a pool of workers
+    out = io.StringIO()
+    assert bulk_validate.run([str(folder), str(bundle)], out, 2, ["Necron", "Tau"]) \
+        == (checked, failed)
+    assert strip_times(json.loads(i) for i in out.getvalue().splitlines()) \
+        == strip_times(results)
+
+    # exit status
+    valid = str(tmp_path / "empty.army")
+    army_list.ArmyList("Necron").save(valid)
+    output = tmp_path / "results.jsonl"
+    assert bulk_validate.main([valid, "-j", "1", "-o", str(output)]) == 0
+    assert json.loads(output.read_text())["source"] == valid
+    assert bulk_validate.main([str(folder), "-j", "1", "-o", str(output)]) == 1
@@ -3,6 +3,11 @@ import option_parser
 
 import pytest
 import json
+import os
+import pickle
+import subprocess
+import sys
+import warnings
 
 
 def test_units_dict():
@@ -99,3 +104,116 @@ def test_save_MultiplItem():
     item = init.MultipleItem(*item_labels)
     assert item.save() ==  "Hyperphase sword+Dispersion shield"
     return
+
+def test_load_catalog(tmp_path):
+    """Checks the compiled catalog cache is written, re-used and rebuilt."""
+    cache_path = str(tmp_path / "catalog.cache")
+    cold = init.load_catalog("Necron", cache_path)
+    warm = init.load_catalog("Necron", cache_path)
+    assert cold["hash"] == init.catalog_hash("Necron")
+    assert warm["units"] == cold["units"]
+    assert warm["wargear_index"]["Gauss blaster"] == ("Range", 9)
+    assert ("Gauss blaster/Tesla carbine",) in warm["options"]
+
+    # a cache built from different sources is rebuilt
+    warm["hash"] = "stale"
+    warm["units"] = {}
+    init._write_cache(warm, cache_path)
+    rebuilt = init.load_catalog("Necron", cache_path)
+    assert rebuilt["units"] == cold["units"]
+
+    # reading the cache doesn't import the parser or the process pool
+    assert type(warm["options"][("Gauss blaster/Tesla carbine",)][0]) is init.OptionNode
+    code = ("import sys, init\n"
+            "init.load_catalog('Necron', {!r})\n"
+            "assert 'option_parser' not in sys.modules\n"
+            "assert 'concurrent.futures' not in sys.modules\n".format(cache_path))
+    env = dict(os.environ, PYTHONPATH=os.getcwd())
+    subprocess.check_call([sys.executable, "-c", code], env=env)
+    return
+
+def test_wargear_index():
+    """Checks the flat wargear index and reporting of duplicate names."""
+    with pytest.warns(UserWarning, match="Kroot rifle.*using Range"):
+        init.compile_catalog("Tau")
+    init.catalogs.pop("Tau", None)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")  # only reported when compiled
+        init.init("Tau")
+    assert init.wargear_index["Kroot rifle"] == ("Range", 0)
+    assert init.WargearItem("Kroot rifle").type == "Range"
+    item = init.WargearItem("2*Smart missile system")
+    assert item.type == init.wargear_index["Smart missile system"][0]
+    assert item.pts == 2*init.wargear_index["Smart missile system"][1]
+
+    init.init("Necron")
+    with pytest.raises(KeyError):
+        init.WargearItem("Kroot rifle")
+    return
+
+def test_WargearDef():
+    """Checks wargear definitions are interned, immutable and shared."""
+    init.init("Necron")
+    item1 = init.WargearItem("Gauss blaster")
+    item2 = init.WargearItem("3*Gauss blaster")
+    assert item1.definition is item2.definition
+    assert item2.pts == 3*item1.pts
+    with pytest.raises(AttributeError):
+        item1.definition.pts = 0
+
+    # copies are re-interned rather than duplicating the definition
+    item3 = pickle.loads(pickle.dumps(item2))
+    assert item3.definition is item1.definition
+    assert item3.no_of == 3
+
+    combined = init.MultipleItem("2*Hyperphase sword+Dispersion shield")
+    assert combined.parts[1].definition is init.wargear_def("Dispersion shield")
+    assert combined.save() == "2*Hyperphase sword+Dispersion shield"
+    return
+
+
+def test_FactionCatalog():
+    """Checks several faction catalogs can be used side by side."""
+    init.init("Necron")
+    tau = init.get_catalog("Tau")
+    necron = init.get_catalog("Necron")
+    assert init.get_catalog("Tau") is tau
+    assert init.current_catalog is necron
+
+    item = init.WargearItem("Fusion blaster", tau)
+    assert item.definition is tau.wargear_def("Fusion blaster")
+    with pytest.raises(KeyError):
+        init.WargearItem("Fusion blaster")
+
+    # catalogs are pickled by reference to the registry
+    assert pickle.loads(pickle.dumps(tau)) is tau
+    assert pickle.loads(pickle.dumps(item)).definition is item.definition
+    return
+
+def test_preparse(monkeypatch):
+    """
+    Checks options parsed across a process pool match a serial parse and that
+    errors in the options are reported when pre-parsing at load time.
+    """
+    serial = init.compile_catalog("Tau")
+    monkeypatch.setattr(init, "POOL_MIN_OPTIONS", 0)
+    pooled = init.compile_catalog("Tau", processes=2)
+    assert pooled["options"] == serial["options"]
+    assert pooled["option_errors"] == serial["option_errors"]
+    assert serial["option_errors"] == [(("Breacher Shas'el",),
+                                        "Target Lock not found in Armoury.json file")]
+
+    # syntax errors reported by the parser are collected
+    catalog = init.get_catalog("Necron")
+    trees, errors = init._preparse(("Gauss blaster/", "Gauss blaster"), catalog)
+    assert trees[1] == "Gauss blaster"
+    assert errors == ["Syntax error None is not valid"]
+    trees, errors = init._preparse(("2*Gauss cannon+Gauss flayer",), catalog)
+    assert trees is None
+    assert errors == ["TypeError: Multiplication of MultiplItem types not yet defined"]
+
+    with pytest.warns(UserWarning, match="Options of Breacher Shas'el: Target Lock"):
+        init.init("Tau", use_cache=False, preparse=True, processes=2)
+    assert init.current_catalog.parsed_options == serial["options"]
+    init.init("Necron")
+    return
@@ -0,0 +1,140 @@
+import os
+import random
+import shutil
+
+import pytest
+
+import army_list
+import init
+import journal
+import squad
+from benchmarks.corpus import random_corpus
+
+init.init("Necron")
+
+
+def random_edit(army, rng):
+    """Makes a random edit of any kind that the journal records."""
+    detach = rng.choice(army.detachments)
+    units = [i for role in detach.units_dict.values() for i in role]
+    unit = rng.choice(units)
+    edit = rng.randrange(8)
+    if edit == 0:
+        detach.add_unit(squad.Unit("Immortals", "Troops"))
+    elif edit == 1 and len(units) > 1:
+        detach.del_unit(unit)
+    elif edit == 2:
+        if unit.mod_str is None:
+            unit.re_size(rng.randint(unit.size_range[0], unit.size_range[-1]))
+        else:
+            unit.re_size(*[rng.randint(0, 3) for i in unit.mod_str])
+    elif edit == 3 and unit.options is not None:
+        option = rng.choice(unit.options)
+        option.select_list([rng.randrange(len(option.items_involved))])
+        unit.change_wargear([option])
+    elif edit == 4:
+        unit.name = "Unit {}".format(rng.randrange(100))
+    elif edit == 5:
+        detach.name = "Detachment {}".format(rng.randrange(100))
+    elif edit == 6:
+        unit.reset()
+    elif len(army.detachments) > 1 and rng.random() < 0.5:
+        army.del_detachment(rng.choice(army.detachments))
+    else:
+        new = army_list.Detachment("Patrol")
+        new.add_unit(squad.Unit("Overlord", "HQ"))
+        army.add_detachment(new)
+    return
+
+
+@pytest.mark.parametrize("name", ["army.army", "army.armyb"])
+def test_journal(tmp_path, name):
+    """Checks the journal recovers every edit as if the program had crashed."""
+    rng = random.Random(0)
+    path = str(tmp_path / name)
+    army = random_corpus("Necron", 1)[0]
+    journal.Journal(army, path, compact_every=None)
+    assert journal.recover(path).save() == army.save()
+
+    for n in range(60):
+        random_edit(army, rng)
+        assert journal.recover(path).save() == army.save()
+    assert army.journal.pending > 0
+    size = os.path.getsize(journal.journal_path(path))
+
+    # compacting leaves an empty journal on a new snapshot
+    army.journal.compact(wait=True)
+    assert army.journal.pending == 0
+    assert os.path.getsize(journal.journal_path(path)) < size / 10
+    assert not os.path.exists(journal.journal_path(path) + ".old")
+    assert army_list.ArmyList(path, True).save() == army.save()
+
+    # compacted automatically in the background
+    army.journal.compact_every = 7
+    for n in range(30):
+        random_edit(army, rng)
+    army.journal.wait()
+    assert army.journal.pending == 30 % 7
+    assert journal.recover(path).save() == army.save()
+
+    army.journal.close()
+    assert army.journal is None
+    army.detachments[0].add_unit(squad.Unit("Immortals", "Troops"))  # not journalled
+    assert journal.recover(path).save() != army.save()
+    return
+
+
+def test_crash_recovery(tmp_path):
+    """Checks an army is recovered wherever a compaction was stopped."""
+    rng = random.Random(1)
+    path = str(tmp_path / "army.army")
+    old_path = journal.journal_path(path) + ".old"
+    army = random_corpus("Necron", 1)[0]
+    journal.Journal(army, path, compact_every=None)
+    for n in range(10):
+        random_edit(army, rng)
+    first = tmp_path / "first"
+    first.mkdir()
+    for i in [path, journal.journal_path(path)]:
+        shutil.copy(i, first)
+    compacted = army.save()
+
+    army.journal.compact(wait=True)
+    for n in range(10):
+        random_edit(army, rng)
+    saved = army.save()
+
+    def restore(snapshot, old):
+        # files as they were when compaction was stopped
+        if snapshot is not None:
+            shutil.copy(snapshot, path)
+        shutil.copy(first / "army.army.journal", old)
+        return journal.recover(path).save()
+
+    # journal moved, before the new journal was started
+    os.rename(journal.journal_path(path), tmp_path / "second")
+    assert restore(first / "army.army", old_path) == compacted
+    os.rename(tmp_path / "second", journal.journal_path(path))
+    # new journal started, before the snapshot was written
+    assert restore(first / "army.army", old_path) == saved
+    # snapshot written, before the old journal was deleted
+    army.journal.compact(wait=True)
+    army.journal.close()
+    with open(journal.journal_path(path), 'a') as file:
+        file.write('{"op": "add_unit", "detachm')  # cut short by a crash
+    assert restore(None, old_path) == saved
+
+    # a journal starting a new army replaces what it finds
+    recovered = journal.open_army(path)
+    assert recovered.save() == saved
+    assert not os.path.exists(old_path)
+    recovered.journal.close()
+
+    # the army saved over without the journal
+    with open(journal.journal_path(path), 'a') as file:
+        file.write('{"op": "del_detachment", "detachment": 0}\n')
+    army.detachments[0].add_unit(squad.Unit("Immortals", "Troops"))
+    army.save(path)
+    with pytest.warns(UserWarning):
+        assert journal.recover(path).save() == army.save() != saved
+    return
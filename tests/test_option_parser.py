@@ -1,6 +1,17 @@
+import concurrent.futures
+import contextlib
+import io
+import os
+import pickle
+import random
+import subprocess
+import sys
+
+import ply.yacc as yacc
 import pytest
 import init
 import option_parser
+import squad
 
 
 def test_units_dict_options():
@@ -40,3 +51,245 @@ def test_Option_class():
     assert item_list[1] == option[1]
     for i, j in enumerate(option):
         assert j == item_list[i]
+
+
+def test_ParseCache():
+    """Checks cached options are shared by key and copied per lookup."""
+    init.init("Necron")
+    cache = option_parser.ParseCache(maxsize=2)
+    options = ["Gauss blaster/Tesla carbine"]
+    first = cache.parse(options)
+    second = cache.parse(options)
+    assert cache.info() == (1, 1, 2, 1)
+    assert [i.header for i in first] == [i.header for i in second]
+
+    # each lookup keeps its own selections
+    first[0].select(1)
+    assert second[0].selected == []
+    assert cache.parse(options)[0].selected == []
+
+    # wargear context only changes the rendered header
+    exchange = cache.parse(options, current_wargear=[init.WargearItem("Gauss blaster")])
+    assert cache.info() == (3, 1, 2, 1)
+    assert "exchange Gauss blaster" in exchange[0].header
+    assert "exchange" not in first[0].header
+
+    # catalog is part of the key
+    cache.parse(["Fusion blaster"], init.get_catalog("Tau"))
+    cache.parse(["Gauss cannon"])
+    assert cache.info() == (3, 3, 2, 2)
+
+    # least recently used entry has been evicted
+    cache.parse(options)
+    assert cache.info().misses == 4
+
+    cache.clear()
+    assert cache.info() == (0, 0, 2, 0)
+
+
+def test_shared_unit_options():
+    """Checks units of the same datasheet parse their options once."""
+    init.init("Necron")
+    option_parser.parse_cache.clear()
+    units = [squad.Unit("Immortals", "Troops") for i in range(10)]
+    options = [unit.options for unit in units]
+    assert option_parser.parse_cache.info().misses == 1
+    assert option_parser.parse_cache.info().hits == 9
+
+    options[0][0].select(1)
+    units[0].change_wargear(options[0])
+    assert units[0].wargear != units[1].wargear
+    assert options[1][0].selected == []
+
+
+def test_shipped_tables(tmp_path):
+    """
+    Checks the shipped parse tables match the grammar and that importing and
+    parsing writes no files.
+    """
+    import option_parsetab
+    parser = option_parser.OptionParser()
+    pinfo = yacc.ParserReflect({k: getattr(parser, k) for k in dir(parser)})
+    pinfo.get_all()
+    assert pinfo.signature() == option_parsetab._lr_signature
+
+    code = ("import option_parser\n"
+            "assert option_parser.main_parser.parser is None\n"
+            "option_parser.OptionParser().build()\n")
+    env = dict(os.environ, PYTHONPATH=os.getcwd(), PYTHONDONTWRITEBYTECODE="1")
+    subprocess.check_call([sys.executable, "-c", code], cwd=str(tmp_path), env=env)
+    assert os.listdir(str(tmp_path)) == []
+
+
+def _engine_outcome(engine, parse_string, catalog, current_wargear=None, unit=True):
+    """
+    Parses with the given engine, returning either the exception raised or the
+    options produced, and whether a syntax error was reported.
+    """
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        parser = option_parser.OptionParser(current_wargear, unit, catalog, engine=engine)
+        try:
+            options = parser.parse2(parse_string)
+        except Exception as e:
+            return type(e), True
+    if "Syntax error" in out.getvalue():
+        return "syntax error", True
+    return [(i.header, i.no_picks, i.no_required, getattr(i, "all_models", True),
+             [repr(j) for j in i.items_involved]) for i in options], False
+
+
+def test_descent_parity():
+    """
+    Checks the hand written engine gives the same options as the ply tables
+    for every option string in the Units.json and Models.json files, for units
+    and models and with and without wargear context.
+    """
+    for faction in ["Tau", "Necron"]:
+        catalog = init.get_catalog(faction)
+        strings = []
+        for foc, units in catalog.units_dict.items():
+            for title, i in units.items():
+                strings.append((i["options"], i["wargear"]))
+        for title, i in catalog.models_dict.items():
+            strings.append((i["options"], i["wargear"]))
+
+        for options, wargear in strings:
+            if options is None:
+                continue
+            context = None
+            if wargear:
+                try:
+                    context = [init.load_wargear(i, catalog) for i in wargear]
+                except KeyError:
+                    pass
+            for unit in [True, False]:
+                for current_wargear in [None, context]:
+                    args = (options, catalog, current_wargear, unit)
+                    ply = _engine_outcome("ply", *args)
+                    assert ply[0] != "syntax error"
+                    assert _engine_outcome("descent", *args) == ply
+    return
+
+
+def test_descent_fuzz():
+    """
+    Checks the hand written engine agrees with the ply tables on a random
+    corpus of valid and invalid option strings.
+    """
+    rng = random.Random(0)
+    catalog = init.get_catalog("Necron")
+    names = sorted(catalog.wargear_index)[:12]
+    pieces = names + ["1", "2", "3", "10", "+", "-", "*", "/", "#", "^", "!"]
+    context = [init.WargearItem(names[0], catalog)]
+    valid = 0
+    for n in range(2000):
+        parse_string = "".join(rng.choice(pieces) + rng.choice(["", " "])
+                               for i in range(rng.randint(0, 7)))
+        ply = _engine_outcome("ply", [parse_string], catalog, context)
+        descent = _engine_outcome("descent", [parse_string], catalog, context)
+        # the engines agree on errors but not on ply's error recovery
+        assert ply[1] == descent[1], parse_string
+        if not ply[1]:
+            valid += 1
+            assert ply == descent, parse_string
+    assert valid > 100
+    return
+
+
+def test_set_engine():
+    """Checks the default engine can be switched at runtime."""
+    catalog = init.get_catalog("Necron")
+    parser = option_parser.OptionParser(catalog=catalog)
+    try:
+        option_parser.set_engine("descent")
+        assert parser.parse2(["Gauss blaster/Tesla carbine"])[0].header != ''
+        assert parser.parser is None  # the ply tables were never loaded
+    finally:
+        option_parser.set_engine("ply")
+    with pytest.raises(ValueError):
+        option_parser.set_engine("lalr")
+    with pytest.raises(ValueError):
+        option_parser.OptionParser(engine="lalr")
+    return
+
+
+def test_option_tree():
+    """
+    Checks options parse to immutable trees that serialise and rebuild the
+    same option, and that headers are only rendered when read.
+    """
+    catalog = init.get_catalog("Necron")
+    parser = option_parser.OptionParser(catalog=catalog)
+    strings = ["2#Gauss blaster/Tesla carbine-", "Gauss cannon-3", "Gauss blaster^2"]
+    options = parser.parse2(strings)
+
+    assert options[0].tree == ('#', 2, ('-', ('/', "Gauss blaster", "Tesla carbine"), None))
+    assert list(option_parser.tree_items(options[0].tree)) == ["Gauss blaster",
+                                                             "Tesla carbine"]
+    assert (options[0].no_picks, options[0].all_models) == (2, False)
+    assert (options[1].no_required, options[1].all_models) == (3, False)
+    with pytest.raises(AttributeError):
+        options[0].tree.op = '/'
+
+    for option in options:
+        assert option._Option__header is None  # nothing rendered yet
+        tree = pickle.loads(pickle.dumps(option.tree))
+        assert tree == option.tree
+        rebuilt = option_parser.Option.from_tree(tree, catalog)
+        assert repr(rebuilt) == repr(option)
+        assert rebuilt.no_required == option.no_required
+
+    # the catalog holds the trees of every options list
+    rows = catalog.units_dict["Troops"]["Immortals"]
+    trees = catalog.parsed_options[tuple(rows["options"])]
+    assert trees == tuple(i.tree for i in parser.parse2(rows["options"]))
+    return
+
+
+def test_threaded_parsing():
+    """
+    Hammers shared parsers and the parse cache from many threads and checks
+    every result matches parsing the same strings serially.
+    """
+    def summary(parser, parse_string, catalog):
+        try:
+            options = parser.parse2(parse_string, catalog=catalog)
+        except KeyError as e:
+            return str(e)
+        return [(repr(i), i.tree, i.no_picks, i.no_required, i.all_models)
+                for i in options]
+
+    jobs = []
+    for faction in ["Tau", "Necron"]:
+        catalog = init.get_catalog(faction)
+        rows = list(catalog.models_dict.values())
+        rows += [i for units in catalog.units_dict.values() for i in units.values()]
+        jobs += [(catalog, i["options"]) for i in rows if i["options"]]
+
+    shared = {i: option_parser.OptionParser(engine=i) for i in option_parser.ENGINES}
+    serial = {i: [summary(option_parser.OptionParser(engine=i), strings, catalog)
+                  for catalog, strings in jobs] for i in option_parser.ENGINES}
+    units = [("Immortals", "Troops"), ("Lychguard", "Elites"), ("Overlord", "HQ")]
+    serial_units = [repr(squad.Unit(*i, init.get_catalog("Necron")).options) for i in units]
+
+    def work(n):
+        rng = random.Random(n)
+        for i in rng.sample(range(len(jobs)), len(jobs)):
+            engine = rng.choice(option_parser.ENGINES)
+            catalog, strings = jobs[i]
+            assert summary(shared[engine], strings, catalog) == serial[engine][i]
+        i = rng.randrange(len(units))
+        unit = squad.Unit(*units[i], init.get_catalog("Necron"))
+        assert repr(unit.options) == serial_units[i]
+        return True
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        option_parser.parse_cache.clear()
+        with concurrent.futures.ThreadPoolExecutor(16) as executor:
+            assert all(executor.map(work, range(64)))
+    finally:
+        sys.setswitchinterval(interval)
+    return
@@ -81,6 +81,17 @@ def test_change_wargear():
     for i in wargear_selected:
         assert i in unit.wargear
 
+    # the unit's wargear only changes through change_wargear()
+    overlord = squad.Unit("Overlord", "HQ")
+    option = overlord.options[0]
+    option.select(0)
+    overlord.change_wargear([option])
+    pts = overlord.pts
+    option.select(0)
+    option.selected[0].set_no_of(3)
+    assert overlord.pts == overlord._count_pts() == pts
+    assert "Staff of light" in repr(overlord) and "2 Staff of light" not in repr(overlord)
+
 
 def test_reset():
     """
@@ -104,6 +115,114 @@ def test_reset():
     assert unit_copy.wargear == unit.wargear
 
 
+def test_get_all_wargear(unit):
+    """Checks the wargear counts follow changes to the unit and its models."""
+    counts = unit.get_all_wargear()
+    assert counts == {"Gauss cannon": 2, "Heavy gauss cannon": 1}
+    assert unit.get_all_wargear() is counts  # cached
+    with pytest.raises(TypeError):
+        counts["Gauss cannon"] = 0
+
+    unit.re_size(4, 1)
+    assert unit.get_all_wargear() == {"Gauss cannon": 4, "Heavy gauss cannon": 1}
+    unit.models[0].size = 3
+    assert unit.get_all_wargear()["Gauss cannon"] == 3
+
+    unit.models[1].change_wargear([init.WargearItem("2*Gauss cannon")])
+    assert unit.get_all_wargear() == {"Gauss cannon": 5}
+    assert unit.get_all_wargear()["Heavy gauss cannon"] == 0
+
+    # unit wargear counts once per model, grouped items separately
+    lychguard = squad.Unit("Lychguard", "Elites")
+    option = lychguard.options[0]
+    option.select(1)
+    lychguard.change_wargear([option])
+    assert lychguard.get_all_wargear() == {"Hyperphase sword": 5,
+                                           "Dispersion shield": 5}
+    return
+
+
+def test_clone(unit):
+    """Checks a cloned unit matches the original and changes independently."""
+    lychguard = squad.Unit("Lychguard", "Elites")
+    lychguard.name = "Guard"
+    option = lychguard.options[0]
+    option.select(1)
+    lychguard.change_wargear([option])
+
+    for original in [unit, lychguard]:
+        clone = original.clone()
+        assert clone.save() == original.save()
+        assert clone.pts == original.pts
+        assert clone.parent is None and clone.catalog is original.catalog
+        assert all(i.parent is clone for i in clone.models)
+        assert clone.get_all_wargear() == original.get_all_wargear()
+
+    clone = unit.clone()
+    clone.re_size(4, 0)
+    clone.models[0].change_wargear([init.WargearItem("Gauss flayer")])
+    assert unit.save()["models"][0] == {"type": "Destroyer", "size": 2,
+                                         "wargear": ["Gauss cannon"]}
+    assert unit.pts == squad.Unit(unit.save(), "Fast Attack").pts
+    assert clone.pts == squad.Unit(clone.save(), "Fast Attack").pts
+
+    clone = lychguard.clone()
+    clone.options[0].select_list([0])
+    assert lychguard.options[0].selected == [lychguard.options[0].items_involved[1]]
+    clone.change_wargear([clone.options[0]])
+    assert lychguard.save()["wargear"] == ["Hyperphase sword+Dispersion shield"]
+    assert clone.save()["name"] == "Guard"
+    return
+
+
+def test_re_size_models(unit):
+    """Checks re-sizing from a dictionary keeps the model groups in step."""
+    def check(unit):
+        groups = {}
+        for i in unit.models:
+            groups.setdefault(i.type, []).append(i)
+        assert dict(unit.model_groups) == groups
+        assert unit.pts == squad.Unit(unit.save(), unit.battlefield_role,
+                                      unit.catalog).pts
+
+    unit.pts
+    unit.re_size_models({"Heavy Destroyer": 0})
+    assert [(i.type, i.size) for i in unit.models] == [("Destroyer", 2)]
+    check(unit)
+    unit.re_size_models({"Heavy Destroyer": 1, "Destroyer": 4})
+    assert [(i.type, i.size) for i in unit.models] == [("Destroyer", 4),
+                                                       ("Heavy Destroyer", 1)]
+    check(unit)
+    with pytest.raises(ValueError):
+        unit.re_size_models({"Overlord": 1})
+
+    tau = init.get_catalog("Tau")
+    stealth = squad.Unit("XV25 Stealth Battlesuit", "Elites", tau)
+    stealth.pts
+    stealth.re_size_models({"Stealth Shas'ui": 3, "Stealth Shas'vre": 1})
+    assert [len(i) for i in stealth.model_groups.values()] == [3, 1]
+    check(stealth)
+    stealth.re_size(1, 0)  # independent models are not removed
+    assert len(stealth.model_groups["Stealth Shas'ui"]) == 3
+    check(stealth.clone())
+
+    warriors = squad.Unit("Necron Warriors", "Troops")
+    warriors.re_size_models({"Necron Warriors": 20})
+    assert warriors.size == 20 and list(warriors.model_groups) == ["Necron Warriors"]
+
+    # the default model is re-sized in place rather than removed
+    model = warriors.models[0]
+    warriors.re_size_models({"Necron Warriors": 0})
+    assert warriors.models == [model] and model.size == 0
+    warriors.re_size_models({"Necron Warriors": 10})
+    assert warriors.models[0] is model and warriors.size == 10
+    check(warriors)
+    warriors.re_size(12)
+    assert warriors.models[0] is model and warriors.size == 12
+    check(warriors)
+    return
+
+
 def test_check_validity(unit):
     """Checks the Unit.check_validty method highlights errors in the unit."""
     assert unit.check_validity() is True
@@ -118,6 +237,38 @@ def test_check_validity(unit):
     return
 
 
+def test_violations(unit):
+    """Checks the rules broken by a unit are found and re-checked on change."""
+    assert unit.violations == ()
+    assert unit.violations is unit.violations  # cached
+    unit.re_size(5, 5)
+    assert [(i.rule, i.subject, i.value, i.allowed) for i in unit.violations] == [
+        ("unit_size", None, 10, (1, 6)), ("model_limit", "Heavy Destroyer", 5, (0, 1))]
+    assert unit.violations[0].source is unit
+    assert str(unit.violations[1]).startswith("Destroyers has too many of Heavy Destroyer")
+    unit.models[1].size = 1
+    assert [i.rule for i in unit.violations] == []
+
+    # Units.json limits on wargear across the unit
+    tau = init.get_catalog("Tau")
+    stealth = squad.Unit("XV25 Stealth Battlesuit", "Elites", tau)
+    stealth.models[0].change_wargear([init.WargearItem("Fusion blaster", tau)])
+    assert stealth.get_all_wargear()["Fusion blaster"] == 3
+    assert stealth.violations == ()
+    stealth.re_size(2, 0)
+    stealth.models[1].change_wargear([init.WargearItem("Fusion blaster", tau)])
+    assert [(i.rule, i.subject, i.value, i.allowed) for i in stealth.violations] == [
+        ("wargear_limit", "Fusion blaster", 4, (0, 3))]
+    assert str(stealth.violations[0]).endswith("max allowed:3\tcurrent amount:4")
+
+    # single size units
+    barge = squad.Unit("Catacomb Command Barge", "HQ")
+    assert barge.violations == ()
+    barge.re_size(2)
+    assert barge.violations[0].allowed == (1, 1)
+    return
+
+
 def test_save_unit(unit):
     """Checks that units are saved in the correct dictionary format."""
     save = unit.save()
@@ -144,6 +295,37 @@ def test_init_Model(model):
     return
 
 
+def test_named_character():
+    """Checks named characters are found under a battlefield role."""
+    catalog = init.get_catalog("Necron")
+    anrakyr = squad.Unit("Anrakyr the Traveller", "HQ")
+    assert anrakyr.root_data is catalog.units_dict["Named Characters"]["Anrakyr the Traveller"]
+    assert catalog.units_index["Named Characters", "Anrakyr the Traveller"] is anrakyr.root_data
+    assert catalog.units_index["HQ", "Overlord"] is catalog.units_dict["HQ"]["Overlord"]
+    assert anrakyr.pts == anrakyr.root_data["pts"]
+    with pytest.raises(KeyError):
+        squad.Unit("Anrakyr the Traveller", "Not a role")
+    return
+
+
+def test_default_model():
+    """Checks units with no models use the catalog's defaults without changing it."""
+    catalog = init.get_catalog("Necron")
+    models = dict(catalog.models_dict)
+    warriors = squad.Unit("Necron Warriors", "Troops")
+    loaded = squad.Unit(warriors.save(), "Troops")
+    assert catalog.models_dict == models
+    assert "Necron Warriors" not in catalog.models_dict
+
+    model = loaded.models[0]
+    assert model.root_data is catalog.default_models["Necron Warriors"]
+    assert model.root_data["pts"] == warriors.root_data["base_pts"]
+    assert model.clone(loaded).root_data is model.root_data
+    with pytest.raises(TypeError):
+        catalog.default_models["Necron Warriors"]["pts"] = 0
+    return
+
+
 def test_save_Model(model):
     """Checks that models are saved in the correct dictionary format."""
     save = model.save()
@@ -155,3 +337,46 @@ def test_save_Model(model):
     print(model)
     print(model1)
     assert model == model1
+
+
+def test_mixed_faction_units():
+    """Checks units resolve their data through the catalog they were built with."""
+    tau = init.get_catalog("Tau")
+    riptide = squad.Unit("XV104 Riptide Battlesuit", "Elites", tau)
+    warriors = squad.Unit("Necron Warriors", "Troops")
+    assert riptide.catalog is tau
+    assert warriors.catalog is init.get_catalog("Necron")
+
+    # switching the current faction does not affect existing units
+    init.init("Tau")
+    try:
+        assert warriors.pts == 120
+        assert warriors.wargear == [init.WargearItem("Gauss flayer",
+                                                     warriors.catalog)]
+        assert riptide.options[0].items_involved[0].definition.faction == "Tau"
+    finally:
+        init.init("Necron")
+    return
+
+
+def test_slotted_objects(unit):
+    """Checks the many small objects have no __dict__ and still copy and pickle."""
+    import copy
+    import pickle
+    import option_parser
+
+    lychguard = squad.Unit("Lychguard", "Elites")
+    objects = [unit.models[0], unit.models[0].wargear[0], lychguard.options[0],
+               lychguard.options[0].items_involved[1]]
+    assert type(objects[3]) is init.MultipleItem
+    for obj in objects:
+        assert not hasattr(obj, "__dict__")
+        for clone in [copy.copy(obj), copy.deepcopy(obj)]:
+            assert type(clone) is type(obj)
+    assert isinstance(objects[2], option_parser.Option)
+
+    model = pickle.loads(pickle.dumps(unit.models[1]))
+    assert (model.type, model.size, model.pts) == ("Heavy Destroyer", 1,
+                                                   unit.models[1].pts)
+    assert pickle.loads(pickle.dumps(objects[3])).save() == objects[3].save()
+    return
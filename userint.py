@@ -8,7 +8,6 @@ UI: Text-based user interface for the Army Builder.
 
 import re
 import string
-import numpy as np
 
 import init
 from army_list import ArmyList, Detachment
@@ -116,7 +115,7 @@ class UI:
 
     def print_army(self):
         """Prints the current army."""
-        print(self.army)
+        self.army.print_army()
 
     def _get_user_options(self, unit):
         """Gets the user-chosen option for a supplied unit."""
@@ -145,7 +144,7 @@ class UI:
         for choice in user_input2:
             try:
                 # convert the choice number into the index to select the item
-                index = np.zeros(2, dtype=np.uint8)
+                index = [0, 0]
                 index[0] = int(choice[0]) - 1
                 sel_option = unit.options[index[0]]
 
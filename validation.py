@@ -0,0 +1,107 @@
+"""
+Rules that an army must follow to be legal, returned as structured
+violations rather than printed.
+
+Units and detachments keep the violations found until they change, see
+squad.Unit.violations and army_list.Detachment.violations, so checking a
+whole army after an edit only re-checks what the edit touched.
+
+Classes
+-------
+Violation:
+    A rule broken by a unit or detachment.
+
+Functions
+---------
+check_unit(unit):
+    Returns the violations of a unit's size, model and wargear limits.
+
+check_foc(detach):
+    Returns the violations of a detachment's force organisation chart.
+"""
+
+from collections import namedtuple
+
+RULES = ("unit_size", "model_limit", "wargear_limit", "foc_slots")
+
+
+class Violation(namedtuple("Violation", ["rule", "source", "subject", "value",
+                                         "allowed"])):
+    """
+    A rule broken by a unit or detachment.
+
+    Public Attributes
+    -----------------
+    rule : str
+        Rule that has been broken, one of RULES.
+    source : squad.Unit/ army_list.Detachment
+        Unit or detachment breaking the rule.
+    subject : str
+        Model type, wargear or battlefield role the rule counts, None for the
+        size of a unit.
+    value : int
+        Number counted.
+    allowed : tuple (int)
+        Minimum and maximum number allowed.
+    message : str
+        Description of the violation for displaying.
+    """
+    __slots__ = ()
+
+    @property
+    def message(self):
+        name = self.source.name
+        if self.rule == "unit_size":
+            return "{} has invalid size:\nsize range:{}-{}\tcurrent size:{}".format(
+                name, *self.allowed, self.value)
+        elif self.rule == "foc_slots":
+            return "{} has {} {} units:\nslots:{}-{}".format(
+                name, self.value, self.subject, *self.allowed)
+        return "{} has too many of {}:\nmax allowed:{}\tcurrent amount:{}".format(
+            name, self.subject, self.allowed[1], self.value)
+
+    def __str__(self):
+        return self.message
+
+
+def check_unit(unit):
+    """
+    Returns a tuple of the violations of a unit's size, the no_per_unit limit
+    of each of its models and the limits on its wargear.
+    """
+    violations = []
+    size = unit.size
+    allowed = (unit.size_range[0], unit.size_range[-1])
+    if size < allowed[0] or size > allowed[1]:
+        violations.append(Violation("unit_size", unit, None, size, allowed))
+
+    for name, models in unit.model_groups.items():
+        limit = models[0].limit
+        if limit is None:
+            continue
+        no_of = sum(i.size for i in models)
+        if no_of > limit:
+            violations.append(Violation("model_limit", unit, name, no_of, (0, limit)))
+
+    limits = unit.root_data.get("limits")
+    if limits:
+        wargear = unit.get_all_wargear()
+        for item, limit in limits.items():
+            if wargear[item] > limit:
+                violations.append(Violation("wargear_limit", unit, item,
+                                            wargear[item], (0, limit)))
+    return tuple(violations)
+
+
+def check_foc(detach):
+    """
+    Returns a tuple of the violations of the number of units in each
+    battlefield role of a detachment's force organisation chart.
+    """
+    violations = []
+    for role, units in detach.units_dict.items():
+        allowed = detach.foc[role]
+        if allowed is not None and not allowed[0] <= len(units) <= allowed[1]:
+            violations.append(Violation("foc_slots", detach, role, len(units),
+                                        tuple(allowed)))
+    return tuple(violations)